@@ -1,25 +1,64 @@
 import streamlit as st
-import pandas as pd
+import contextlib
 import copy
-import re
-import unicodedata
-import hashlib
+import functools
+import hmac
+import logging
+import os
+import tempfile
 import time
-from pathlib import Path
 from datetime import datetime, date
 from zoneinfo import ZoneInfo
-from urllib.parse import urljoin, quote
-from gspread.exceptions import APIError
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 from utils import (
-    ensure_excel_with_sheets, append_row, update_unificado,
-    PARTICIPANTES_COLS, upload_file_to_drive,
-    EXPERIENCIAS_PARTICIPANTE,
+    bootstrap_spreadsheet, append_row, sheets_api_error, update_unificado,
+    PARTICIPANTES_COLS,
+    EXPERIENCIAS_PARTICIPANTE, EXPERIENCIAS_PARTICIPANTE_LABELS,
 )
+from utils_images import preparar_documento
+from utils_participantes import (
+    INTERESES_PERSONALES, PARENTESCOS, TALLAS_CAMISA, TIPOS_DOCUMENTO_CONTACTO, TIPOS_DOCUMENTO_PARTICIPANTE,
+    SerializadorFilas, clean_phone_number, clean_string, format_upload_for_sheet, normalize_numeric_input,
+    validar_etapa1, validar_etapa2, validar_etapa3,
+)
+from utils_assets import (
+    autorizacion_en_blanco, autorizacion_url, best_variant_bytes, picture_html, start_static_variants,
+)
+from utils_blobstore import local_blob_store
+from utils_catalogo import catalogo_ciudades
+from utils_spool import upload_spool
+from utils_export import EXPORT_DIR, EXPORT_FORMATS, SHEET_COLUMNS, exportar
+from utils_importacion import errores_csv, importar_participantes
+from utils_mirror import local_mirror, start_mirror_sync
+from utils_analytics import resumen_desde_espejo
+from utils_uploads import (
+    content_hash, start_upload, wait_for_upload, upload_outbox, start_reconciler,
+)
+
+_perf_logger = logging.getLogger("claveriada.perf")
+_SCRIPT_STARTED = (time.perf_counter(), time.thread_time())
+
+
+def _record_timing(name: str, started: tuple) -> None:
+    """Log wall/CPU milliseconds of a script or fragment run for before/after comparisons."""
+    wall_ms = (time.perf_counter() - started[0]) * 1000
+    cpu_ms = (time.thread_time() - started[1]) * 1000
+    _perf_logger.debug("%s: %.1f ms (CPU %.1f ms)", name, wall_ms, cpu_ms)
+    st.session_state.setdefault("_perf_timings", {})[name] = (round(wall_ms, 1), round(cpu_ms, 1))
+
+
+def _timed(name: str):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = (time.perf_counter(), time.thread_time())
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record_timing(name, started)
+        return wrapper
+    return decorator
 
-# Word para el documento de autorización en blanco
-from docx import Document
-from docx.shared import Pt, Inches, Cm
-from docx.enum.text import WD_ALIGN_PARAGRAPH
 
 # Compatibilidad para versiones recientes de Streamlit donde experimental_rerun fue removido
 if not hasattr(st, "experimental_rerun") and hasattr(st, "rerun"):
@@ -35,6 +74,9 @@ UPLOADS_DRIVE_FOLDER_ID = (
     or st.secrets.get("DRIVE_FOLDER_ID")
     or ""
 ).strip()
+# La pestaña de administración solo aparece con ?admin=1 y pide ADMIN_PASSWORD.
+ADMIN_PASSWORD = str(st.secrets.get("ADMIN_PASSWORD") or "")
+ADMIN_MODE = st.query_params.get("admin") == "1"
 BANNER_PATH = "assets/ClaveriadaBanner-1920x650.png"
 SHEET_NAME = (st.secrets.get("SHEET_NAME") or "PARTICIPANTES").strip() or "PARTICIPANTES"
 UPLOADS_PUBLIC_BASE_URL = (st.secrets.get("UPLOADS_PUBLIC_BASE_URL") or "").strip()
@@ -44,36 +86,32 @@ UPLOADS_DRIVE_FOLDER_ID = (
     or ""
 ).strip()
 
+# Segundos que el guardado espera la subida a Drive antes de dejarla al outbox.
+UPLOAD_SAVE_WAIT_SECONDS = 5
+
 if not SPREADSHEET_ID:
     st.error("No se encontró el ID de la hoja de cálculo en st.secrets['SPREADSHEET_ID'].")
     st.stop()
 
+start_reconciler()
+start_mirror_sync(SPREADSHEET_ID)
+
 st.set_page_config(
     page_title="Claveriado RJI · Inscripción",
     layout="centered",
     initial_sidebar_state="collapsed"     # oculta la barra lateral
 )
 
-# Asegura la hoja de cálculo (no visible para usuarios) sólo una vez por sesión
-_sheets_flag_key = "_sheets_initialized_for"
-if st.session_state.get(_sheets_flag_key) != SPREADSHEET_ID:
-    last_fail_key = "_sheets_init_last_fail"
-    last_fail_ts = st.session_state.get(last_fail_key, 0.0)
-    if last_fail_ts and (time.time() - float(last_fail_ts)) < 60:
-        st.info("Reintentaremos conectar con la hoja de cálculo en unos segundos…")
-    else:
-        try:
-            ensure_excel_with_sheets(SPREADSHEET_ID)
-        except APIError as exc:  # type: ignore[attr-defined]
-            st.session_state[last_fail_key] = time.time()
-            st.warning(
-                "No se pudo verificar la hoja de cálculo en este momento. "
-                "Intenta nuevamente en unos minutos.\n\n"
-                f"Detalle técnico: {exc}"
-            )
-        else:
-            st.session_state[_sheets_flag_key] = SPREADSHEET_ID
-            st.session_state.pop(last_fail_key, None)
+# Asegura la hoja de cálculo (no visible para usuarios) una vez por proceso,
+# compartido entre todas las sesiones.
+try:
+    bootstrap_spreadsheet(SPREADSHEET_ID)
+except sheets_api_error() as exc:
+    st.warning(
+        "No se pudo verificar la hoja de cálculo en este momento. "
+        "Intenta nuevamente en unos minutos.\n\n"
+        f"Detalle técnico: {exc}"
+    )
 
 # ===== Estilos (paleta Claveriada + ocultar sidebar) =====
 st.markdown(
@@ -137,17 +175,27 @@ st.markdown(
     .stButton>button:hover, .stDownloadButton>button:hover{ filter:brightness(1.05); }
 
     /* Banner con bordes redondeados */
-    .banner-wrap img{ border-radius:16px; border:1px solid var(--border); }
+    .banner-wrap img{ border-radius:16px; border:1px solid var(--border); width:100%; height:auto; }
     </style>
     """,
     unsafe_allow_html=True
 )
 
 # ===== Banner =====
+@st.cache_resource(show_spinner=False)
+def _autorizacion_en_blanco() -> bytes:
+    """Bytes del formato de autorización en blanco, compartidos por todas las sesiones."""
+    return autorizacion_en_blanco()
+
+
 try:
-    st.markdown('<div class="banner-wrap">', unsafe_allow_html=True)
-    st.image(BANNER_PATH, use_column_width=True)
-    st.markdown("</div>", unsafe_allow_html=True)
+    # Las variantes se codifican en segundo plano; mientras tanto se ve el PNG original.
+    start_static_variants()
+    banner_html = picture_html(BANNER_PATH, alt="Claveriada RJI")
+    if banner_html and st.get_option("server.enableStaticServing"):
+        st.markdown(f'<div class="banner-wrap">{banner_html}</div>', unsafe_allow_html=True)
+    else:
+        st.image(best_variant_bytes(BANNER_PATH) or BANNER_PATH, use_column_width=True)
 except Exception:
     pass
 st.markdown("<div style='height:10px'></div>", unsafe_allow_html=True)
@@ -158,189 +206,31 @@ st.markdown('<div class="rji-title">Inscripciones · RJI</div>', unsafe_allow_ht
 st.markdown('<div class="rji-sub">Participantes y Acompañantes — Medellín, Colombia</div>', unsafe_allow_html=True)
 
 # ===== Pestañas =====
-tab1, tab2, tab3 = st.tabs(["Participante", "Acompañante/Institución", "Voluntarios"])
+tab_labels = ["Participante", "Acompañante/Institución", "Voluntarios"]
+if ADMIN_MODE:
+    tab_labels.append("Administración")
+tab1, tab2, tab3, *admin_tabs = st.tabs(tab_labels)
 
 # ===== Utilidades =====
-def crear_doc_autorizacion_en_blanco(logo_path="assets/logo.png"):
-    """Documento Word en blanco (no depende de datos)."""
-    doc = Document()
-    section = doc.sections[0]
-    section.top_margin = Cm(2); section.bottom_margin = Cm(2); section.left_margin = Cm(2); section.right_margin = Cm(2)
-    try:
-        if Path(logo_path).exists():
-            header = doc.sections[0].header
-            hdr_p = header.paragraphs[0]
-            run = hdr_p.add_run()
-            run.add_picture(logo_path, width=Inches(3.0))
-    except Exception:
-        pass
-    p = doc.add_paragraph(); p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    r = p.add_run("FORMATO DE AUTORIZACIÓN Y ACOMPAÑAMIENTO"); r.bold = True; r.font.size = Pt(16)
-    s = doc.add_paragraph(); s.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    s.add_run("Claveriada RJI – Medellín, Colombia").font.size = Pt(12)
-    info = doc.add_paragraph()
-    info.add_run("La información consignada es sensible y será utilizada únicamente para construir el perfil de cada participante "
-                 "en la Claveriada RJI y para la logística del encuentro. No será compartida con terceros.\n").font.size = Pt(10)
-    a = doc.add_paragraph()
-    a.add_run("Yo, ________________________________, identificado(a) con documento No. ________________________, "
-              "en calidad de acudiente/acompañante, autorizo la participación de las/los siguientes jóvenes en el evento.").font.size = Pt(11)
-    t = doc.add_table(rows=2, cols=2); t.style = "Table Grid"
-    t.cell(0,0).text = "Correo del acompañante"; t.cell(0,1).text = "_______________________________"
-    t.cell(1,0).text = "Teléfono del acompañante"; t.cell(1,1).text = "_______________________________"
-    doc.add_paragraph().add_run("Relación de jóvenes a cargo").bold = True
-    tbl = doc.add_table(rows=1, cols=5); tbl.style = "Table Grid"
-    hdr = tbl.rows[0].cells
-    hdr[0].text = "Nombre completo"; hdr[1].text = "Documento"; hdr[2].text = "Edad"; hdr[3].text = "EPS"; hdr[4].text = "Complicaciones de salud"
-    for _ in range(6):
-        row = tbl.add_row().cells
-        for i in range(5): row[i].text = ""
-    doc.add_paragraph("Declaro que la información es veraz y me comprometo a acompañar y velar por el bienestar de las/los jóvenes, "
-                      "cumplir las indicaciones del equipo organizador y notificar cualquier situación de salud o emergencia.")
-    f = doc.add_table(rows=2, cols=2); f.autofit = True
-    f.cell(0,0).text = "\n\n_______________________________"
-    f.cell(0,1).text = "\n\n_______________________________"
-    f.cell(1,0).text = "Firma del acompañante"
-    f.cell(1,1).text = "Firma de la institución"
-    return doc
-
-def calcular_edad(fecha_str):
-    if not fecha_str:
-        return ""
-    try:
-        d = pd.to_datetime(str(fecha_str), errors="coerce")
-        if pd.isna(d): return ""
-        today = pd.Timestamp.today().date()
-        d = d.date()
-        return today.year - d.year - ((today.month, today.day) < (d.month, d.day))
-    except Exception:
-        return ""
-
-
-def _clean_string(value: object) -> str:
-    """Return a normalized string suitable for storage without mutating widgets."""
-    if not isinstance(value, str):
-        return ""
-    normalized = unicodedata.normalize("NFKC", value)
-    normalized = normalized.strip()
-    # Collapse any internal whitespace runs to a single space
-    normalized = re.sub(r"\s+", " ", normalized)
-    return normalized
-
-
-def _clean_phone_number(value: object) -> str:
-    """Normalize a phone number keeping digits and an optional leading plus."""
-    if not isinstance(value, str):
-        return ""
-    normalized = unicodedata.normalize("NFKC", value)
-    normalized = normalized.strip()
-    if not normalized:
-        return ""
-    has_plus = normalized.startswith("+")
-    digits = "".join(ch for ch in normalized if ch.isdigit())
-    if not digits:
-        return ""
-    return f"+{digits}" if has_plus else digits
-
-
-def _format_phone_for_sheet(value: str) -> str:
-    """Prefix phone numbers with ' so Sheets treats them as literal text."""
-    if not value:
-        return ""
-    return f"'{value}"
-
-
-def _format_upload_for_sheet(path_value: str, display_name: str = "") -> str:
-    """Return a Sheets-friendly value (hyperlink when possible) for uploaded files."""
-    if not path_value:
-        return ""
-
-    path_value = str(path_value)
-    if path_value.startswith("="):
-        return path_value
-
-    filename = display_name or Path(path_value).name or "Archivo"
-    safe_label = filename.replace('"', '""')
-
-    if path_value.startswith(("http://", "https://")):
-        url = path_value.replace('"', "%22")
-        return f'=HYPERLINK("{url}", "{safe_label}")'
-
-    public_base = UPLOADS_PUBLIC_BASE_URL.rstrip("/")
-    if public_base:
-        relative = Path(path_value).as_posix()
-        # Remove leading relative markers and root slashes to avoid urljoin resets.
-        while relative.startswith("./"):
-            relative = relative[2:]
-        if relative.startswith("/"):
-            relative = relative[1:]
-        if relative.startswith("uploads/"):
-            relative_fragment = relative[len("uploads/"):]
-        else:
-            relative_fragment = relative
-        base = f"{public_base}/"
-        relative_encoded = quote(relative_fragment, safe="/")
-        url = urljoin(base, relative_encoded)
-        url = url.replace('"', "%22")
-        return f'=HYPERLINK("{url}", "{safe_label}")'
-
-    return path_value
+@st.cache_resource(show_spinner=False)
+def _serializador_participantes(public_base_url: str) -> SerializadorFilas:
+    """Plan de columnas de PARTICIPANTES, compilado una vez por proceso."""
+    return SerializadorFilas(PARTICIPANTES_COLS, public_base_url)
 
 
-def _get_participant_payload() -> dict:
-    """Centralized storage for the participant export row."""
-    return st.session_state.setdefault("_participant_payload", {})
+def _session_owner() -> str:
+    """Identify the browser session that owns spooled uploads."""
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else ""
 
-COLOMBIA_DEPARTAMENTOS = [
-    "Amazonas", "Antioquia", "Arauca", "Atlántico", "Bogotá D.C.", "Bolívar", "Boyacá", "Caldas",
-    "Caquetá", "Casanare", "Cauca", "Cesar", "Chocó", "Córdoba", "Cundinamarca", "Guainía",
-    "Guaviare", "Huila", "La Guajira", "Magdalena", "Meta", "Nariño", "Norte de Santander",
-    "Putumayo", "Quindío", "Risaralda", "San Andrés y Providencia", "Santander", "Sucre", "Tolima",
-    "Valle del Cauca", "Vaupés", "Vichada"
-]
 
-COLOMBIA_CIUDADES = {
-    "Amazonas": ["Leticia", "Puerto Nariño"],
-    "Antioquia": ["Medellín", "Bello", "Envigado", "Itagüí", "Rionegro", "Apartadó", "Turbo", "La Ceja", "Caucasia", "Sabaneta"],
-    "Arauca": ["Arauca", "Saravena", "Tame"],
-    "Atlántico": ["Barranquilla", "Soledad", "Malambo", "Sabanalarga", "Puerto Colombia"],
-    "Bogotá D.C.": ["Bogotá"],
-    "Bolívar": ["Cartagena", "Magangué", "Turbaco", "Arjona", "El Carmen de Bolívar"],
-    "Boyacá": ["Tunja", "Duitama", "Sogamoso", "Chiquinquirá", "Paipa"],
-    "Caldas": ["Manizales", "Villamaría", "Chinchiná", "La Dorada"],
-    "Caquetá": ["Florencia", "San Vicente del Caguán", "Belén de los Andaquíes"],
-    "Casanare": ["Yopal", "Aguazul", "Villanueva", "Tauramena"],
-    "Cauca": ["Popayán", "Santander de Quilichao", "Puerto Tejada", "Guapi"],
-    "Cesar": ["Valledupar", "Aguachica", "La Jagua de Ibirico", "Bosconia"],
-    "Chocó": ["Quibdó", "Istmina", "Tadó", "Condoto"],
-    "Córdoba": ["Montería", "Lorica", "Sahagún", "Planeta Rica", "Tierralta"],
-    "Cundinamarca": ["Soacha", "Chía", "Zipaquirá", "Facatativá", "Girardot"],
-    "Guainía": ["Inírida"],
-    "Guaviare": ["San José del Guaviare", "Calamar"],
-    "Huila": ["Neiva", "Pitalito", "Garzón", "La Plata"],
-    "La Guajira": ["Riohacha", "Maicao", "Uribia", "Fonseca"],
-    "Magdalena": ["Santa Marta", "Ciénaga", "Fundación", "El Banco"],
-    "Meta": ["Villavicencio", "Acacías", "Granada", "Puerto López"],
-    "Nariño": ["Pasto", "Ipiales", "Tumaco", "Túquerres"],
-    "Norte de Santander": ["Cúcuta", "Ocaña", "Pamplona", "Villa del Rosario"],
-    "Putumayo": ["Mocoa", "Puerto Asís", "Villagarzón"],
-    "Quindío": ["Armenia", "Circasia", "Montenegro", "Quimbaya"],
-    "Risaralda": ["Pereira", "Dosquebradas", "Santa Rosa de Cabal", "La Virginia"],
-    "San Andrés y Providencia": ["San Andrés", "Providencia"],
-    "Santander": ["Bucaramanga", "Floridablanca", "Girón", "Barrancabermeja", "San Gil"],
-    "Sucre": ["Sincelejo", "Corozal", "Tolú", "San Marcos"],
-    "Tolima": ["Ibagué", "Espinal", "Honda", "Melgar"],
-    "Valle del Cauca": ["Cali", "Palmira", "Buenaventura", "Buga", "Tuluá", "Yumbo"],
-    "Vaupés": ["Mitú"],
-    "Vichada": ["Puerto Carreño", "La Primavera"],
-}
+def _spool_opener(handle: str):
+    return lambda: upload_spool.open(handle)
 
-def _todas_las_ciudades():
-    ciudades = []
-    for lista in COLOMBIA_CIUDADES.values():
-        ciudades.extend(lista)
-    return sorted(set(ciudades))
 
-TODAS_LAS_CIUDADES = _todas_las_ciudades()
+def _get_participant_payload() -> dict:
+    """Centralized storage for the participant export row."""
+    return st.session_state.setdefault("_participant_payload", {})
 
 OBRAS_RJI = [
     "Bethlemitas",
@@ -385,11 +275,6 @@ OBRAS_RJI = [
     "Templo de Cristo Rey",
 ]
 
-PARENTESCOS = [
-    "Madre", "Padre", "Hermana / Hermano", "Tía / Tío", "Abuela / Abuelo", "Tutor/a legal", "Acompañante de obra", "Otro"
-]
-
-
 PARTICIPANT_DEFAULTS = {
     "part_step": 1,
     "part_es_mayor_option": "",
@@ -397,7 +282,7 @@ PARTICIPANT_DEFAULTS = {
     "part_doc_p": "",
     "_clean_part_doc_p": "",
     "part_doc_id_name": "",
-    "part_doc_id_bytes": b"",
+    "part_doc_id_handle": "",
     "part_nombres": "",
     "part_apellidos": "",
     "part_apodo": "",
@@ -443,26 +328,63 @@ PARTICIPANT_DEFAULTS = {
 }
 
 
+ACOMP_KEYS = [
+    "part_acomp_familia",
+    "part_acomp_amigos",
+    "part_acomp_escucha",
+    "part_acomp_mentoria",
+    "part_acomp_espiritual",
+    "part_acomp_red_comunidad",
+]
+
+
 def _init_participant_state():
     for key, value in PARTICIPANT_DEFAULTS.items():
         if key not in st.session_state:
             st.session_state[key] = copy.deepcopy(value)
 
 
+def _discard_participant_doc():
+    """Forget the stored document upload (spool blob, name, stats and Drive cache)."""
+    doc_handle = st.session_state.get("part_doc_id_handle")
+    if doc_handle:
+        upload_spool.discard(doc_handle)
+    st.session_state.part_doc_id_handle = ""
+    st.session_state.part_doc_id_name = ""
+    for key in (
+        "part_doc_id_stats",
+        "_part_doc_upload_file_id",
+        "_part_doc_upload_key",
+        "_part_doc_drive_hash",
+        "_part_doc_drive_link",
+    ):
+        st.session_state.pop(key, None)
+
+
 def _reset_participant_state():
     """Reset stored participant answers after a successful submission."""
+    # Suelta todo lo que la sesión dejó en el spool, no solo el documento vigente.
+    owner = _session_owner()
+    doc_handle = st.session_state.get("part_doc_id_handle")
+    if owner:
+        upload_spool.discard_owner(owner)
+    elif doc_handle:
+        upload_spool.discard(doc_handle)
+
     for key in PARTICIPANT_DEFAULTS:
         st.session_state.pop(key, None)
 
     # Clear transient helper caches so toggles and uploads start fresh.
     for transient_key in (
-        "_prev_part_acomp_values",
-        "_prev_part_acomp_ninguna",
         "part_exp_order",
         "exp_sort",
         "part_doc_archivo",
         "_part_doc_drive_hash",
         "_part_doc_drive_link",
+        "_part_doc_upload_file_id",
+        "_part_doc_upload_key",
+        "part_doc_id_stats",
+        "_part_doc_rechazado",
     ):
         st.session_state.pop(transient_key, None)
 
@@ -474,6 +396,7 @@ def _reset_participant_state():
         "part_contact_doc",
         "part_contact_doc_name",
         "part_contact_doc_bytes",
+        "part_doc_id_bytes",
         "_contact_doc_drive_hash",
         "_contact_doc_drive_link",
     ):
@@ -569,6 +492,8 @@ def _stage_progress(stage: int):
 
 def _goto_participant_stage(stage: int):
     st.session_state.part_step = stage
+    # Las etapas viven en fragmentos; el cambio de etapa sí re-ejecuta toda la app.
+    st.rerun()
 
 
 def _emit_stage_errors(messages, show: bool = True) -> bool:
@@ -578,175 +503,86 @@ def _emit_stage_errors(messages, show: bool = True) -> bool:
     return len(messages) == 0
 
 
-def _normalize_numeric_input(value: str) -> tuple[bool, str]:
-    raw = (value or "").strip()
-    if not raw:
-        return False, ""
-    allowed = set("0123456789 .-")
-    if any(ch not in allowed for ch in raw):
-        return False, ""
-    digits = "".join(ch for ch in raw if ch.isdigit())
-    if not digits:
-        return False, ""
-    return True, digits
+# Widget de cada etapa → columna de PARTICIPANTES que valida utils_participantes.
+STAGE1_FIELDS = {
+    "es_mayor_edad": "part_es_mayor_option",
+    "tipo_documento_participante": "part_tipo_doc_p",
+    "documento_participante": "part_doc_p",
+    "nombres": "part_nombres",
+    "apellidos": "part_apellidos",
+    "como_te_gusta_que_te_digan": "part_apodo",
+    "telefono_celular": "part_tel",
+    "correo": "part_correo",
+    "direccion": "part_direccion",
+    "region": "part_region",
+    "ciudad": "part_ciudad",
+    "fecha_nacimiento": "part_fecha_nac",
+    "talla_camisa": "part_talla",
+    "eps": "part_eps",
+    "restricciones_alimentarias": "part_rest_alim",
+    "salud_mental": "part_salud_mental",
+    "obra_institucion": "part_obra",
+    "proceso_juvenil": "part_proceso",
+    "tipo_documento_contacto": "part_tipo_doc_a",
+    "documento_contacto": "part_doc_a",
+    "nombres_contacto": "part_nom_a",
+    "apellidos_contacto": "part_ape_a",
+    "telefono_contacto": "part_tel_a",
+    "correo_contacto": "part_correo_a",
+    "parentesco_contacto": "part_parentesco_a",
+}
+STAGE2_FIELDS = {
+    "experiencia_significativa": "part_exp_sig",
+    "intereses_personales": "part_intereses",
+    "hobby_o_dato_curioso": "part_dato_freak",
+    "pregunta_para_conectar": "part_pregunta",
+}
+STAGE3_FIELDS = {
+    "motivo_experiencia_top": "part_motivo",
+    "conoce_rji": "part_conoce_rji",
+    "acepta_tratamiento_datos": "part_acepta_datos",
+    "acepta_whatsapp": "part_acepta_whatsapp",
+}
 
 
-def _validate_participant_stage1(show_errors: bool = True) -> bool:
-    errors = []
-    mayor_option = st.session_state.get("part_es_mayor_option", "")
-    if mayor_option not in {"Sí", "No"}:
-        errors.append("Confírmanos si eres mayor de edad para continuar.")
-
-    doc_ok, cleaned_doc = _normalize_numeric_input(st.session_state.get("part_doc_p", ""))
-    if doc_ok:
-        st.session_state["_clean_part_doc_p"] = cleaned_doc
-    else:
-        st.session_state["_clean_part_doc_p"] = ""
-        errors.append("El documento del participante debe contener solo dígitos.")
+def _stage_answers(fields: dict) -> dict:
+    return {column: st.session_state.get(widget_key) for column, widget_key in fields.items()}
 
-    doc_contact_ok, cleaned_doc_contact = _normalize_numeric_input(
-        st.session_state.get("part_doc_a", "")
-    )
-    if doc_contact_ok:
-        st.session_state["_clean_part_doc_a"] = cleaned_doc_contact
-    else:
-        st.session_state["_clean_part_doc_a"] = ""
-        errors.append("El documento del contacto debe contener solo dígitos.")
-
-    if not st.session_state.get("part_tipo_doc_p"):
-        errors.append("Selecciona el tipo de documento del participante.")
-
-    tipo_doc_contacto_val = _clean_string(st.session_state.get("part_tipo_doc_a", ""))
-    if not tipo_doc_contacto_val:
-        errors.append("Selecciona el tipo de documento del contacto.")
-
-    if not st.session_state.get("part_nombres", "").strip() or not st.session_state.get("part_apellidos", "").strip():
-        errors.append("Ingresa tus nombres y apellidos tal como aparecen en tu documento.")
-
-    if not st.session_state.get("part_direccion", "").strip():
-        errors.append("Cuéntanos tu dirección de residencia.")
-
-    if not st.session_state.get("part_region") or not st.session_state.get("part_ciudad"):
-        errors.append("Selecciona tu región y ciudad para continuar.")
-
-    if not st.session_state.get("part_talla"):
-        errors.append("Selecciona tu talla de camiseta.")
-
-    tel_clean = _clean_phone_number(st.session_state.get("part_tel", ""))
-    if not tel_clean:
-        errors.append("Déjanos un número de contacto personal válido (puedes incluir el prefijo +57).")
-
-    if not st.session_state.get("part_correo", "").strip():
-        errors.append("Incluye un correo de contacto personal.")
-
-    nom_a = st.session_state.get("part_nom_a", "").strip()
-    ape_a = st.session_state.get("part_ape_a", "").strip()
-    tel_a_clean = _clean_phone_number(st.session_state.get("part_tel_a", ""))
-    parentesco = st.session_state.get("part_parentesco_a", "")
-
-    contacto_name_issue = not nom_a or not ape_a
-    es_menor = mayor_option == "No"
-    if es_menor and contacto_name_issue:
-        errors.append("Para menores, los nombres y apellidos del acudiente son obligatorios.")
-    elif contacto_name_issue:
-        errors.append("Ingresa nombres y apellidos del contacto de emergencia.")
-
-    if not tel_a_clean:
-        errors.append("Incluye un teléfono válido para el contacto de emergencia (puedes incluir el prefijo +57).")
-
-    if not parentesco:
-        errors.append("Selecciona el parentesco o vínculo del contacto de emergencia.")
-
-    es_mayor_bool = None
-    if mayor_option == "Sí":
-        es_mayor_bool = True
-    elif mayor_option == "No":
-        es_mayor_bool = False
-
-    is_valid = len(errors) == 0
-    if is_valid:
-        payload = _get_participant_payload()
-        payload.update(
-            {
-                "es_mayor_edad": es_mayor_bool,
-                "tipo_documento_participante": st.session_state.get("part_tipo_doc_p", ""),
-                "documento_participante": cleaned_doc if doc_ok else _clean_string(st.session_state.get("part_doc_p", "")),
-                "nombres": _clean_string(st.session_state.get("part_nombres", "")),
-                "apellidos": _clean_string(st.session_state.get("part_apellidos", "")),
-                "como_te_gusta_que_te_digan": _clean_string(st.session_state.get("part_apodo", "")),
-                "telefono_celular": tel_clean,
-                "correo": _clean_string(st.session_state.get("part_correo", "")),
-                "direccion": _clean_string(st.session_state.get("part_direccion", "")),
-                "region": _clean_string(st.session_state.get("part_region", "")),
-                "ciudad": _clean_string(st.session_state.get("part_ciudad", "")),
-                "fecha_nacimiento": st.session_state.get("part_fecha_nac"),
-                "talla_camisa": st.session_state.get("part_talla", ""),
-                "eps": _clean_string(st.session_state.get("part_eps", "")),
-                "restricciones_alimentarias": _clean_string(st.session_state.get("part_rest_alim", "")),
-                "salud_mental": _clean_string(st.session_state.get("part_salud_mental", "")),
-                "obra_institucion": _clean_string(st.session_state.get("part_obra", "")),
-                "proceso_juvenil": _clean_string(st.session_state.get("part_proceso", "")),
-                "tipo_documento_contacto": tipo_doc_contacto_val,
-                "documento_contacto": (
-                    cleaned_doc_contact
-                    if doc_contact_ok
-                    else _clean_string(st.session_state.get("part_doc_a", ""))
-                ),
-                "nombres_contacto": _clean_string(nom_a),
-                "apellidos_contacto": _clean_string(ape_a),
-                "telefono_contacto": tel_a_clean,
-                "correo_contacto": _clean_string(st.session_state.get("part_correo_a", "")),
-                "parentesco_contacto": _clean_string(parentesco),
-            }
-        )
 
+def _validate_participant_stage1(show_errors: bool = True) -> bool:
+    errors, cleaned = validar_etapa1(_stage_answers(STAGE1_FIELDS))
+    if st.session_state.get("_part_doc_rechazado"):
+        errors.append("Adjunta una copia válida de tu documento (el último archivo fue rechazado).")
+    st.session_state["_clean_part_doc_p"] = cleaned["documento_participante"]
+    st.session_state["_clean_part_doc_a"] = cleaned["documento_contacto"]
+    if not errors:
+        _get_participant_payload().update(cleaned)
     return _emit_stage_errors(errors, show_errors)
 
 
 def _validate_participant_stage2(show_errors: bool = True) -> bool:
-    errors = []
-    if not st.session_state.get("part_exp_sig", "").strip():
-        errors.append("Cuéntanos una experiencia juvenil significativa.")
-
-    intereses = st.session_state.get("part_intereses", [])
-    if not intereses:
-        errors.append("Selecciona al menos un interés personal (hasta 3).")
-
-    if not st.session_state.get("part_dato_freak", "").strip():
-        errors.append("Comparte un hobby o dato curioso para continuar.")
-
-    if not st.session_state.get("part_pregunta", "").strip():
-        errors.append("Propón una pregunta para conectar con otros participantes.")
-    is_valid = len(errors) == 0
-    if is_valid:
-        payload = _get_participant_payload()
-        payload.update(
-            {
-                "experiencia_significativa": _clean_string(st.session_state.get("part_exp_sig", "")),
-                "intereses_personales": list(st.session_state.get("part_intereses", [])),
-                "hobby_o_dato_curioso": _clean_string(st.session_state.get("part_dato_freak", "")),
-                "pregunta_para_conectar": _clean_string(st.session_state.get("part_pregunta", "")),
-            }
-        )
-
+    errors, cleaned = validar_etapa2(_stage_answers(STAGE2_FIELDS))
+    if not errors:
+        _get_participant_payload().update(cleaned)
     return _emit_stage_errors(errors, show_errors)
 
 
 def _validate_participant_stage3(show_errors: bool = True) -> bool:
-    errors = []
-    if not st.session_state.get("part_motivo", "").strip():
-        errors.append("Cuéntanos por qué te interesa tu experiencia prioritaria.")
+    errors, _ = validar_etapa3(_stage_answers(STAGE3_FIELDS))
+    return _emit_stage_errors(errors, show_errors)
 
-    if st.session_state.get("part_conoce_rji") == "":
-        errors.append("Cuéntanos si conoces la RJI antes de guardar.")
 
-    if not st.session_state.get("part_acepta_datos"):
-        errors.append("Debes aceptar el aviso de privacidad.")
+def _on_acomp_ninguna():
+    """"Ninguna por ahora" clears the other acompañamiento options."""
+    if st.session_state.get("part_acomp_ninguna"):
+        for key in ACOMP_KEYS:
+            st.session_state[key] = False
 
-    if not st.session_state.get("part_acepta_whatsapp"):
-        errors.append("Debes autorizar la comunicación por WhatsApp.")
 
-    return _emit_stage_errors(errors, show_errors)
+def _on_acomp_opcion():
+    """Any other acompañamiento option clears "Ninguna por ahora"."""
+    if any(st.session_state.get(key) for key in ACOMP_KEYS):
+        st.session_state["part_acomp_ninguna"] = False
 
 
 def render_stage_progress(stage: int):
@@ -773,6 +609,600 @@ if st.session_state.get("_participant_reset_pending"):
 
 _init_participant_state()
 
+
+# Cada etapa es un fragmento: sus interacciones solo re-ejecutan ese bloque y no
+# todo el script (CSS, banner, pestañas, verificación de la hoja). Las etapas 2 y
+# 3 no usan st.form: cada widget re-ejecuta solo su etapa, así la barra de avance
+# y la exclusividad de "Ninguna por ahora" se actualizan al momento.
+@st.fragment
+@_timed("etapa_1")
+def _render_participant_stage1():
+    # Región y ciudad van fuera del formulario para que la lista de ciudades
+    # dependa de la región elegida; al cambiarla solo se re-ejecuta este fragmento.
+    catalogo = catalogo_ciudades()
+    st.subheader("Lugar de residencia")
+    col_reg, col_ciudad = st.columns(2)
+    region_options = ("",) + catalogo.regiones
+    current_region = st.session_state.get("part_region", "")
+    if current_region not in region_options:
+        st.session_state.part_region = ""
+    col_reg.selectbox(
+        "Región / Departamento",
+        region_options,
+        key="part_region",
+        format_func=lambda val: "Selecciona la región / departamento" if val == "" else val,
+    )
+
+    region = st.session_state.get("part_region", "")
+    ciudad_options = ("",) + catalogo.ciudades(region)
+    current_ciudad = st.session_state.get("part_ciudad", "")
+    if current_ciudad not in ciudad_options:
+        st.session_state.part_ciudad = ""
+    col_ciudad.selectbox(
+        "Ciudad / Municipio",
+        ciudad_options,
+        key="part_ciudad",
+        disabled=not region,
+        format_func=lambda val: (
+            "Selecciona la ciudad / municipio" if region else "Primero selecciona la región"
+        ) if val == "" else val,
+    )
+
+    with st.form("form_participante_stage1", clear_on_submit=False):
+        st.subheader("Información básica")
+        mayor_options = ["", "Sí", "No"]
+        current_mayor = st.session_state.get("part_es_mayor_option", "")
+        if current_mayor not in mayor_options:
+            st.session_state.part_es_mayor_option = ""
+        st.selectbox(
+            "¿Eres mayor de edad?",
+            mayor_options,
+            key="part_es_mayor_option",
+            format_func=lambda val: "Selecciona una opción" if val == "" else val,
+        )
+
+        doc_options = [""] + TIPOS_DOCUMENTO_PARTICIPANTE
+        current_doc = st.session_state.get("part_tipo_doc_p", "")
+        if current_doc not in doc_options:
+            st.session_state.part_tipo_doc_p = ""
+        st.selectbox(
+            "Tipo de documento",
+            doc_options,
+            key="part_tipo_doc_p",
+            format_func=lambda val: "Selecciona el tipo de documento" if val == "" else val,
+        )
+        st.text_input("Número de documento (solo dígitos)", max_chars=20, placeholder="Ej: 1234567890", key="part_doc_p")
+        doc_file = st.file_uploader(
+            "Adjunta copia del documento (PDF o imagen)",
+            type=["pdf", "png", "jpg", "jpeg"],
+            key="part_doc_archivo",
+        )
+        rechazado = st.session_state.get("_part_doc_rechazado")
+        if doc_file is not None:
+            if rechazado and rechazado[0] == doc_file.file_id:
+                st.error(rechazado[1])
+            elif st.session_state.get("_part_doc_upload_file_id") != doc_file.file_id:
+                try:
+                    doc_bytes, doc_name, doc_stats = preparar_documento(
+                        doc_file, doc_file.name, doc_file.size
+                    )
+                except ValueError as exc:
+                    # El archivo anterior no puede quedar guardado en nombre de este intento.
+                    _discard_participant_doc()
+                    st.session_state["_part_doc_rechazado"] = (doc_file.file_id, str(exc))
+                    st.error(str(exc))
+                else:
+                    _discard_participant_doc()
+                    st.session_state.pop("_part_doc_rechazado", None)
+                    doc_handle = upload_spool.put(doc_bytes, owner=_session_owner())
+                    doc_key = content_hash(doc_bytes, UPLOADS_DRIVE_FOLDER_ID)
+                    st.session_state.part_doc_id_name = doc_name
+                    st.session_state.part_doc_id_handle = doc_handle
+                    st.session_state["part_doc_id_stats"] = doc_stats
+                    # Empieza a subir a Drive ya; el guardado final solo recoge el enlace.
+                    st.session_state["_part_doc_upload_file_id"] = doc_file.file_id
+                    st.session_state["_part_doc_upload_key"] = doc_key
+                    _, doc_prefix = normalize_numeric_input(st.session_state.get("part_doc_p", ""))
+                    start_upload(
+                        _spool_opener(doc_handle),
+                        f"{doc_prefix}_{doc_name}" if doc_prefix else doc_name,
+                        UPLOADS_DRIVE_FOLDER_ID,
+                        key=doc_key,
+                    )
+        elif st.session_state.get("part_doc_id_name"):
+            st.caption(f"Archivo guardado: {st.session_state.get('part_doc_id_name')}")
+
+        st.text_input("Nombres", placeholder="Como aparecen en tu documento", key="part_nombres")
+        st.text_input("Apellidos", placeholder="Como aparecen en tu documento", key="part_apellidos")
+        st.text_input("¿Cómo te gusta que te digan?", placeholder="Opcional", key="part_apodo")
+        st.text_input("Teléfono celular", placeholder="+57 ...", key="part_tel")
+        st.text_input("Correo", placeholder="tu@correo.com", key="part_correo")
+        st.text_input("Dirección de residencia", placeholder="Barrio, calle, número", key="part_direccion")
+
+        st.date_input(
+            "Fecha de nacimiento",
+            min_value=date(1900, 1, 1),
+            max_value=date.today(),
+            key="part_fecha_nac"
+        )
+        talla_options = [""] + TALLAS_CAMISA
+        current_talla = st.session_state.get("part_talla", "")
+        if current_talla not in talla_options:
+            st.session_state.part_talla = ""
+        st.selectbox(
+            "Talla de camiseta",
+            talla_options,
+            key="part_talla",
+            format_func=lambda val: "Selecciona tu talla" if val == "" else val,
+        )
+
+        st.text_input("EPS", placeholder="Escribe tu EPS", key="part_eps")
+        st.text_input(
+            "Restricciones alimentarias (o 'ninguna')",
+            placeholder="Vegetariano, alergias, etc.",
+            key="part_rest_alim"
+        )
+        st.text_area(
+            "Complicaciones/alertas de salud (solo lo necesario para cuidarte mejor)",
+            key="part_salud_mental"
+        )
+
+        obra_options = [""] + OBRAS_RJI + ["Otra / No aparece en la lista"]
+        current_select = st.session_state.get("part_obra_select", "")
+        if current_select not in obra_options:
+            st.session_state.part_obra_select = ""
+        st.selectbox(
+            "¿De qué obra / institución vienes?",
+            obra_options,
+            key="part_obra_select",
+            format_func=lambda val: "Selecciona la obra o institución" if val == "" else val,
+        )
+        obra_sel = st.session_state.get("part_obra_select", "")
+        if obra_sel == "Otra / No aparece en la lista":
+            otra_obra = st.text_input(
+                "Escribe el nombre de tu obra / institución",
+                key="part_obra_custom"
+            )
+            st.session_state.part_obra = otra_obra.strip()
+        elif obra_sel == "":
+            st.session_state.part_obra = ""
+        else:
+            st.session_state.part_obra = obra_sel
+
+        st.text_input(
+            "¿Perteneces a algún proceso juvenil? ¿Cuál?",
+            placeholder="Nombre del proceso",
+            key="part_proceso"
+        )
+
+        st.subheader("Contacto de emergencia / acudiente")
+        st.caption("Incluye la persona que estará disponible ante cualquier emergencia.")
+        doc_ac_options = [""] + TIPOS_DOCUMENTO_CONTACTO
+        current_doc_a = st.session_state.get("part_tipo_doc_a", "")
+        if current_doc_a not in doc_ac_options:
+            st.session_state.part_tipo_doc_a = ""
+        st.text_input("Nombres del contacto", key="part_nom_a")
+        st.text_input("Apellidos del contacto", key="part_ape_a")
+        st.selectbox(
+            "Tipo de documento (contacto)",
+            doc_ac_options,
+            key="part_tipo_doc_a",
+            format_func=lambda val: "Selecciona el documento" if val == "" else val,
+        )
+        st.text_input(
+            "Documento del contacto (solo dígitos)",
+            max_chars=20,
+            placeholder="Ej: 1012345678",
+            key="part_doc_a"
+        )
+        st.text_input("Teléfono del contacto", key="part_tel_a")
+        st.text_input("Correo del contacto (opcional)", key="part_correo_a")
+        parentesco_opciones = [""] + PARENTESCOS
+        current_parentesco = st.session_state.get("part_parentesco_a", "")
+        if current_parentesco not in parentesco_opciones:
+            st.session_state.part_parentesco_a = ""
+        st.selectbox(
+            "Parentesco o vínculo",
+            parentesco_opciones,
+            key="part_parentesco_a",
+            format_func=lambda val: "Selecciona el parentesco" if val == "" else val,
+        )
+        avanzar = st.form_submit_button("Avanzar a intereses", use_container_width=True)
+        if avanzar:
+            if _validate_participant_stage1():
+                _goto_participant_stage(2)
+    render_stage_progress(1)
+
+
+@st.fragment
+@_timed("etapa_2")
+def _render_participant_stage2():
+    intereses_full = INTERESES_PERSONALES
+    st.subheader("Momentos que te han marcado")
+    st.text_area(
+        "Experiencia juvenil significativa (torneo, voluntariado, congreso, etc.)",
+        key="part_exp_sig"
+    )
+    st.multiselect(
+        "Intereses personales",
+        intereses_full,
+        key="part_intereses",
+        max_selections=3,
+        help="Selecciona hasta 3 intereses que hoy te representen más."
+    )
+    st.text_input("Hobby o dato curioso que quieras compartir", placeholder="Algo que te represente", key="part_dato_freak")
+    st.text_input("Propón una pregunta para conectar con otros", key="part_pregunta")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        volver = st.button("Retroceder", use_container_width=True, key="part_stage2_volver")
+    with col2:
+        avanzar = st.button("Avanzar a experiencias", use_container_width=True, key="part_stage2_avanzar")
+    if volver:
+        _goto_participant_stage(1)
+    elif avanzar:
+        if _validate_participant_stage2():
+            _goto_participant_stage(3)
+    render_stage_progress(2)
+
+
+@st.fragment
+@_timed("etapa_3")
+def _render_participant_stage3():
+    experiencias = list(EXPERIENCIAS_PARTICIPANTE_LABELS)
+    st.subheader("Así ordenas tus experiencias")
+    if "part_exp_order" not in st.session_state:
+        st.session_state.part_exp_order = experiencias.copy()
+    try:
+        from streamlit_sortables import sort_items  # type: ignore
+        st.caption("Arrastra para ordenar según tu interés (arriba = más interés)")
+        current_order = st.session_state.part_exp_order
+        sorted_items = sort_items(current_order, direction="vertical", key="exp_sort")
+
+        # Mantén el orden para la siguiente interacción y como resultado final
+        st.session_state.part_exp_order = sorted_items
+        order = sorted_items
+    except Exception:
+        st.caption("Selecciona en orden de interés (sin repetir).")
+
+        def ranker(options):
+            remaining = options.copy()
+            selected = []
+            for i in range(len(options)):
+                choice = st.selectbox(f"Puesto {i+1}", remaining, key=f"rank_{i}")
+                selected.append(choice)
+                remaining = [o for o in remaining if o != choice]
+            return selected
+
+        order = ranker(experiencias)
+        st.session_state.part_exp_order = order
+
+    ranks = {exp: order.index(exp) + 1 for exp in experiencias}
+    experiencia_top = order[0] if order else ""
+
+    st.text_area(
+        "¿Por qué te interesa la experiencia que pusiste de primera?",
+        max_chars=1000,
+        help="Puedes usar hasta 1000 caracteres para contarnos tu motivación.",
+        key="part_motivo"
+    )
+
+    st.markdown("#### Nivel de experticie")
+    st.slider(
+        "Mueve la barra para ubicarte",
+        min_value=1,
+        max_value=3,
+        step=1,
+        key="part_perfil_slider"
+    )
+    perfil_map = {1: "Curioso", 2: "Explorador", 3: "Protagonista"}
+    seleccionado = st.session_state.get("part_perfil_slider", 1)
+    st.markdown(
+        """
+        <div class=\"perfil-slider-labels\">
+            <span>⭐ Curioso</span>
+            <span>⭐⭐ Explorador</span>
+            <span>⭐⭐⭐ Protagonista</span>
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+    perfil_cerc = perfil_map[seleccionado]
+    st.text_area(
+        "¿Tienes alguna pregunta sobre esa experiencia?",
+        key="part_preguntas_frec"
+    )
+
+    st.markdown("#### Acompañamiento")
+    st.caption("Durante el encuentro de Claveriado 2026 tendremos distintas actividades de acompañamiento. Marca los acompañamientos con los que cuentas o quisieras fortalecer.")
+    col_a, col_b, col_c = st.columns(3)
+    col_d, col_e, col_f = st.columns(3)
+    col_a.checkbox("Familia", key="part_acomp_familia", on_change=_on_acomp_opcion)
+    col_b.checkbox("Amigos", key="part_acomp_amigos", on_change=_on_acomp_opcion)
+    col_c.checkbox(
+        "Escucha activa / apoyo emocional",
+        key="part_acomp_escucha",
+        on_change=_on_acomp_opcion,
+    )
+    col_d.checkbox("Mentoría o tutoría", key="part_acomp_mentoria", on_change=_on_acomp_opcion)
+    col_e.checkbox("Acompañamiento espiritual", key="part_acomp_espiritual", on_change=_on_acomp_opcion)
+    col_f.checkbox(
+        "Red comunitaria o institucional",
+        key="part_acomp_red_comunidad",
+        on_change=_on_acomp_opcion,
+    )
+    st.checkbox("Ninguna por ahora", key="part_acomp_ninguna", on_change=_on_acomp_ninguna)
+
+    conoce_opciones = ["", "Sí", "No", "Más o menos"]
+    current_conoce = st.session_state.get("part_conoce_rji", "")
+    if current_conoce not in conoce_opciones:
+        st.session_state.part_conoce_rji = ""
+    st.selectbox(
+        "¿Conoces qué es la RJI (Red Juvenil Ignaciana)?",
+        conoce_opciones,
+        key="part_conoce_rji",
+        format_func=lambda val: "Selecciona una opción" if val == "" else val,
+    )
+
+    st.markdown("---")
+    st.markdown(
+        "La información recolectada es sensible y se utilizará únicamente para construir tu perfil en la Claveriada RJI y para la logística del encuentro. Consulta la [política de tratamiento de datos personales](https://jesuitas.co/wp-content/uploads/2023/08/politica-de-tratamiento-de-datos-personales.pdf)."
+    )
+    st.checkbox(
+        "Acepto el tratamiento de datos personales conforme a la política indicada",
+        key="part_acepta_datos"
+    )
+    st.checkbox(
+        "Autorizo recibir información y contacto directo de la RJI vía WhatsApp",
+        key="part_acepta_whatsapp"
+    )
+
+    col_back, col_save = st.columns(2)
+    with col_back:
+        volver_etapa = st.button("Retroceder", use_container_width=True, key="part_stage3_volver")
+    with col_save:
+        guardar = st.button("Guardar participante", use_container_width=True, key="part_stage3_guardar")
+    if volver_etapa:
+        _goto_participant_stage(2)
+    elif guardar:
+        if not _validate_participant_stage3():
+            pass
+        else:
+            es_mayor = st.session_state.get("part_es_mayor_option") == "Sí"
+            doc_p_clean = st.session_state.get("_clean_part_doc_p", "").strip()
+            if not doc_p_clean:
+                doc_ok, normalized = normalize_numeric_input(st.session_state.get("part_doc_p", ""))
+                doc_p_clean = normalized if doc_ok else st.session_state.get("part_doc_p", "").strip()
+            doc_p = doc_p_clean
+
+            doc_a_clean = st.session_state.get("_clean_part_doc_a", "").strip()
+            if not doc_a_clean:
+                doc_a_ok, normalized_a = normalize_numeric_input(st.session_state.get("part_doc_a", ""))
+                fallback_doc = st.session_state.get("part_doc_a", "")
+                doc_a_clean = normalized_a if doc_a_ok else clean_string(fallback_doc)
+            doc_a = doc_a_clean
+
+            tipo_doc_contacto_val = clean_string(st.session_state.get("part_tipo_doc_a", ""))
+
+            ts = datetime.now(ZoneInfo("America/Bogota")).isoformat(timespec="seconds")
+            intereses = st.session_state.get("part_intereses", [])
+            conoce_map = {"Sí": "Si", "No": "No", "Más o menos": "Mas o menos", "": ""}
+            acomp_items = []
+            if st.session_state.get("part_acomp_familia"):
+                acomp_items.append("Familia")
+            if st.session_state.get("part_acomp_amigos"):
+                acomp_items.append("Amigos")
+            if st.session_state.get("part_acomp_escucha"):
+                acomp_items.append("Escucha activa / apoyo emocional")
+            if st.session_state.get("part_acomp_mentoria"):
+                acomp_items.append("Mentoría o tutoría")
+            if st.session_state.get("part_acomp_espiritual"):
+                acomp_items.append("Acompañamiento espiritual")
+            if st.session_state.get("part_acomp_red_comunidad"):
+                acomp_items.append("Red comunitaria o institucional")
+            if st.session_state.get("part_acomp_ninguna"):
+                acomp_items.append("Ninguna")
+
+            payload = _get_participant_payload()
+
+            def _capture_field(
+                key: str,
+                raw_value: object,
+                *,
+                sanitizer=clean_string,
+                allow_empty: bool = False,
+            ) -> str:
+                existing = payload.get(key, "")
+                clean = sanitizer(raw_value)
+                if clean:
+                    payload[key] = clean
+                    return clean
+                if allow_empty:
+                    if key not in payload:
+                        payload[key] = ""
+                        return ""
+                    return payload.get(key, "")
+                return existing
+
+            if doc_p:
+                payload["documento_participante"] = doc_p
+            if st.session_state.get("part_tipo_doc_p") or not payload.get("tipo_documento_participante"):
+                payload["tipo_documento_participante"] = st.session_state.get("part_tipo_doc_p", "")
+            payload["es_mayor_edad"] = es_mayor
+
+            if doc_a or "documento_contacto" not in payload:
+                payload["documento_contacto"] = doc_a
+            if tipo_doc_contacto_val or "tipo_documento_contacto" not in payload:
+                payload["tipo_documento_contacto"] = tipo_doc_contacto_val
+
+            participante_doc_url = payload.get("archivo_doc_participante", "")
+            participante_label = payload.get("archivo_doc_participante_label", "")
+            participant_drive_failed = False
+            participant_doc_deferred = None
+
+            doc_handle = st.session_state.get("part_doc_id_handle")
+            if doc_handle and not upload_spool.exists(doc_handle):
+                st.warning(
+                    "El documento adjunto expiró por inactividad. "
+                    "Vuelve a la etapa 1 si quieres adjuntarlo de nuevo."
+                )
+                doc_handle = ""
+            if doc_handle and st.session_state.get("part_doc_id_name"):
+                participante_filename = f"{doc_p}_{st.session_state['part_doc_id_name']}"
+                with upload_spool.open(doc_handle) as src:
+                    participante_path = local_blob_store.put_stream(src, participante_filename)
+                participante_label = participante_filename
+                drive_link = ""
+                part_hash = st.session_state.get("_part_doc_upload_key")
+                if not part_hash:
+                    part_hash = content_hash(upload_spool.read(doc_handle), UPLOADS_DRIVE_FOLDER_ID)
+                cached_hash = st.session_state.get("_part_doc_drive_hash")
+                cached_link = st.session_state.get("_part_doc_drive_link")
+                if cached_hash == part_hash and cached_link:
+                    drive_link = cached_link
+                else:
+                    drive_link = wait_for_upload(
+                        _spool_opener(doc_handle),
+                        participante_filename,
+                        UPLOADS_DRIVE_FOLDER_ID,
+                        key=part_hash,
+                        timeout=UPLOAD_SAVE_WAIT_SECONDS,
+                    )
+                    if drive_link:
+                        st.session_state["_part_doc_drive_hash"] = part_hash
+                        st.session_state["_part_doc_drive_link"] = drive_link
+                if drive_link:
+                    participante_doc_url = drive_link
+                    local_blob_store.mark_in_drive(participante_path, drive_link)
+                else:
+                    participante_doc_url = str(participante_path)
+                    participant_doc_deferred = (part_hash, participante_path, participante_filename)
+                    if UPLOADS_DRIVE_FOLDER_ID:
+                        participant_drive_failed = True
+
+
+            # (columna, clave del widget, sanitizador, admite vacío)
+            campos_texto = [
+                ("nombres", "part_nombres", clean_string, False),
+                ("apellidos", "part_apellidos", clean_string, False),
+                ("como_te_gusta_que_te_digan", "part_apodo", clean_string, True),
+                ("telefono_celular", "part_tel", clean_phone_number, False),
+                ("correo", "part_correo", clean_string, False),
+                ("direccion", "part_direccion", clean_string, False),
+                ("region", "part_region", clean_string, False),
+                ("ciudad", "part_ciudad", clean_string, False),
+                ("eps", "part_eps", clean_string, True),
+                ("restricciones_alimentarias", "part_rest_alim", clean_string, True),
+                ("salud_mental", "part_salud_mental", clean_string, True),
+                ("obra_institucion", "part_obra", clean_string, False),
+                ("proceso_juvenil", "part_proceso", clean_string, True),
+                ("hobby_o_dato_curioso", "part_dato_freak", clean_string, True),
+                ("pregunta_para_conectar", "part_pregunta", clean_string, True),
+                ("motivo_experiencia_top", "part_motivo", clean_string, False),
+                ("preguntas_frecuentes", "part_preguntas_frec", clean_string, True),
+                ("tipo_documento_contacto", "part_tipo_doc_a", clean_string, True),
+                ("documento_contacto", "part_doc_a", lambda raw: doc_a or clean_string(raw), True),
+                ("nombres_contacto", "part_nom_a", clean_string, False),
+                ("apellidos_contacto", "part_ape_a", clean_string, False),
+                ("telefono_contacto", "part_tel_a", clean_phone_number, False),
+                ("correo_contacto", "part_correo_a", clean_string, True),
+                ("parentesco_contacto", "part_parentesco_a", clean_string, False),
+            ]
+            for column, widget_key, sanitizer, allow_empty in campos_texto:
+                _capture_field(
+                    column,
+                    st.session_state.get(widget_key, ""),
+                    sanitizer=sanitizer,
+                    allow_empty=allow_empty,
+                )
+
+            exp_sig_val = payload.get("experiencia_significativa") or clean_string(st.session_state.get("part_exp_sig", ""))
+            if exp_sig_val:
+                payload["experiencia_significativa"] = exp_sig_val
+            if intereses:
+                payload["intereses_personales"] = list(intereses)
+
+            fecha_nac_value = st.session_state.get("part_fecha_nac")
+            if fecha_nac_value is not None or "fecha_nacimiento" not in payload:
+                payload["fecha_nacimiento"] = fecha_nac_value
+            talla_value = st.session_state.get("part_talla", "")
+            if talla_value or "talla_camisa" not in payload:
+                payload["talla_camisa"] = talla_value
+
+            payload["acompanamientos_marcados"] = ", ".join(acomp_items)
+            payload["acompanamiento_familia"] = bool(st.session_state.get("part_acomp_familia"))
+            payload["acompanamiento_amigos"] = bool(st.session_state.get("part_acomp_amigos"))
+            payload["acompanamiento_escucha_activa"] = bool(st.session_state.get("part_acomp_escucha"))
+            payload["acompanamiento_mentoria"] = bool(st.session_state.get("part_acomp_mentoria"))
+            payload["acompanamiento_espiritual"] = bool(st.session_state.get("part_acomp_espiritual"))
+            payload["acompanamiento_red_comunitaria"] = bool(st.session_state.get("part_acomp_red_comunidad"))
+            payload["acompanamiento_ninguna"] = bool(st.session_state.get("part_acomp_ninguna"))
+
+            conoce_value = conoce_map.get(st.session_state.get("part_conoce_rji"), "")
+            if conoce_value or "conoce_rji" not in payload:
+                payload["conoce_rji"] = conoce_value
+
+            acepta_datos = bool(st.session_state.get("part_acepta_datos"))
+            acepta_whatsapp = bool(st.session_state.get("part_acepta_whatsapp"))
+            payload["acepta_tratamiento_datos"] = acepta_datos
+            payload["acepta_whatsapp"] = acepta_whatsapp
+            payload["experiencia_top_calculada"] = experiencia_top
+            payload["nivel_experticie"] = perfil_cerc
+            if participante_doc_url:
+                payload["archivo_doc_participante"] = participante_doc_url
+            elif "archivo_doc_participante" not in payload:
+                payload["archivo_doc_participante"] = ""
+            if participante_label:
+                payload["archivo_doc_participante_label"] = participante_label
+            elif "archivo_doc_participante_label" not in payload:
+                payload["archivo_doc_participante_label"] = ""
+            participante_doc_cell = format_upload_for_sheet(
+                payload.get("archivo_doc_participante", participante_doc_url),
+                payload.get("archivo_doc_participante_label", participante_label),
+                UPLOADS_PUBLIC_BASE_URL,
+            )
+            drive_error_message = st.session_state.get("_drive_last_error", "").strip()
+            if drive_error_message and participant_drive_failed:
+                st.warning(
+                    "No se pudo publicar uno o más archivos en Drive. Se guardó la ruta local por ahora "
+                    "y el enlace se actualizará automáticamente cuando la subida termine. "
+                    "Mensaje técnico: " + drive_error_message
+                )
+
+            for label, column_key in EXPERIENCIAS_PARTICIPANTE:
+                payload[column_key] = int(ranks[label]) if label in ranks else 0
+            payload["timestamp"] = ts
+
+            row = _serializador_participantes(UPLOADS_PUBLIC_BASE_URL)(payload)
+            try:
+                append_row(SPREADSHEET_ID, SHEET_NAME, row, PARTICIPANTES_COLS, prepared=True)
+                if participant_doc_deferred:
+                    deferred_hash, deferred_path, deferred_name = participant_doc_deferred
+                    upload_outbox.enqueue(
+                        deferred_hash,
+                        deferred_path,
+                        deferred_name,
+                        UPLOADS_DRIVE_FOLDER_ID,
+                        SPREADSHEET_ID,
+                        SHEET_NAME,
+                        "documento_participante",
+                        payload.get("documento_participante", doc_p),
+                        "archivo_doc_participante",
+                        participante_doc_cell,
+                        label=participante_label,
+                    )
+                try:
+                    update_unificado(SPREADSHEET_ID)
+                except Exception:
+                    pass
+                st.session_state["_participant_success_message"] = "¡Tu registro quedó guardado! Gracias por llegar al final ✨"
+                st.session_state["_participant_reset_pending"] = True
+                st.experimental_rerun()
+            except Exception as e:
+                st.error(f"No se pudo guardar: {e}")
+    render_stage_progress(3)
+
+
 # ================= PARTICIPANTE =================
 with tab1:
     success_message = st.session_state.pop("_participant_success_message", "")
@@ -794,677 +1224,242 @@ with tab1:
     st.markdown(f"### {stage_titles.get(stage, '')}")
     st.markdown(f"<div class='motivacion-box'>{motivaciones.get(stage, '')}</div>", unsafe_allow_html=True)
 
-    experiencias = [label for label, _ in EXPERIENCIAS_PARTICIPANTE]
-
-    ACOMP_KEYS = [
-        "part_acomp_familia",
-        "part_acomp_amigos",
-        "part_acomp_escucha",
-        "part_acomp_mentoria",
-        "part_acomp_espiritual",
-        "part_acomp_red_comunidad",
-    ]
-
     if stage == 1:
-        with st.form("form_participante_stage1", clear_on_submit=False):
-            st.subheader("Información básica")
-            mayor_options = ["", "Sí", "No"]
-            current_mayor = st.session_state.get("part_es_mayor_option", "")
-            if current_mayor not in mayor_options:
-                st.session_state.part_es_mayor_option = ""
-            st.selectbox(
-                "¿Eres mayor de edad?",
-                mayor_options,
-                key="part_es_mayor_option",
-                format_func=lambda val: "Selecciona una opción" if val == "" else val,
-            )
-
-            doc_options = ["", "CC", "TI", "CE", "Pasaporte", "Otro"]
-            current_doc = st.session_state.get("part_tipo_doc_p", "")
-            if current_doc not in doc_options:
-                st.session_state.part_tipo_doc_p = ""
-            st.selectbox(
-                "Tipo de documento",
-                doc_options,
-                key="part_tipo_doc_p",
-                format_func=lambda val: "Selecciona el tipo de documento" if val == "" else val,
-            )
-            st.text_input("Número de documento (solo dígitos)", max_chars=20, placeholder="Ej: 1234567890", key="part_doc_p")
-            doc_file = st.file_uploader(
-                "Adjunta copia del documento (PDF o imagen)",
-                type=["pdf", "png", "jpg", "jpeg"],
-                key="part_doc_archivo",
-            )
-            if doc_file is not None:
-                st.session_state.part_doc_id_name = doc_file.name
-                st.session_state.part_doc_id_bytes = doc_file.getbuffer().tobytes()
-            elif st.session_state.get("part_doc_id_name"):
-                st.caption(f"Archivo guardado: {st.session_state.get('part_doc_id_name')}")
-
-            nombres = st.text_input("Nombres", placeholder="Como aparecen en tu documento", key="part_nombres")
-            apellidos = st.text_input("Apellidos", placeholder="Como aparecen en tu documento", key="part_apellidos")
-            apodo = st.text_input("¿Cómo te gusta que te digan?", placeholder="Opcional", key="part_apodo")
-            telefono = st.text_input("Teléfono celular", placeholder="+57 ...", key="part_tel")
-            correo = st.text_input("Correo", placeholder="tu@correo.com", key="part_correo")
-            direccion = st.text_input("Dirección de residencia", placeholder="Barrio, calle, número", key="part_direccion")
-
-            col_reg, col_ciudad = st.columns(2)
-            region_options = [""] + COLOMBIA_DEPARTAMENTOS
-            current_region = st.session_state.get("part_region", "")
-            if current_region not in region_options:
-                st.session_state.part_region = ""
-            col_reg.selectbox(
-                "Región / Departamento",
-                region_options,
-                key="part_region",
-                format_func=lambda val: "Selecciona la región / departamento" if val == "" else val,
-            )
-
-            ciudad_options = [""] + TODAS_LAS_CIUDADES
-            current_ciudad = st.session_state.get("part_ciudad", "")
-            if current_ciudad not in ciudad_options:
-                st.session_state.part_ciudad = ""
-            col_ciudad.selectbox(
-                "Ciudad / Municipio",
-                ciudad_options,
-                key="part_ciudad",
-                format_func=lambda val: "Selecciona la ciudad / municipio" if val == "" else val,
-            )
+        _render_participant_stage1()
+    elif stage == 2:
+        _render_participant_stage2()
+    else:  # stage 3
+        _render_participant_stage3()
 
-            st.date_input(
-                "Fecha de nacimiento",
-                min_value=date(1900, 1, 1),
-                max_value=date.today(),
-                key="part_fecha_nac"
-            )
-            talla_options = ["", "16", "XS", "S", "M", "L", "XL", "2XL"]
-            current_talla = st.session_state.get("part_talla", "")
-            if current_talla not in talla_options:
-                st.session_state.part_talla = ""
-            st.selectbox(
-                "Talla de camiseta",
-                talla_options,
-                key="part_talla",
-                format_func=lambda val: "Selecciona tu talla" if val == "" else val,
+# ================= ACOMPAÑANTE =================
+with tab2:
+    st.info("RED JUVENIL IGNACIANA ESTÁ EN PROCESO DE SELECCIÓN DE ACOMPAÑANTES.")
+    autorizacion_static = autorizacion_url() if st.get_option("server.enableStaticServing") else ""
+    if autorizacion_static:
+        # Archivo generado en el build: el navegador lo baja sin pasar por Python.
+        st.markdown(
+            f'<a href="{autorizacion_static}" download="formato_autorizacion_rji.docx">'
+            "Descargar formato de autorización (Word)</a>",
+            unsafe_allow_html=True,
+        )
+    elif st.session_state.get("_autorizacion_pedida") or st.button("Preparar formato de autorización (Word)"):
+        # Sin archivo de build se genera con python-docx solo cuando alguien lo pide.
+        st.session_state["_autorizacion_pedida"] = True
+        try:
+            st.download_button(
+                "Descargar formato de autorización (Word)",
+                data=_autorizacion_en_blanco(),
+                file_name="formato_autorizacion_rji.docx",
+                mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
             )
+        except Exception:
+            st.warning("No pudimos preparar el formato de autorización en este momento.")
 
-            eps = st.text_input("EPS", placeholder="Escribe tu EPS", key="part_eps")
-            rest_alim = st.text_input(
-                "Restricciones alimentarias (o 'ninguna')",
-                placeholder="Vegetariano, alergias, etc.",
-                key="part_rest_alim"
-            )
-            salud = st.text_area(
-                "Complicaciones/alertas de salud (solo lo necesario para cuidarte mejor)",
-                key="part_salud_mental"
-            )
+# ================= VOLUNTARIADO =================
+with tab3:
+    st.info("RED JUVENIL IGNACIANA ESTÁ EN PROCESO DE SELECCIÓN DE VOLUNTARIOS.")
 
-            obra_options = [""] + OBRAS_RJI + ["Otra / No aparece en la lista"]
-            current_select = st.session_state.get("part_obra_select", "")
-            if current_select not in obra_options:
-                st.session_state.part_obra_select = ""
-            st.selectbox(
-                "¿De qué obra / institución vienes?",
-                obra_options,
-                key="part_obra_select",
-                format_func=lambda val: "Selecciona la obra o institución" if val == "" else val,
-            )
-            obra_sel = st.session_state.get("part_obra_select", "")
-            if obra_sel == "Otra / No aparece en la lista":
-                otra_obra = st.text_input(
-                    "Escribe el nombre de tu obra / institución",
-                    key="part_obra_custom"
+# ================= ADMINISTRACIÓN =================
+def _admin_authenticated() -> bool:
+    if st.session_state.get("_admin_ok"):
+        return True
+    if not ADMIN_PASSWORD:
+        st.info("Configura ADMIN_PASSWORD en los secrets para habilitar la administración.")
+        return False
+    with st.form("admin_login"):
+        password = st.text_input("Contraseña de administración", type="password")
+        entrar = st.form_submit_button("Entrar")
+    if entrar:
+        if hmac.compare_digest(password.encode("utf-8"), ADMIN_PASSWORD.encode("utf-8")):
+            st.session_state["_admin_ok"] = True
+            st.rerun()
+        st.error("Contraseña incorrecta.")
+    return False
+
+
+@st.fragment
+def _render_admin_import():
+    st.subheader("Importar delegación (CSV / XLSX)")
+    st.caption(
+        "Una fila por participante, con los encabezados de la hoja PARTICIPANTES. "
+        "Cada fila pasa por las mismas validaciones del formulario."
+    )
+    obra = st.selectbox(
+        "Obra / institución para las filas que no la indiquen",
+        [""] + OBRAS_RJI,
+        format_func=lambda val: "Tomar la del archivo" if val == "" else val,
+    )
+    archivo = st.file_uploader("Archivo de la delegación", type=["csv", "xlsx"], key="admin_import_file")
+    solo_validar = st.checkbox("Solo validar (no escribir en la hoja)", value=True)
+    if archivo is not None and st.button("Importar", use_container_width=True):
+        with st.status("Importando delegación…") as estado:
+            try:
+                resumen = importar_participantes(
+                    archivo,
+                    archivo.name,
+                    SPREADSHEET_ID,
+                    SHEET_NAME,
+                    obra=obra,
+                    dry_run=solo_validar,
+                    public_base_url=UPLOADS_PUBLIC_BASE_URL,
+                    progress=lambda leidas, aceptadas: estado.update(
+                        label=f"{leidas} filas leídas · {aceptadas} aceptadas"
+                    ),
                 )
-                st.session_state.part_obra = otra_obra.strip()
-            elif obra_sel == "":
-                st.session_state.part_obra = ""
-            else:
-                st.session_state.part_obra = obra_sel
-
-            proceso = st.text_input(
-                "¿Perteneces a algún proceso juvenil? ¿Cuál?",
-                placeholder="Nombre del proceso",
-                key="part_proceso"
-            )
-
-            st.subheader("Contacto de emergencia / acudiente")
-            st.caption("Incluye la persona que estará disponible ante cualquier emergencia.")
-            doc_ac_options = ["", "CC", "CE", "Pasaporte", "Otro"]
-            current_doc_a = st.session_state.get("part_tipo_doc_a", "")
-            if current_doc_a not in doc_ac_options:
-                st.session_state.part_tipo_doc_a = ""
-            st.text_input("Nombres del contacto", key="part_nom_a")
-            st.text_input("Apellidos del contacto", key="part_ape_a")
-            st.selectbox(
-                "Tipo de documento (contacto)",
-                doc_ac_options,
-                key="part_tipo_doc_a",
-                format_func=lambda val: "Selecciona el documento" if val == "" else val,
-            )
-            st.text_input(
-                "Documento del contacto (solo dígitos)",
-                max_chars=20,
-                placeholder="Ej: 1012345678",
-                key="part_doc_a"
-            )
-            st.text_input("Teléfono del contacto", key="part_tel_a")
-            st.text_input("Correo del contacto (opcional)", key="part_correo_a")
-            parentesco_opciones = [""] + PARENTESCOS
-            current_parentesco = st.session_state.get("part_parentesco_a", "")
-            if current_parentesco not in parentesco_opciones:
-                st.session_state.part_parentesco_a = ""
-            st.selectbox(
-                "Parentesco o vínculo",
-                parentesco_opciones,
-                key="part_parentesco_a",
-                format_func=lambda val: "Selecciona el parentesco" if val == "" else val,
-            )
-            avanzar = st.form_submit_button("Avanzar a intereses", use_container_width=True)
-            if avanzar:
-                if _validate_participant_stage1():
-                    _goto_participant_stage(2)
-
-    elif stage == 2:
-        intereses_full = [
-            "Aventura", "Deporte", "Contemplación", "Arte", "Música", "Danza", "Teatro", "Fotografía",
-            "Ciencia", "Tecnología", "Videojuegos", "Cocina", "Emprendimiento", "Lectura", "Naturaleza",
-            "Ecología integral", "Montaña", "Ciclismo", "Senderismo", "Viajes", "Idiomas",
-            "Servicio comunitario", "Liderazgo", "Mascotas"
-        ]
-        with st.form("form_participante_stage2", clear_on_submit=False):
-            st.subheader("Momentos que te han marcado")
-            st.text_area(
-                "Experiencia juvenil significativa (torneo, voluntariado, congreso, etc.)",
-                key="part_exp_sig"
-            )
-            st.multiselect(
-                "Intereses personales",
-                intereses_full,
-                key="part_intereses",
-                max_selections=3,
-                help="Selecciona hasta 3 intereses que hoy te representen más."
-            )
-            st.text_input("Hobby o dato curioso que quieras compartir", placeholder="Algo que te represente", key="part_dato_freak")
-            st.text_input("Propón una pregunta para conectar con otros", key="part_pregunta")
-
-            col1, col2 = st.columns(2)
-            with col1:
-                volver = st.form_submit_button("Retroceder", use_container_width=True)
-            with col2:
-                avanzar = st.form_submit_button("Avanzar a experiencias", use_container_width=True)
-            if volver:
-                _goto_participant_stage(1)
-            elif avanzar:
-                if _validate_participant_stage2():
-                    _goto_participant_stage(3)
-
-    else:  # stage 3
-        with st.form("form_participante_stage3", clear_on_submit=False):
-            st.subheader("Así ordenas tus experiencias")
-            if "part_exp_order" not in st.session_state:
-                st.session_state.part_exp_order = experiencias.copy()
+            except (ValueError, RuntimeError, sheets_api_error()) as exc:
+                estado.update(label="La importación falló", state="error")
+                st.error(f"No se pudo importar el archivo: {exc}")
+                return
+            estado.update(label="Importación terminada", state="complete")
+        if resumen["escritas"]:
             try:
-                from streamlit_sortables import sort_items  # type: ignore
-                st.caption("Arrastra para ordenar según tu interés (arriba = más interés)")
-                current_order = st.session_state.part_exp_order
-                sorted_items = sort_items(current_order, direction="vertical", key="exp_sort")
-
-                # Mantén el orden para la siguiente interacción y como resultado final
-                st.session_state.part_exp_order = sorted_items
-                order = sorted_items
+                update_unificado(SPREADSHEET_ID)
             except Exception:
-                st.caption("Selecciona en orden de interés (sin repetir).")
-
-                def ranker(options):
-                    remaining = options.copy()
-                    selected = []
-                    for i in range(len(options)):
-                        choice = st.selectbox(f"Puesto {i+1}", remaining, key=f"rank_{i}")
-                        selected.append(choice)
-                        remaining = [o for o in remaining if o != choice]
-                    return selected
-
-                order = ranker(experiencias)
-                st.session_state.part_exp_order = order
-
-            ranks = {exp: order.index(exp) + 1 for exp in experiencias}
-            experiencia_top = order[0] if order else ""
-
-            st.text_area(
-                "¿Por qué te interesa la experiencia que pusiste de primera?",
-                max_chars=1000,
-                help="Puedes usar hasta 1000 caracteres para contarnos tu motivación.",
-                key="part_motivo"
+                pass
+        st.session_state["_admin_import_result"] = resumen
+
+    resumen = st.session_state.get("_admin_import_result")
+    if resumen:
+        col_l, col_a, col_e, col_x = st.columns(4)
+        col_l.metric("Leídas", resumen["leidas"])
+        col_a.metric("Aceptadas", resumen["aceptadas"])
+        col_e.metric("Escritas", resumen["escritas"])
+        col_x.metric("Con errores", len(resumen["errores"]))
+        if resumen["errores"]:
+            st.dataframe(
+                [
+                    {"fila": fila, "documento": documento, "errores": " | ".join(errores)}
+                    for fila, documento, errores in resumen["errores"][:200]
+                ],
+                use_container_width=True,
+                hide_index=True,
             )
-
-            st.markdown("#### Nivel de experticie")
-            st.slider(
-                "Mueve la barra para ubicarte",
-                min_value=1,
-                max_value=3,
-                step=1,
-                key="part_perfil_slider"
-            )
-            perfil_map = {1: "Curioso", 2: "Explorador", 3: "Protagonista"}
-            seleccionado = st.session_state.get("part_perfil_slider", 1)
-            st.markdown(
-                """
-                <div class=\"perfil-slider-labels\">
-                    <span>⭐ Curioso</span>
-                    <span>⭐⭐ Explorador</span>
-                    <span>⭐⭐⭐ Protagonista</span>
-                </div>
-                """,
-                unsafe_allow_html=True,
-            )
-            perfil_cerc = perfil_map[seleccionado]
-            st.text_area(
-                "¿Tienes alguna pregunta sobre esa experiencia?",
-                key="part_preguntas_frec"
+            st.download_button(
+                "Descargar errores (CSV)",
+                data=errores_csv(resumen),
+                file_name="errores_importacion.csv",
+                mime="text/csv",
             )
 
-            st.markdown("#### Acompañamiento")
-            st.caption("Durante el encuentro de Claveriado 2026 tendremos distintas actividades de acompañamiento. Marca los acompañamientos con los que cuentas o quisieras fortalecer.")
-            col_a, col_b, col_c = st.columns(3)
-            col_d, col_e, col_f = st.columns(3)
-            col_a.checkbox("Familia", key="part_acomp_familia")
-            col_b.checkbox("Amigos", key="part_acomp_amigos")
-            col_c.checkbox(
-                "Escucha activa / apoyo emocional",
-                key="part_acomp_escucha",
-            )
-            col_d.checkbox("Mentoría o tutoría", key="part_acomp_mentoria")
-            col_e.checkbox("Acompañamiento espiritual", key="part_acomp_espiritual")
-            col_f.checkbox(
-                "Red comunitaria o institucional",
-                key="part_acomp_red_comunidad",
-            )
-            st.checkbox("Ninguna por ahora", key="part_acomp_ninguna")
-
-            current_none = bool(st.session_state.get("part_acomp_ninguna"))
-            current_values = {
-                key: bool(st.session_state.get(key))
-                for key in ACOMP_KEYS
-            }
-            prev_values = st.session_state.get("_prev_part_acomp_values")
-            prev_none = st.session_state.get("_prev_part_acomp_ninguna")
-
-            none_toggled_on = current_none and not bool(prev_none)
-            if prev_values is None:
-                toggled_other_keys = [key for key, val in current_values.items() if val]
-            else:
-                toggled_other_keys = [
-                    key
-                    for key, val in current_values.items()
-                    if val and not bool(prev_values.get(key))
-                ]
-
-            if none_toggled_on:
-                for key in ACOMP_KEYS:
-                    if st.session_state.get(key):
-                        st.session_state[key] = False
-            elif toggled_other_keys and current_none:
-                st.session_state["part_acomp_ninguna"] = False
-
-            st.session_state["_prev_part_acomp_values"] = current_values
-            st.session_state["_prev_part_acomp_ninguna"] = current_none
-
-            conoce_opciones = ["", "Sí", "No", "Más o menos"]
-            current_conoce = st.session_state.get("part_conoce_rji", "")
-            if current_conoce not in conoce_opciones:
-                st.session_state.part_conoce_rji = ""
-            st.selectbox(
-                "¿Conoces qué es la RJI (Red Juvenil Ignaciana)?",
-                conoce_opciones,
-                key="part_conoce_rji",
-                format_func=lambda val: "Selecciona una opción" if val == "" else val,
-            )
 
-            st.markdown("---")
-            st.markdown(
-                "La información recolectada es sensible y se utilizará únicamente para construir tu perfil en la Claveriada RJI y para la logística del encuentro. Consulta la [política de tratamiento de datos personales](https://jesuitas.co/wp-content/uploads/2023/08/politica-de-tratamiento-de-datos-personales.pdf)."
-            )
-            st.checkbox(
-                "Acepto el tratamiento de datos personales conforme a la política indicada",
-                key="part_acepta_datos"
-            )
-            st.checkbox(
-                "Autorizo recibir información y contacto directo de la RJI vía WhatsApp",
-                key="part_acepta_whatsapp"
-            )
+@st.cache_data(show_spinner=False, max_entries=4)
+def _resumen_admin(version: str):
+    # La versión del espejo es la clave: solo se recalcula cuando llegan datos nuevos.
+    return resumen_desde_espejo()
 
-            col_back, col_save = st.columns(2)
-            with col_back:
-                volver_etapa = st.form_submit_button("Retroceder", use_container_width=True)
-            with col_save:
-                guardar = st.form_submit_button("Guardar participante", use_container_width=True)
-            if volver_etapa:
-                _goto_participant_stage(2)
-            elif guardar:
-                if not _validate_participant_stage3():
-                    pass
-                else:
-                    es_mayor = st.session_state.get("part_es_mayor_option") == "Sí"
-                    doc_p_clean = st.session_state.get("_clean_part_doc_p", "").strip()
-                    if not doc_p_clean:
-                        doc_ok, normalized = _normalize_numeric_input(st.session_state.get("part_doc_p", ""))
-                        doc_p_clean = normalized if doc_ok else st.session_state.get("part_doc_p", "").strip()
-                    doc_p = doc_p_clean
-
-                    doc_a_clean = st.session_state.get("_clean_part_doc_a", "").strip()
-                    if not doc_a_clean:
-                        doc_a_ok, normalized_a = _normalize_numeric_input(st.session_state.get("part_doc_a", ""))
-                        fallback_doc = st.session_state.get("part_doc_a", "")
-                        doc_a_clean = normalized_a if doc_a_ok else _clean_string(fallback_doc)
-                    doc_a = doc_a_clean
-
-                    tipo_doc_contacto_val = _clean_string(st.session_state.get("part_tipo_doc_a", ""))
-
-                    nom_a = st.session_state.get("part_nom_a", "")
-
-                    ts = datetime.now(ZoneInfo("America/Bogota")).isoformat(timespec="seconds")
-                    intereses = st.session_state.get("part_intereses", [])
-                    conoce_map = {"Sí": "Si", "No": "No", "Más o menos": "Mas o menos", "": ""}
-                    acomp_items = []
-                    if st.session_state.get("part_acomp_familia"):
-                        acomp_items.append("Familia")
-                    if st.session_state.get("part_acomp_amigos"):
-                        acomp_items.append("Amigos")
-                    if st.session_state.get("part_acomp_escucha"):
-                        acomp_items.append("Escucha activa / apoyo emocional")
-                    if st.session_state.get("part_acomp_mentoria"):
-                        acomp_items.append("Mentoría o tutoría")
-                    if st.session_state.get("part_acomp_espiritual"):
-                        acomp_items.append("Acompañamiento espiritual")
-                    if st.session_state.get("part_acomp_red_comunidad"):
-                        acomp_items.append("Red comunitaria o institucional")
-                    if st.session_state.get("part_acomp_ninguna"):
-                        acomp_items.append("Ninguna")
-
-                    payload = _get_participant_payload()
-
-                    def _capture_field(
-                        key: str,
-                        raw_value: object,
-                        *,
-                        sanitizer=_clean_string,
-                        allow_empty: bool = False,
-                    ) -> str:
-                        existing = payload.get(key, "")
-                        clean = sanitizer(raw_value)
-                        if clean:
-                            payload[key] = clean
-                            return clean
-                        if allow_empty:
-                            if key not in payload:
-                                payload[key] = ""
-                                return ""
-                            return payload.get(key, "")
-                        return existing
-
-                    if doc_p:
-                        payload["documento_participante"] = doc_p
-                    if st.session_state.get("part_tipo_doc_p") or not payload.get("tipo_documento_participante"):
-                        payload["tipo_documento_participante"] = st.session_state.get("part_tipo_doc_p", "")
-                    payload["es_mayor_edad"] = es_mayor
-
-                    if doc_a or "documento_contacto" not in payload:
-                        payload["documento_contacto"] = doc_a
-                    if tipo_doc_contacto_val or "tipo_documento_contacto" not in payload:
-                        payload["tipo_documento_contacto"] = tipo_doc_contacto_val
-
-                    uploads_dir = Path("uploads")
-                    participante_doc_url = payload.get("archivo_doc_participante", "")
-                    participante_label = payload.get("archivo_doc_participante_label", "")
-                    participant_drive_failed = False
-
-                    if st.session_state.get("part_doc_id_bytes") and st.session_state.get("part_doc_id_name"):
-                        uploads_dir.mkdir(exist_ok=True)
-                        participante_filename = f"{doc_p}_{st.session_state['part_doc_id_name']}"
-                        participante_path = uploads_dir / participante_filename
-                        with open(participante_path, "wb") as f:
-                            f.write(st.session_state["part_doc_id_bytes"])
-                        participante_label = participante_path.name
-                        drive_link = ""
-                        hasher = hashlib.sha256()
-                        hasher.update(st.session_state["part_doc_id_bytes"])
-                        hasher.update(f"|{UPLOADS_DRIVE_FOLDER_ID}".encode("utf-8"))
-                        part_hash = hasher.hexdigest()
-                        cached_hash = st.session_state.get("_part_doc_drive_hash")
-                        cached_link = st.session_state.get("_part_doc_drive_link")
-                        if cached_hash == part_hash and cached_link:
-                            drive_link = cached_link
-                        else:
-                            drive_link = upload_file_to_drive(participante_path, UPLOADS_DRIVE_FOLDER_ID)
-                            if drive_link:
-                                st.session_state["_part_doc_drive_hash"] = part_hash
-                                st.session_state["_part_doc_drive_link"] = drive_link
-                        if drive_link:
-                            participante_doc_url = drive_link
-                        else:
-                            participante_doc_url = str(participante_path)
-                            if UPLOADS_DRIVE_FOLDER_ID:
-                                participant_drive_failed = True
-
-
-                    nombres_val = _capture_field("nombres", st.session_state.get("part_nombres", ""))
-                    apellidos_val = _capture_field("apellidos", st.session_state.get("part_apellidos", ""))
-                    apodo_val = _capture_field(
-                        "como_te_gusta_que_te_digan",
-                        st.session_state.get("part_apodo", ""),
-                        allow_empty=True,
-                    )
-                    tel_val = _capture_field(
-                        "telefono_celular",
-                        st.session_state.get("part_tel", ""),
-                        sanitizer=_clean_phone_number,
-                    )
-                    tel_val_sheet = _format_phone_for_sheet(tel_val)
-                    correo_val = _capture_field("correo", st.session_state.get("part_correo", ""))
-                    direccion_val = _capture_field("direccion", st.session_state.get("part_direccion", ""))
-                    region_val = _capture_field("region", st.session_state.get("part_region", ""))
-                    ciudad_val = _capture_field("ciudad", st.session_state.get("part_ciudad", ""))
-                    eps_val = _capture_field(
-                        "eps",
-                        st.session_state.get("part_eps", ""),
-                        allow_empty=True,
-                    )
-                    rest_alim_val = _capture_field(
-                        "restricciones_alimentarias",
-                        st.session_state.get("part_rest_alim", ""),
-                        allow_empty=True,
-                    )
-                    salud_mental_val = _capture_field(
-                        "salud_mental",
-                        st.session_state.get("part_salud_mental", ""),
-                        allow_empty=True,
-                    )
-                    obra_val = _capture_field("obra_institucion", st.session_state.get("part_obra", ""))
-                    proceso_val = _capture_field(
-                        "proceso_juvenil",
-                        st.session_state.get("part_proceso", ""),
-                        allow_empty=True,
-                    )
 
-                    exp_sig_val = payload.get("experiencia_significativa") or _clean_string(st.session_state.get("part_exp_sig", ""))
-                    if exp_sig_val:
-                        payload["experiencia_significativa"] = exp_sig_val
-                    intereses_payload = payload.get("intereses_personales")
-                    if intereses:
-                        payload["intereses_personales"] = list(intereses)
-                        intereses_payload = payload["intereses_personales"]
-                    dato_freak_val = _capture_field(
-                        "hobby_o_dato_curioso",
-                        st.session_state.get("part_dato_freak", ""),
-                        allow_empty=True,
-                    )
-                    pregunta_val = _capture_field(
-                        "pregunta_para_conectar",
-                        st.session_state.get("part_pregunta", ""),
-                        allow_empty=True,
-                    )
-                    motivo_val = _capture_field("motivo_experiencia_top", st.session_state.get("part_motivo", ""))
-                    preguntas_frec_val = _capture_field(
-                        "preguntas_frecuentes",
-                        st.session_state.get("part_preguntas_frec", ""),
-                        allow_empty=True,
-                    )
+@st.fragment
+def _render_admin_dashboard():
+    st.subheader("Resumen de inscripciones")
+    if st.button("Actualizar datos", key="admin_dashboard_refresh"):
+        with st.spinner("Trayendo las filas nuevas de la hoja…"):
+            try:
+                local_mirror.sincronizar(SPREADSHEET_ID, "PARTICIPANTES")
+            except (ValueError, RuntimeError, sheets_api_error()) as exc:
+                st.error(f"No se pudo actualizar el espejo local: {exc}")
+    estado = local_mirror.estado("PARTICIPANTES")
+    try:
+        resumen = _resumen_admin(local_mirror.version("PARTICIPANTES"))
+    except (ValueError, KeyError) as exc:
+        st.error(f"No se pudo leer el espejo local: {exc}")
+        return
+    if resumen is None:
+        st.info("El espejo local aún no tiene datos; pulsa «Actualizar datos».")
+        return
+    sincronizado = datetime.fromtimestamp(estado["synced_at"], ZoneInfo("America/Bogota"))
+    st.caption(f"Datos del espejo local · actualizado {sincronizado:%Y-%m-%d %H:%M}")
+    col_t, col_m = st.columns(2)
+    col_t.metric("Inscritos", resumen["total"])
+    col_m.metric("Menores de edad", int(resumen["es_mayor_edad"].get("Menor de edad", 0)))
+    st.markdown("**Inscripciones por hora**")
+    st.line_chart(resumen["por_hora"])
+    col_r, col_c = st.columns(2)
+    with col_r:
+        st.markdown("**Por región**")
+        st.dataframe(resumen["region"], use_container_width=True)
+    with col_c:
+        st.markdown("**Por talla de camisa**")
+        st.bar_chart(resumen["talla_camisa"])
+    col_o, col_e = st.columns(2)
+    with col_o:
+        st.markdown("**Por obra / institución**")
+        st.dataframe(resumen["obra_institucion"], use_container_width=True)
+    with col_e:
+        st.markdown("**Mayoría de edad**")
+        st.dataframe(resumen["es_mayor_edad"], use_container_width=True)
+    st.markdown("**Por edad**")
+    st.bar_chart(resumen["edad"])
+
+
+EXPORT_MIME = {
+    "parquet": "application/vnd.apache.parquet",
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
 
-                    tipo_doc_contacto_clean = _capture_field(
-                        "tipo_documento_contacto",
-                        st.session_state.get("part_tipo_doc_a", ""),
-                        allow_empty=True,
-                    )
-                    doc_contacto_clean = _capture_field(
-                        "documento_contacto",
-                        st.session_state.get("part_doc_a", ""),
-                        sanitizer=lambda raw: (
-                            doc_a or _clean_string(raw)
-                        ),
-                        allow_empty=True,
-                    )
 
-                    nom_a_clean = _capture_field("nombres_contacto", nom_a)
-                    ape_a_clean = _capture_field("apellidos_contacto", st.session_state.get("part_ape_a", ""))
-                    tel_a_clean = _capture_field(
-                        "telefono_contacto",
-                        st.session_state.get("part_tel_a", ""),
-                        sanitizer=_clean_phone_number,
-                    )
-                    tel_a_sheet = _format_phone_for_sheet(tel_a_clean)
-                    correo_a_clean = _capture_field(
-                        "correo_contacto",
-                        st.session_state.get("part_correo_a", ""),
-                        allow_empty=True,
-                    )
-                    parentesco_clean = _capture_field("parentesco_contacto", st.session_state.get("part_parentesco_a", ""))
-
-                    fecha_nac_value = st.session_state.get("part_fecha_nac")
-                    if fecha_nac_value is not None or "fecha_nacimiento" not in payload:
-                        payload["fecha_nacimiento"] = fecha_nac_value
-                    talla_value = st.session_state.get("part_talla", "")
-                    if talla_value or "talla_camisa" not in payload:
-                        payload["talla_camisa"] = talla_value
-
-                    payload["acompanamientos_marcados"] = ", ".join(acomp_items)
-                    payload["acompanamiento_familia"] = bool(st.session_state.get("part_acomp_familia"))
-                    payload["acompanamiento_amigos"] = bool(st.session_state.get("part_acomp_amigos"))
-                    payload["acompanamiento_escucha_activa"] = bool(st.session_state.get("part_acomp_escucha"))
-                    payload["acompanamiento_mentoria"] = bool(st.session_state.get("part_acomp_mentoria"))
-                    payload["acompanamiento_espiritual"] = bool(st.session_state.get("part_acomp_espiritual"))
-                    payload["acompanamiento_red_comunitaria"] = bool(st.session_state.get("part_acomp_red_comunidad"))
-                    payload["acompanamiento_ninguna"] = bool(st.session_state.get("part_acomp_ninguna"))
-
-                    conoce_value = conoce_map.get(st.session_state.get("part_conoce_rji"), "")
-                    if conoce_value or "conoce_rji" not in payload:
-                        payload["conoce_rji"] = conoce_value
-
-                    acepta_datos = bool(st.session_state.get("part_acepta_datos"))
-                    acepta_whatsapp = bool(st.session_state.get("part_acepta_whatsapp"))
-                    payload["acepta_tratamiento_datos"] = acepta_datos
-                    payload["acepta_whatsapp"] = acepta_whatsapp
-                    payload["experiencia_top_calculada"] = experiencia_top
-                    payload["nivel_experticie"] = perfil_cerc
-                    if participante_doc_url:
-                        payload["archivo_doc_participante"] = participante_doc_url
-                    elif "archivo_doc_participante" not in payload:
-                        payload["archivo_doc_participante"] = ""
-                    if participante_label:
-                        payload["archivo_doc_participante_label"] = participante_label
-                    elif "archivo_doc_participante_label" not in payload:
-                        payload["archivo_doc_participante_label"] = ""
-                    full_name = f"{nombres_val} {apellidos_val}".strip()
-                    edad_aprox = calcular_edad(payload.get("fecha_nacimiento"))
-                    intereses_text = ", ".join(intereses_payload or [])
-                    participante_doc_cell = _format_upload_for_sheet(
-                        payload.get("archivo_doc_participante", participante_doc_url),
-                        payload.get("archivo_doc_participante_label", participante_label),
+def _descartar_admin_export():
+    export = st.session_state.pop("_admin_export", None)
+    if export:
+        with contextlib.suppress(OSError):
+            os.unlink(export[2])
+
+
+@st.fragment
+def _render_admin_export():
+    st.subheader("Exportar registros")
+    hoja = st.selectbox("Pestaña", list(SHEET_COLUMNS), key="admin_export_sheet")
+    columnas = st.multiselect(
+        "Columnas (vacío = todas)", SHEET_COLUMNS[hoja], key="admin_export_cols"
+    )
+    formato = st.radio("Formato", EXPORT_FORMATS, horizontal=True, key="admin_export_fmt")
+    if st.button("Preparar archivo", use_container_width=True):
+        _descartar_admin_export()
+        # El archivo se escribe por páginas en disco; la sesión solo guarda su ruta.
+        # Los que nadie descarga los borra el reconciliador tras EXPORT_TTL_SECONDS.
+        EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=EXPORT_DIR, prefix="export-", suffix=f".{formato}", delete=False
+        ) as destino:
+            ruta = destino.name
+            with st.spinner("Leyendo la hoja por páginas…"):
+                try:
+                    total = exportar(
+                        SPREADSHEET_ID,
+                        SHEET_NAME if hoja == "PARTICIPANTES" else hoja,
+                        destino,
+                        formato,
+                        columnas or None,
                     )
-                    drive_error_message = st.session_state.get("_drive_last_error", "").strip()
-                    if drive_error_message and participant_drive_failed:
-                        st.warning(
-                            "No se pudo publicar uno o más archivos en Drive. Se guardó la ruta local por ahora. "
-                            "Mensaje técnico: " + drive_error_message
-                        )
-
-                    experiencia_rank_values = [
-                        int(ranks[label]) if label in ranks else 0
-                        for label, _ in EXPERIENCIAS_PARTICIPANTE
-                    ]
-                    for (label, column_key), rank_value in zip(EXPERIENCIAS_PARTICIPANTE, experiencia_rank_values):
-                        payload[column_key] = rank_value
-
-                    row = [
-                        ts,
-                        "TRUE" if es_mayor else "FALSE",
-                        payload.get("tipo_documento_participante", ""),
-                        payload.get("documento_participante", doc_p),
-                        nombres_val,
-                        apellidos_val,
-                        full_name,
-                        apodo_val,
-                        tel_val_sheet,
-                        correo_val,
-                        direccion_val,
-                        region_val,
-                        ciudad_val,
-                        str(payload.get("fecha_nacimiento")),
-                        edad_aprox,
-                        payload.get("talla_camisa", ""),
-                        eps_val,
-                        rest_alim_val,
-                        salud_mental_val,
-                        obra_val,
-                        proceso_val,
-                        intereses_text,
-                        exp_sig_val,
-                        dato_freak_val,
-                        pregunta_val,
-                        *experiencia_rank_values,
-                        experiencia_top,
-                        perfil_cerc,
-                        motivo_val,
-                        preguntas_frec_val,
-                        payload.get("acompanamientos_marcados", ", ".join(acomp_items)),
-                        "TRUE" if payload.get("acompanamiento_familia") else "FALSE",
-                        "TRUE" if payload.get("acompanamiento_amigos") else "FALSE",
-                        "TRUE" if payload.get("acompanamiento_escucha_activa") else "FALSE",
-                        "TRUE" if payload.get("acompanamiento_mentoria") else "FALSE",
-                        "TRUE" if payload.get("acompanamiento_espiritual") else "FALSE",
-                        "TRUE" if payload.get("acompanamiento_red_comunitaria") else "FALSE",
-                        "TRUE" if payload.get("acompanamiento_ninguna") else "FALSE",
-                        payload.get("conoce_rji", conoce_value),
-                        tipo_doc_contacto_clean,
-                        doc_contacto_clean,
-                        nom_a_clean,
-                        ape_a_clean,
-                        tel_a_sheet,
-                        correo_a_clean,
-                        parentesco_clean,
-                        participante_doc_cell,
-                        "TRUE" if acepta_datos else "FALSE",
-                        "TRUE" if acepta_whatsapp else "FALSE",
-                    ]
-                    try:
-                        append_row(SPREADSHEET_ID, SHEET_NAME, row, PARTICIPANTES_COLS)
-                        try:
-                            update_unificado(SPREADSHEET_ID)
-                        except Exception:
-                            pass
-                        st.session_state["_participant_success_message"] = "¡Tu registro quedó guardado! Gracias por llegar al final ✨"
-                        st.session_state["_participant_reset_pending"] = True
-                        st.experimental_rerun()
-                    except Exception as e:
-                        st.error(f"No se pudo guardar: {e}")
-
-    render_stage_progress(stage)
+                except (ValueError, RuntimeError, sheets_api_error()) as exc:
+                    total = None
+                    st.error(f"No se pudo exportar: {exc}")
+        if total is None:
+            os.unlink(ruta)
+            return
+        st.session_state["_admin_export"] = (f"{hoja.lower()}.{formato}", formato, ruta, total)
+
+    export = st.session_state.get("_admin_export")
+    if export and os.path.exists(export[2]):
+        file_name, formato, ruta, total = export
+        with open(ruta, "rb") as data:
+            st.download_button(
+                f"Descargar {file_name} ({total} filas)",
+                data=data,
+                file_name=file_name,
+                mime=EXPORT_MIME[formato],
+                on_click=_descartar_admin_export,
+            )
 
-# ================= ACOMPAÑANTE =================
-with tab2:
-    st.info("RED JUVENIL IGNACIANA ESTÁ EN PROCESO DE SELECCIÓN DE ACOMPAÑANTES.")
 
-# ================= VOLUNTARIADO =================
-with tab3:
-    st.info("RED JUVENIL IGNACIANA ESTÁ EN PROCESO DE SELECCIÓN DE VOLUNTARIOS.")
+if admin_tabs:
+    with admin_tabs[0]:
+        if _admin_authenticated():
+            _render_admin_dashboard()
+            st.markdown("---")
+            _render_admin_import()
+            st.markdown("---")
+            _render_admin_export()
 
 st.markdown("</div>", unsafe_allow_html=True)
+_record_timing("script", _SCRIPT_STARTED)
@@ -0,0 +1,123 @@
+"""Compara las formas de calcular edades sobre muchas fechas de nacimiento.
+
+Uso (desde la raíz del repo):
+
+    python benchmarks/bench_edades.py
+    python benchmarks/bench_edades.py --n 200000 --formato mixto
+
+Genera ``--n`` fechas (ISO, día primero o mezcladas, con algunos vacíos y
+valores inválidos) y mide:
+
+* el cálculo anterior de ``doc.calcular_edad`` (``strptime`` formato por
+  formato con excepciones y ``pd.to_datetime`` de respaldo),
+* el anterior de ``app.calcular_edad`` (``pd.to_datetime`` por valor, medido
+  sobre una muestra porque es muy lento),
+* ``utils_fechas.edad`` en un bucle y ``utils_fechas.edades`` vectorizado,
+
+y verifica que los dos caminos de ``utils_fechas`` den el mismo resultado.
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import pandas as pd  # noqa: E402
+
+from utils_fechas import edad, edades  # noqa: E402
+
+HOY = date(2026, 10, 19)
+MUESTRA_PANDAS = 5000
+
+
+def _doc_calcular_edad(desde_fecha_str):
+    """Copia del cálculo que tenía doc.py antes de utils_fechas."""
+    if not desde_fecha_str:
+        return ""
+    try:
+        for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%Y/%m/%d", "%d-%m-%Y"):
+            try:
+                d = datetime.strptime(str(desde_fecha_str), fmt).date()
+                break
+            except ValueError:
+                d = None
+        if d is None:
+            d = pd.to_datetime(desde_fecha_str, errors="coerce").date()
+        return HOY.year - d.year - ((HOY.month, HOY.day) < (d.month, d.day))
+    except Exception:
+        return ""
+
+
+def _app_calcular_edad(fecha_str):
+    """Copia del cálculo que tenía app.py antes de utils_fechas."""
+    if not fecha_str:
+        return ""
+    try:
+        d = pd.to_datetime(str(fecha_str), errors="coerce")
+        if pd.isna(d):
+            return ""
+        d = d.date()
+        return HOY.year - d.year - ((HOY.month, HOY.day) < (d.month, d.day))
+    except Exception:
+        return ""
+
+
+def _fechas(n: int, formato: str, semilla: int) -> list:
+    rng = random.Random(semilla)
+    inicio = date(1990, 1, 1)
+    valores = []
+    for _ in range(n):
+        r = rng.random()
+        if r < 0.02:
+            valores.append("")
+            continue
+        if r < 0.03:
+            valores.append("no sé")
+            continue
+        d = inicio + timedelta(days=rng.randrange(0, 8000))
+        estilo = formato if formato != "mixto" else rng.choice(("iso", "dia"))
+        valores.append(d.isoformat() if estilo == "iso" else d.strftime("%d/%m/%Y"))
+    return valores
+
+
+def _tiempo(fn):
+    inicio = time.perf_counter()
+    resultado = fn()
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--formato", choices=("iso", "dia", "mixto"), default="dia")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    valores = _fechas(args.n, args.formato, args.semilla)
+    serie = pd.Series(valores)
+    muestra = valores[:MUESTRA_PANDAS]
+
+    t_doc, _ = _tiempo(lambda: [_doc_calcular_edad(v) for v in valores])
+    t_app, _ = _tiempo(lambda: [_app_calcular_edad(v) for v in muestra])
+    t_app *= len(valores) / max(len(muestra), 1)
+    t_escalar, escalar = _tiempo(lambda: [edad(v, HOY) for v in valores])
+    t_vector, vector = _tiempo(lambda: edades(serie, HOY))
+
+    print(f"{args.n} fechas, formato {args.formato}:")
+    print(f"  doc.calcular_edad (anterior)   {t_doc * 1000:9.1f} ms")
+    print(f"  app.calcular_edad (anterior)   {t_app * 1000:9.1f} ms  (estimado con {len(muestra)} valores)")
+    print(f"  utils_fechas.edad (bucle)      {t_escalar * 1000:9.1f} ms")
+    print(f"  utils_fechas.edades (Series)   {t_vector * 1000:9.1f} ms")
+
+    esperado = [None if v == "" else v for v in escalar]
+    obtenido = [None if pd.isna(v) else int(v) for v in vector]
+    distintos = sum(1 for a, b in zip(esperado, obtenido) if a != b)
+    print(f"\nDiferencias entre edad y edades: {distintos}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Mide el tiempo de importación en frío de app.py.
+
+Uso (desde la raíz del repo):
+
+    python benchmarks/bench_import_time.py
+    python benchmarks/bench_import_time.py --repeat 5 --top 15
+
+Cada medición corre en un proceso nuevo con ``python -X importtime`` para que
+no haya módulos en caché. Se importa ``app`` tal cual, con ``st.secrets``
+vacío y ``st.stop`` convertido en ``SystemExit``: el script se detiene en la
+verificación de ``SPREADSHEET_ID``, justo después de sus imports, sin tocar
+la hoja. Además verifica que las dependencias pesadas que se cargan de forma
+perezosa no se importen solo por importar la app.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Importa app.py hasta su primer st.stop(), sin secretos ni acceso a la hoja.
+IMPORT_APP = """
+import streamlit as st
+st.secrets = {}
+def _stop():
+    raise SystemExit(0)
+st.stop = _stop
+try:
+    import app
+except SystemExit:
+    pass
+"""
+LAZY_MODULES = [
+    "pandas", "numpy", "docx", "gspread", "google.auth", "requests",
+    "PIL", "pyarrow", "scipy", "openpyxl", "reportlab",
+]
+
+
+def _importtime(statement: str) -> list:
+    """Return ``(cumulative_us, module)`` rows reported by ``-X importtime``."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    return rows
+
+
+def _is_top_level(name: str) -> bool:
+    # -X importtime indents nested imports by two extra spaces per level.
+    return len(name) - len(name.lstrip()) <= 1
+
+
+def _loaded_modules(statement: str) -> set:
+    code = f"{statement}\nimport sys\nprint(' '.join(sys.modules))"
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return set(proc.stdout.split())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    statement = IMPORT_APP
+    totals = {"streamlit": [], "app": []}
+    last_rows = []
+    for _ in range(args.repeat):
+        rows = _importtime(statement)
+        for cumulative_us, _, name in rows:
+            if _is_top_level(name) and name.strip() in totals:
+                totals[name.strip()].append(cumulative_us / 1000)
+        last_rows = rows
+
+    for name, label in (("streamlit", "streamlit"), ("app", "app.py sin streamlit")):
+        print(f"Importación de {label}: mediana {statistics.median(totals[name]):.1f} ms "
+              f"(min {min(totals[name]):.1f} ms, {args.repeat} corridas)")
+    print(f"\nTop {args.top} por tiempo acumulado:")
+    for cumulative_us, _, name in sorted(last_rows, reverse=True)[: args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name.strip()}")
+
+    loaded = _loaded_modules(statement)
+    print("\nDependencias perezosas cargadas al importar la app:")
+    for name in LAZY_MODULES:
+        print(f"  {name:12s} {'SÍ (revisar)' if name in loaded else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Mide lo que ahorra la caché del logo por documento generado.
+
+Uso (desde la raíz del repo):
+
+    python benchmarks/bench_logo_cache.py
+    python benchmarks/bench_logo_cache.py --docs 500 --repeat 5
+
+Compara solo el paso de insertar el logo en el encabezado: ``run.add_picture``
+con la ruta (abre el archivo, lo lee, calcula su SHA1 y decodifica la cabecera
+cada vez) contra ``doc.agregar_logo`` (bytes leídos una vez por proceso,
+insertados con la misma API pública). Cada documento se crea y se mide por
+separado, así la memoria no crece con ``--docs``. Luego mide el formato en
+blanco y el consentimiento completos.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from io import BytesIO
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+
+from docx import Document  # noqa: E402
+from docx.shared import Inches  # noqa: E402
+
+import doc  # noqa: E402
+
+PARTICIPANTES = [
+    {"nombre": f"Joven {i}", "documento": str(10203040 + i), "fecha_nacimiento": "2009-07-12", "eps": "SURA", "salud": ""}
+    for i in range(4)
+]
+
+
+def _insertar_sin_cache(d):
+    d.sections[0].header.paragraphs[0].add_run().add_picture(doc.LOGO_PATH, width=Inches(3.0))
+
+
+def _medir_insercion(fn, docs: int, repeat: int) -> float:
+    """Median ms per insertion; each Document is created, timed and dropped one at a time."""
+    fn(Document())
+    tiempos = []
+    for _ in range(repeat):
+        total = 0.0
+        for _ in range(docs):
+            d = Document()
+            d.sections[0].header.paragraphs  # crea la parte del encabezado fuera de la medición
+            inicio = time.perf_counter()
+            fn(d)
+            total += time.perf_counter() - inicio
+        tiempos.append(total / docs * 1000)
+    return statistics.median(tiempos)
+
+
+def _blanco():
+    buffer = BytesIO()
+    doc.crear_doc_autorizacion_en_blanco().save(buffer)
+
+
+def _consentimiento():
+    doc.consentimiento_bytes("Carlos Rodríguez", "99887766", participantes=PARTICIPANTES)
+
+
+def _medir(fn, docs: int, repeat: int) -> float:
+    fn()  # calienta cachés e imports
+    tiempos = []
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        for _ in range(docs):
+            fn()
+        tiempos.append((time.perf_counter() - inicio) / docs * 1000)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=200, help="Documentos por corrida")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if not Path(doc.LOGO_PATH).exists():
+        sys.exit(f"No se encontró el logo en {doc.LOGO_PATH}")
+
+    sin_cache = _medir_insercion(_insertar_sin_cache, args.docs, args.repeat)
+    con_cache = _medir_insercion(doc.agregar_logo, args.docs, args.repeat)
+    print(f"Inserción del logo ({args.docs} docs, mediana de {args.repeat} corridas):")
+    print(f"  add_picture(ruta)   {sin_cache:7.2f} ms/doc")
+    print(f"  agregar_logo        {con_cache:7.2f} ms/doc")
+    print(f"  ahorro              {sin_cache - con_cache:7.2f} ms/doc ({(1 - con_cache / sin_cache) * 100:.0f} %)")
+    print("\nDocumentos completos con el logo en caché:")
+    print(f"  formato en blanco   {_medir(_blanco, args.docs, args.repeat):7.2f} ms/doc")
+    print(f"  consentimiento      {_medir(_consentimiento, args.docs, args.repeat):7.2f} ms/doc")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Compara el consentimiento en PDF directo con el .docx (y su conversión a PDF).
+
+Uso (desde la raíz del repo):
+
+    python benchmarks/bench_pdf.py
+    python benchmarks/bench_pdf.py --n 100 --menores 6
+
+Mide por documento:
+
+* ``doc.consentimiento_bytes`` (.docx clonado de la plantilla en caché),
+* ``doc_pdf.consentimiento_pdf_bytes`` (PDF directo con reportlab),
+* si ``soffice`` está en el PATH, la conversión de .docx a PDF con LibreOffice
+  (sobre una muestra, porque arranca un proceso por lote).
+"""
+import argparse
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from doc import consentimiento_bytes  # noqa: E402
+from doc_pdf import consentimiento_pdf_bytes  # noqa: E402
+
+MUESTRA_SOFFICE = 10
+
+
+def _participantes(menores: int) -> list:
+    return [
+        {
+            "nombre": f"Participante {i}",
+            "documento": str(1_000_000 + i),
+            "fecha_nacimiento": "12/07/2010",
+            "eps": "SURA",
+            "salud": "Ninguna",
+        }
+        for i in range(menores)
+    ]
+
+
+def _por_documento(fn, n: int) -> float:
+    fn()  # calienta plantilla, fuentes y logo
+    inicio = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - inicio) / n
+
+
+def _conversion_soffice(soffice: str, docx: bytes, n: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        rutas = []
+        for i in range(n):
+            ruta = Path(tmp) / f"c{i}.docx"
+            ruta.write_bytes(docx)
+            rutas.append(str(ruta))
+        inicio = time.perf_counter()
+        subprocess.run(
+            [soffice, "--headless", "--convert-to", "pdf", "--outdir", tmp, *rutas],
+            check=True,
+            capture_output=True,
+        )
+        return (time.perf_counter() - inicio) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=50, help="Documentos por medición")
+    parser.add_argument("--menores", type=int, default=4, help="Participantes por acudiente")
+    args = parser.parse_args()
+
+    acudiente = {"nombre_acomp": "Acudiente de prueba", "doc_acomp": "79000000", "correo_acomp": "a@b.co"}
+    participantes = _participantes(args.menores)
+
+    t_docx = _por_documento(lambda: consentimiento_bytes(participantes=participantes, **acudiente), args.n)
+    t_pdf = _por_documento(lambda: consentimiento_pdf_bytes(participantes=participantes, **acudiente), args.n)
+    print(f"{args.n} documentos, {args.menores} participantes cada uno:")
+    print(f"  .docx (plantilla en caché)      {t_docx * 1000:8.1f} ms/doc")
+    print(f"  PDF directo (reportlab)        {t_pdf * 1000:8.1f} ms/doc")
+
+    soffice = shutil.which("soffice") or shutil.which("libreoffice")
+    if not soffice:
+        print("  .docx + soffice → PDF            (soffice no está en el PATH)")
+        return
+    docx = consentimiento_bytes(participantes=participantes, **acudiente)
+    t_conv = _conversion_soffice(soffice, docx, MUESTRA_SOFFICE)
+    print(f"  .docx + soffice → PDF          {(t_docx + t_conv) * 1000:8.1f} ms/doc  (muestra de {MUESTRA_SOFFICE})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Mide cuánto cuesta una interacción dentro de cada etapa del formulario.
+
+Uso (desde la raíz del repo):
+
+    python benchmarks/bench_reruns.py
+    python benchmarks/bench_reruns.py --runs 30
+
+Ejecuta app.py con ``streamlit.testing`` (sin acceso a la hoja: la
+verificación, el espejo y el reconciliador se reemplazan por funciones vacías)
+y lee los tiempos que deja ``_record_timing`` en ``_perf_timings``:
+
+* ``script``: una ejecución completa de app.py, lo que costaba cada
+  interacción cuando las etapas no eran fragmentos (y lo que aún cuesta
+  cambiar de etapa),
+* ``etapa_N``: solo el fragmento de la etapa, lo que se re-ejecuta ahora al
+  cambiar un widget de esa etapa.
+
+``AppTest`` siempre ejecuta el script completo, así que el tiempo del
+fragmento se mide dentro de esa ejecución; el costo fijo de Streamlit por
+rerun (sesión, deltas al navegador) no está incluido en ninguno de los dos.
+"""
+import argparse
+import statistics
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import utils  # noqa: E402
+import utils_mirror  # noqa: E402
+import utils_uploads  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+
+def _sin_red():
+    utils.bootstrap_spreadsheet = lambda spreadsheet_id: None
+    utils_mirror.start_mirror_sync = lambda *args, **kwargs: None
+    utils_uploads.start_reconciler = lambda *args, **kwargs: None
+
+
+def _medir(etapa: int, runs: int) -> dict:
+    at = AppTest.from_file(str(ROOT / "app.py"), default_timeout=120)
+    at.secrets["SPREADSHEET_ID"] = "benchmark"
+    at.run()  # primera ejecución: catálogos, assets y cachés de proceso
+    at.session_state["part_step"] = etapa
+    tiempos = {"script": [], f"etapa_{etapa}": []}
+    for _ in range(runs):
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        registrados = at.session_state["_perf_timings"]
+        for nombre in tiempos:
+            tiempos[nombre].append(registrados[nombre])
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    _sin_red()
+    print(f"Mediana de {args.runs} ejecuciones (pared / CPU):")
+    for etapa in (1, 2, 3):
+        tiempos = _medir(etapa, args.runs)
+        for nombre, valores in tiempos.items():
+            pared = statistics.median(v[0] for v in valores)
+            cpu = statistics.median(v[1] for v in valores)
+            print(f"  etapa {etapa}  {nombre:8s} {pared:7.1f} ms / {cpu:7.1f} ms CPU")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,16 @@
 # doc.py
-from datetime import date, datetime
+import copy
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
 import re
 import textwrap
 
-import gspread
-import pandas as pd
 from docx import Document
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.shared import Cm, Inches, Pt
-from google.oauth2.service_account import Credentials
+
+from utils_fechas import edad
 
 
 def _normalize_private_key(info: dict) -> dict:
@@ -62,24 +63,8 @@ LOGO_PATH = "assets/logo.png"
 
 # ====== UTILIDADES ======
 def calcular_edad(desde_fecha_str):
-    """Calcula edad aproximada desde una fecha 'YYYY-MM-DD' o similar."""
-    if not desde_fecha_str:
-        return ""
-    try:
-        # aceptar varios formatos
-        for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%Y/%m/%d", "%d-%m-%Y"):
-            try:
-                d = datetime.strptime(str(desde_fecha_str), fmt).date()
-                break
-            except ValueError:
-                d = None
-        if d is None:
-            # último intento: pandas parse
-            d = pd.to_datetime(desde_fecha_str, errors="coerce").date()
-        today = date.today()
-        return today.year - d.year - ((today.month, today.day) < (d.month, d.day))
-    except Exception:
-        return ""
+    """Calcula edad aproximada desde una fecha 'YYYY-MM-DD' o 'DD/MM/YYYY'."""
+    return edad(desde_fecha_str)
 
 
 def estilo_titulo(p, texto, size=16, bold=True, align="center"):
@@ -114,39 +99,74 @@ def celda_texto(celda, texto, bold=False, size=11):
     run.font.size = Pt(size)
 
 
-def crear_doc_consentimiento(
-    nombre_acomp, doc_acomp, correo_acomp="", tel_acomp="",
-    participantes=None,  # lista de dicts: [{nombre, documento, fecha_nacimiento, eps, salud}, ...]
-    info_evento=INFO_EVENTO,
-    logo_path=LOGO_PATH
+@lru_cache(maxsize=8)
+def _logo_bytes(logo_path):
+    """Bytes del logo leídos una vez por proceso; ``None`` si falta."""
+    try:
+        return Path(logo_path).read_bytes()
+    except OSError:
+        return None
+
+
+def agregar_logo(doc, logo_path=LOGO_PATH, width=Inches(3.0)):
+    """Pone el logo en el encabezado a partir de los bytes ya leídos del proceso."""
+    if not logo_path:
+        return
+    datos = _logo_bytes(str(logo_path))
+    if datos is None:
+        return
+    doc.sections[0].header.paragraphs[0].add_run().add_picture(BytesIO(datos), width=width)
+
+
+def _contexto_consentimiento(
+    nombre_acomp, doc_acomp, correo_acomp="", tel_acomp="", participantes=None, info_evento=INFO_EVENTO
 ):
+    """Textos variables del consentimiento; lo comparten todos los renderizadores."""
+    return {
+        "evento": info_evento.get("nombre", "Encuentro RJI"),
+        "info": (
+            f"Fecha: {info_evento.get('fecha','')} • Lugar: {info_evento.get('lugar','')}\n"
+            f"{info_evento.get('descripcion','')}"
+        ),
+        "declaracion": (
+            f"Yo, {nombre_acomp}, identificado(a) con documento No. {doc_acomp}, "
+            f"en calidad de acudiente/acompañante, autorizo la participación de las/los siguientes jóvenes "
+            f"en el {info_evento.get('nombre','Encuentro')}."
+        ),
+        "correo": correo_acomp or "_______________________________",
+        "telefono": tel_acomp or "_______________________________",
+        # “Complicaciones de salud”: puedes combinar alergias / restricciones / salud_mental
+        "filas": [
+            [
+                str(it.get("nombre", "")),
+                str(it.get("documento", "")),
+                str(calcular_edad(it.get("fecha_nacimiento", ""))),
+                str(it.get("eps", "")),
+                str(it.get("salud", "")),
+            ]
+            for it in participantes or []
+        ],
+    }
+
+
+def _construir_consentimiento(ctx, logo_path=LOGO_PATH):
     doc = Document()
     set_margenes(doc, 2, 2, 2, 2)
 
     # Encabezado con logo + título
-    if logo_path and Path(logo_path).exists():
-        header = doc.sections[0].header
-        hdr_p = header.paragraphs[0]
-        run = hdr_p.add_run()
-        try:
-            run.add_picture(logo_path, width=Inches(3.0))
-        except Exception:
-            pass
+    agregar_logo(doc, logo_path)
 
     titulo = doc.add_paragraph()
     estilo_titulo(titulo, "FORMATO DE AUTORIZACIÓN Y ACOMPAÑAMIENTO", size=16, bold=True, align="center")
     sub = doc.add_paragraph()
-    estilo_titulo(sub, info_evento.get("nombre", "Encuentro RJI"), size=13, bold=False, align="center")
+    estilo_titulo(sub, ctx["evento"], size=13, bold=False, align="center")
 
     add_espacio(doc, 6)
 
     # Información del Encuentro
     p_info = doc.add_paragraph()
     p_info.alignment = WD_ALIGN_PARAGRAPH.LEFT
-    run = p_info.add_run(
-        f"Fecha: {info_evento.get('fecha','')} • Lugar: {info_evento.get('lugar','')}\n"
-        f"{info_evento.get('descripcion','')}"
-    )
+    run = p_info.add_run(ctx["info"])
     run.font.size = Pt(10)
 
     add_espacio(doc, 6)
@@ -154,11 +174,7 @@ def crear_doc_consentimiento(
     # Datos del acompañante
     p_datos = doc.add_paragraph()
     p_datos.style = doc.styles["Normal"]
-    run = p_datos.add_run(
-        f"Yo, {nombre_acomp}, identificado(a) con documento No. {doc_acomp}, "
-        f"en calidad de acudiente/acompañante, autorizo la participación de las/los siguientes jóvenes "
-        f"en el {info_evento.get('nombre','Encuentro')}."
-    )
+    run = p_datos.add_run(ctx["declaracion"])
     run.font.size = Pt(11)
 
     add_espacio(doc, 4)
@@ -168,9 +184,9 @@ def crear_doc_consentimiento(
     t_acomp.style = "Table Grid"
     t_acomp.autofit = True
     celda_texto(t_acomp.cell(0, 0), "Correo del acompañante", bold=True)
-    celda_texto(t_acomp.cell(0, 1), correo_acomp or "_______________________________")
+    celda_texto(t_acomp.cell(0, 1), ctx["correo"])
     celda_texto(t_acomp.cell(1, 0), "Teléfono del acompañante", bold=True)
-    celda_texto(t_acomp.cell(1, 1), tel_acomp or "_______________________________")
+    celda_texto(t_acomp.cell(1, 1), ctx["telefono"])
 
     add_espacio(doc, 8)
 
@@ -185,21 +201,10 @@ def crear_doc_consentimiento(
     celda_texto(hdr[3], "EPS", bold=True)
     celda_texto(hdr[4], "Complicaciones de salud", bold=True)
 
-    if participantes:
-        for it in participantes:
-            nombre = it.get("nombre", "")
-            documento = it.get("documento", "")
-            fnac = it.get("fecha_nacimiento", "")
-            edad = calcular_edad(fnac)
-            eps = it.get("eps", "")
-            # “Complicaciones de salud”: puedes combinar alergias / restricciones / salud_mental
-            salud = it.get("salud", "")
-            fila = tabla.add_row().cells
-            celda_texto(fila[0], nombre)
-            celda_texto(fila[1], documento)
-            celda_texto(fila[2], edad)
-            celda_texto(fila[3], eps)
-            celda_texto(fila[4], salud)
+    for valores in ctx["filas"]:
+        fila = tabla.add_row().cells
+        for celda, valor in zip(fila, valores):
+            celda_texto(celda, valor)
 
     add_espacio(doc, 10)
 
@@ -228,6 +233,165 @@ def crear_doc_consentimiento(
     return doc
 
 
+# ====== PLANTILLA: ESQUELETO CONSTRUIDO UNA VEZ ======
+_DOCUMENT_XML = "word/document.xml"
+_W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+_XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+_MARCAS = ("correo", "telefono", "declaracion")
+_MARCAS_FILA = tuple(f"fila{i}" for i in range(5))
+
+
+def _marca(nombre):
+    return "{{" + nombre + "}}"
+
+
+class _PlantillaConsentimiento:
+    """Consentimiento ya armado con marcas ``{{...}}`` en lugar de los datos.
+
+    El esqueleto (márgenes, logo, títulos, tablas y firmas) se construye con
+    python-docx una sola vez; cada documento es una copia profunda del XML del
+    cuerpo con las marcas reemplazadas y una fila clonada por joven. Las demás
+    partes del paquete (estilos, encabezado, logo) se copian tal cual.
+    """
+
+    def __init__(self, info_evento, logo_path):
+        import zipfile
+        from lxml import etree
+
+        self._etree = etree
+        ctx = _contexto_consentimiento("", "", info_evento=info_evento)
+        ctx.update({marca: _marca(marca) for marca in _MARCAS})
+        ctx["filas"] = [[_marca(marca) for marca in _MARCAS_FILA]]
+        buffer = BytesIO()
+        _construir_consentimiento(ctx, logo_path).save(buffer)
+
+        self._partes = []
+        with zipfile.ZipFile(BytesIO(buffer.getvalue())) as paquete:
+            for info in paquete.infolist():
+                datos = paquete.read(info)
+                if info.filename == _DOCUMENT_XML:
+                    self._raiz = etree.fromstring(datos)
+                # Las imágenes ya vienen comprimidas: se guardan sin volver a comprimir.
+                comprimir = zipfile.ZIP_STORED if info.filename.startswith("word/media/") else zipfile.ZIP_DEFLATED
+                self._partes.append((info.filename, datos, comprimir))
+
+    def _textos(self, elemento):
+        return elemento.iter(f"{{{_W_NS}}}t")
+
+    @staticmethod
+    def _poner(t, valor):
+        """Reemplaza la marca en ``t``; cada salto de línea pasa a ``<w:br/>``, como hace ``run.text``."""
+        primera, *resto = str(valor).split("\n")
+        t.text = primera
+        t.set(_XML_SPACE, "preserve")
+        anterior = t
+        for linea in resto:
+            salto = t.makeelement(f"{{{_W_NS}}}br", {})
+            anterior.addnext(salto)
+            anterior = t.makeelement(f"{{{_W_NS}}}t", {_XML_SPACE: "preserve"})
+            anterior.text = linea
+            salto.addnext(anterior)
+
+    def render(self, ctx) -> bytes:
+        import zipfile
+
+        raiz = copy.deepcopy(self._raiz)
+        valores = {_marca(marca): ctx[marca] for marca in _MARCAS}
+        fila_plantilla = None
+        for t in self._textos(raiz):
+            if t.text in valores:
+                self._poner(t, valores[t.text])
+            elif t.text == _marca(_MARCAS_FILA[0]):
+                fila_plantilla = next(t.iterancestors(f"{{{_W_NS}}}tr"))
+
+        for fila in ctx["filas"]:
+            nueva = copy.deepcopy(fila_plantilla)
+            marcas = {_marca(marca): valor for marca, valor in zip(_MARCAS_FILA, fila)}
+            for t in self._textos(nueva):
+                if t.text in marcas:
+                    self._poner(t, marcas[t.text])
+            fila_plantilla.addprevious(nueva)
+        fila_plantilla.getparent().remove(fila_plantilla)
+
+        documento = self._etree.tostring(raiz, xml_declaration=True, encoding="UTF-8", standalone=True)
+        salida = BytesIO()
+        with zipfile.ZipFile(salida, "w") as paquete:
+            for nombre, datos, comprimir in self._partes:
+                paquete.writestr(nombre, documento if nombre == _DOCUMENT_XML else datos, compress_type=comprimir)
+        return salida.getvalue()
+
+
+@lru_cache(maxsize=8)
+def _plantilla_consentimiento(info_evento_items, logo_path):
+    return _PlantillaConsentimiento(dict(info_evento_items), logo_path)
+
+
+def consentimiento_bytes(
+    nombre_acomp, doc_acomp, correo_acomp="", tel_acomp="",
+    participantes=None,
+    info_evento=INFO_EVENTO,
+    logo_path=LOGO_PATH
+):
+    """El consentimiento serializado a .docx, clonando la plantilla del proceso."""
+    ctx = _contexto_consentimiento(nombre_acomp, doc_acomp, correo_acomp, tel_acomp, participantes, info_evento)
+    plantilla = _plantilla_consentimiento(tuple(sorted(info_evento.items())), str(logo_path or ""))
+    return plantilla.render(ctx)
+
+
+def crear_doc_consentimiento(
+    nombre_acomp, doc_acomp, correo_acomp="", tel_acomp="",
+    participantes=None,  # lista de dicts: [{nombre, documento, fecha_nacimiento, eps, salud}, ...]
+    info_evento=INFO_EVENTO,
+    logo_path=LOGO_PATH
+):
+    return Document(BytesIO(consentimiento_bytes(
+        nombre_acomp, doc_acomp, correo_acomp, tel_acomp, participantes, info_evento, logo_path
+    )))
+
+
+def crear_doc_autorizacion_en_blanco(logo_path=LOGO_PATH):
+    """Formato de autorización en blanco (no depende de datos)."""
+    doc = Document()
+    set_margenes(doc, 2, 2, 2, 2)
+    agregar_logo(doc, logo_path)
+    p = doc.add_paragraph(); p.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    r = p.add_run("FORMATO DE AUTORIZACIÓN Y ACOMPAÑAMIENTO"); r.bold = True; r.font.size = Pt(16)
+    s = doc.add_paragraph(); s.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    s.add_run("Claveriada RJI – Medellín, Colombia").font.size = Pt(12)
+    info = doc.add_paragraph()
+    info.add_run("La información consignada es sensible y será utilizada únicamente para construir el perfil de cada participante "
+                 "en la Claveriada RJI y para la logística del encuentro. No será compartida con terceros.\n").font.size = Pt(10)
+    a = doc.add_paragraph()
+    a.add_run("Yo, ________________________________, identificado(a) con documento No. ________________________, "
+              "en calidad de acudiente/acompañante, autorizo la participación de las/los siguientes jóvenes en el evento.").font.size = Pt(11)
+    t = doc.add_table(rows=2, cols=2); t.style = "Table Grid"
+    t.cell(0,0).text = "Correo del acompañante"; t.cell(0,1).text = "_______________________________"
+    t.cell(1,0).text = "Teléfono del acompañante"; t.cell(1,1).text = "_______________________________"
+    doc.add_paragraph().add_run("Relación de jóvenes a cargo").bold = True
+    tbl = doc.add_table(rows=1, cols=5); tbl.style = "Table Grid"
+    hdr = tbl.rows[0].cells
+    hdr[0].text = "Nombre completo"; hdr[1].text = "Documento"; hdr[2].text = "Edad"; hdr[3].text = "EPS"; hdr[4].text = "Complicaciones de salud"
+    for _ in range(6):
+        row = tbl.add_row().cells
+        for i in range(5): row[i].text = ""
+    doc.add_paragraph("Declaro que la información es veraz y me comprometo a acompañar y velar por el bienestar de las/los jóvenes, "
+                      "cumplir las indicaciones del equipo organizador y notificar cualquier situación de salud o emergencia.")
+    f = doc.add_table(rows=2, cols=2); f.autofit = True
+    f.cell(0,0).text = "\n\n_______________________________"
+    f.cell(0,1).text = "\n\n_______________________________"
+    f.cell(1,0).text = "Firma del acompañante"
+    f.cell(1,1).text = "Firma de la institución"
+    return doc
+
+
+@lru_cache(maxsize=None)
+def autorizacion_en_blanco_bytes(logo_path=LOGO_PATH) -> bytes:
+    """El formato en blanco serializado a .docx, generado una sola vez por proceso."""
+    buffer = BytesIO()
+    crear_doc_autorizacion_en_blanco(logo_path).save(buffer)
+    return buffer.getvalue()
+
+
 # ====== MODO 1: GENERAR DESDE LISTA MANUAL ======
 def demo_manual():
     """Ejemplo manual: edita esta lista para probar rápidamente."""
@@ -260,17 +424,24 @@ def demo_manual():
 
 
 # ====== MODO 2: GENERAR DESDE GOOGLE SHEETS ======
-def generar_desde_google_sheet(
-    spreadsheet_id,
-    documento_acompanante,
-    out_path=None,
-    credentials_json_path=None,
-    credentials_info=None,
-):
-    """
-    Lee la pestaña PARTICIPANTES desde una hoja de Google y arma la lista para el acompañante dado.
-    Debes pasar el ID de la hoja y las credenciales del Service Account (ruta al JSON o el dict ya cargado).
-    """
+FORMATOS_LOTE = ("docx", "pdf")
+# Por debajo de este número de documentos no compensa arrancar procesos.
+LOTE_MIN_PARA_PROCESOS = 8
+
+
+def _normalizar_documento(valor):
+    return "".join(str(valor or "").split())
+
+
+def _es_menor(registro):
+    return str(registro.get("es_mayor_edad", "")).strip().lower() in ("false", "no", "0")
+
+
+def _leer_participantes(spreadsheet_id, credentials_json_path=None, credentials_info=None):
+    """Descarga la pestaña PARTICIPANTES una sola vez como lista de dicts."""
+    import gspread
+    from google.oauth2.service_account import Credentials
+
     scopes = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
     if credentials_info:
         creds = Credentials.from_service_account_info(_normalize_private_key(credentials_info), scopes=scopes)
@@ -281,76 +452,192 @@ def generar_desde_google_sheet(
 
     client = gspread.authorize(creds)
     sh = client.open_by_key(spreadsheet_id)
-    ws = sh.worksheet("PARTICIPANTES")
-    registros = ws.get_all_records()
-    dfp = pd.DataFrame(registros)
-    if dfp.empty:
-        dfp = pd.DataFrame(columns=[
-            "es_mayor_edad","documento_contacto","nombre_completo","documento_participante",
-            "fecha_nacimiento","eps","salud_mental","restricciones_alimentarias"
-        ])
-    for col in [
-        "es_mayor_edad","documento_contacto","nombre_completo","documento_participante",
-        "fecha_nacimiento","eps","salud_mental","restricciones_alimentarias"
-    ]:
-        if col not in dfp.columns:
-            dfp[col] = ""
-    # Filtrar menores que declararon a este acudiente
-    m = (
-        (dfp["es_mayor_edad"].astype(str).str.lower().isin(["false", "no", "0"]))
-        & (
-            dfp["documento_contacto"].astype(str).str.replace(r"\s+", "", regex=True)
-            == str(documento_acompanante).replace(" ", "")
-        )
+    return sh.worksheet("PARTICIPANTES").get_all_records()
+
+
+def _participante_desde_registro(r):
+    salud_merge = ""
+    if str(r.get("salud_mental", "")).strip():
+        salud_merge += f"Salud: {r['salud_mental']}. "
+    restricciones = str(r.get("restricciones_alimentarias", "")).strip()
+    if restricciones and restricciones.lower() not in ["ninguna", "no"]:
+        salud_merge += f"Alimentación: {restricciones}."
+    return {
+        "nombre": r.get("nombre_completo", ""),
+        "documento": r.get("documento_participante", ""),
+        "fecha_nacimiento": r.get("fecha_nacimiento", ""),
+        "eps": r.get("eps", ""),
+        "salud": salud_merge.strip(),
+    }
+
+
+def _acudiente_desde_registro(r, documento):
+    """Datos del acudiente tal como los declaró el joven en el formulario."""
+    nombre = " ".join(
+        str(r.get(col, "")).strip() for col in ("nombres_contacto", "apellidos_contacto") if str(r.get(col, "")).strip()
     )
-    sub = dfp[m].copy()
-
-    participantes = []
-    for _, r in sub.iterrows():
-        salud_merge = ""
-        if str(r.get("salud_mental", "")).strip():
-            salud_merge += f"Salud: {r['salud_mental']}. "
-        if str(r.get("restricciones_alimentarias", "")).strip() and r["restricciones_alimentarias"].strip().lower() not in ["ninguna", "no", ""]:
-            salud_merge += f"Alimentación: {r['restricciones_alimentarias']}."
-        participantes.append(
-            {
-                "nombre": r.get("nombre_completo", ""),
-                "documento": r.get("documento_participante", ""),
-                "fecha_nacimiento": r.get("fecha_nacimiento", ""),
-                "eps": r.get("eps", ""),
-                "salud": salud_merge.strip(),
-            }
-        )
-
-    # Datos básicos del acompañante (si los tienes en otro sitio, pásalos por parámetro)
-    nombre_acomp = "Acompañante"
-    correo = ""
-    tel = ""
+    return {
+        "nombre_acomp": nombre or "Acompañante",
+        "doc_acomp": str(documento),
+        "correo_acomp": str(r.get("correo_contacto", "")).strip(),
+        "tel_acomp": str(r.get("telefono_contacto", "")).strip().lstrip("'"),
+    }
 
-    doc = crear_doc_consentimiento(
-        nombre_acomp=nombre_acomp,
-        doc_acomp=str(documento_acompanante),
-        correo_acomp=correo,
-        tel_acomp=tel,
-        participantes=participantes,
+
+def menores_por_acudiente(registros):
+    """Agrupa en una pasada a los menores por ``documento_contacto`` normalizado.
+
+    Devuelve ``{documento: (acudiente, [participantes])}`` en el orden de la hoja;
+    los datos del acudiente salen del primer menor que lo declaró.
+    """
+    grupos = {}
+    for r in registros:
+        if not _es_menor(r):
+            continue
+        documento = _normalizar_documento(r.get("documento_contacto", ""))
+        if not documento:
+            continue
+        if documento not in grupos:
+            grupos[documento] = (_acudiente_desde_registro(r, documento), [])
+        grupos[documento][1].append(_participante_desde_registro(r))
+    return grupos
+
+
+def _renderizar_consentimiento(item):
+    """Worker del lote: ``(documento, acudiente, participantes, formato)`` → ``(nombre de archivo, bytes)``."""
+    documento, acudiente, participantes, formato = item
+    if formato == "pdf":
+        from doc_pdf import consentimiento_pdf_bytes
+
+        return f"consentimiento_rji_{documento}.pdf", consentimiento_pdf_bytes(participantes=participantes, **acudiente)
+    return f"consentimiento_rji_{documento}.docx", consentimiento_bytes(participantes=participantes, **acudiente)
+
+
+def generar_desde_google_sheet(
+    spreadsheet_id,
+    documento_acompanante,
+    out_path=None,
+    credentials_json_path=None,
+    credentials_info=None,
+):
+    """
+    Lee la pestaña PARTICIPANTES desde una hoja de Google y arma la lista para el acompañante dado.
+    Debes pasar el ID de la hoja y las credenciales del Service Account (ruta al JSON o el dict ya cargado).
+    Para muchos acompañantes usa ``generar_lote_desde_google_sheet``: descarga la hoja una sola vez.
+    """
+    registros = _leer_participantes(spreadsheet_id, credentials_json_path, credentials_info)
+    documento = _normalizar_documento(documento_acompanante)
+    acudiente, participantes = menores_por_acudiente(registros).get(
+        documento, (_acudiente_desde_registro({}, documento), [])
     )
 
     if out_path is None:
         out_path = f"consentimiento_rji_{documento_acompanante}.docx"
-    doc.save(out_path)
+    Path(out_path).write_bytes(consentimiento_bytes(participantes=participantes, **acudiente))
     print(f"Documento generado: {out_path}")
 
 
+def generar_lote_desde_google_sheet(
+    spreadsheet_id,
+    destino,
+    credentials_json_path=None,
+    credentials_info=None,
+    documentos=None,
+    procesos=None,
+    progress=None,
+    formato="docx",
+):
+    """
+    Genera el consentimiento de cada acudiente con menores a cargo, leyendo PARTICIPANTES una vez.
+
+    ``destino`` terminado en ``.zip`` produce un zip; cualquier otra ruta se usa como carpeta.
+    ``documentos`` limita el lote a esos acudientes. Los documentos se renderizan en un
+    pool de ``procesos`` procesos; ``progress(hechos, total)`` se llama tras cada uno.
+    ``formato`` es ``docx`` o ``pdf`` (ver ``doc_pdf``).
+    Devuelve el número de documentos generados.
+    """
+    import zipfile
+    from concurrent.futures import ProcessPoolExecutor
+
+    if formato not in FORMATOS_LOTE:
+        raise ValueError(f"Formato no soportado: {formato}. Usa {', '.join(FORMATOS_LOTE)}.")
+    if formato == "pdf":
+        from doc_pdf import _reportlab
+
+        _reportlab()  # falla antes de descargar la hoja si falta reportlab
+    grupos = menores_por_acudiente(_leer_participantes(spreadsheet_id, credentials_json_path, credentials_info))
+    if documentos:
+        elegidos = {_normalizar_documento(d) for d in documentos}
+        grupos = {d: g for d, g in grupos.items() if d in elegidos}
+    items = [
+        (documento, acudiente, participantes, formato)
+        for documento, (acudiente, participantes) in grupos.items()
+    ]
+
+    destino = Path(destino)
+    if destino.suffix.lower() == ".zip":
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        archivo = zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_DEFLATED)
+        guardar = archivo.writestr
+    else:
+        destino.mkdir(parents=True, exist_ok=True)
+        archivo = None
+
+        def guardar(nombre, datos):
+            (destino / nombre).write_bytes(datos)
+
+    pool = None
+    try:
+        if procesos != 1 and len(items) >= LOTE_MIN_PARA_PROCESOS:
+            pool = ProcessPoolExecutor(max_workers=procesos)
+            resultados = pool.map(_renderizar_consentimiento, items, chunksize=4)
+        else:
+            resultados = map(_renderizar_consentimiento, items)
+        for hechos, (nombre, datos) in enumerate(resultados, start=1):
+            guardar(nombre, datos)
+            if progress is not None:
+                progress(hechos, len(items))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if archivo is not None:
+            archivo.close()
+    return len(items)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Genera formatos de consentimiento. Sin --spreadsheet genera el demo manual."
+    )
+    parser.add_argument("--spreadsheet", default="", help="ID de la hoja con la pestaña PARTICIPANTES")
+    parser.add_argument("--credenciales", default="", help="Ruta al JSON del service account")
+    parser.add_argument("--salida", default="consentimientos_rji.zip", help="Archivo .zip o carpeta destino")
+    parser.add_argument(
+        "--acudiente", action="append", default=[], help="Documento de un acudiente (repetible); por defecto todos"
+    )
+    parser.add_argument("--formato", choices=FORMATOS_LOTE, default="docx", help="pdf requiere reportlab")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos para renderizar (por defecto, uno por CPU)")
+    args = parser.parse_args(argv)
+
+    if not args.spreadsheet:
+        demo_manual()
+        return
+
+    total = generar_lote_desde_google_sheet(
+        args.spreadsheet,
+        args.salida,
+        credentials_json_path=args.credenciales or None,
+        documentos=args.acudiente,
+        procesos=args.procesos,
+        formato=args.formato,
+        progress=lambda hechos, total: print(f"  {hechos}/{total} documentos", flush=True),
+    )
+    print(f"Documentos generados: {total} en {args.salida}")
+
+
 if __name__ == "__main__":
-    # === Elige cómo probar ===
-    # 1) Demo manual (rápido):
-    demo_manual()
-
-    # 2) Desde Google Sheets:
-    # generar_desde_google_sheet(
-    #     "1vVyWpY1izl8wcESXK-mdXNOqHzyc-yGUZcZ1H-0sMNs",
-    #     documento_acompanante="99887766",
-    #     credentials_json_path="ruta/a/tu-service-account.json",
-    # )
-
-   
+    # Sin argumentos: demo manual. Desde Google Sheets, en lote:
+    #   python doc.py --spreadsheet <ID> --credenciales ruta/a/tu-service-account.json --salida consentimientos.zip
+    main()
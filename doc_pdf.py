@@ -0,0 +1,182 @@
+# doc_pdf.py
+"""Consentimiento en PDF directo, con los mismos datos que ``doc.crear_doc_consentimiento``.
+
+El .docx se ve distinto según la versión de Word y convertir miles a PDF por
+fuera es lento; este renderizador arma el PDF con reportlab (opcional) a partir
+del mismo contexto (``doc._contexto_consentimiento``). Estilos, fuentes y logo
+se preparan una sola vez por proceso.
+"""
+import importlib.util
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from doc import INFO_EVENTO, LOGO_PATH, _contexto_consentimiento
+
+# Si existen, se registran y se usan en lugar de Helvetica (p. ej. para igualar la fuente de Word).
+FUENTE_TTF = "assets/fonts/DejaVuSans.ttf"
+FUENTE_TTF_NEGRITA = "assets/fonts/DejaVuSans-Bold.ttf"
+LOGO_ANCHO_PUNTOS = 3.0 * 72
+# Resolución a la que se incrusta el logo; de sobra para imprimir.
+LOGO_DPI = 200
+MARGEN_CM = 2.0
+
+
+def _reportlab():
+    # reportlab es opcional
+    if importlib.util.find_spec("reportlab") is None:
+        raise ValueError("Para generar PDF instala reportlab (pip install reportlab).")
+
+
+@lru_cache(maxsize=None)
+def _fuentes():
+    """``(normal, negrita)``; las TTF se registran una sola vez por proceso."""
+    _reportlab()
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    if Path(FUENTE_TTF).exists() and Path(FUENTE_TTF_NEGRITA).exists():
+        pdfmetrics.registerFont(TTFont("RJI", FUENTE_TTF))
+        pdfmetrics.registerFont(TTFont("RJI-Bold", FUENTE_TTF_NEGRITA))
+        pdfmetrics.registerFontFamily("RJI", normal="RJI", bold="RJI-Bold")
+        return "RJI", "RJI-Bold"
+    return "Helvetica", "Helvetica-Bold"
+
+
+@lru_cache(maxsize=None)
+def _estilos():
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.styles import ParagraphStyle
+
+    normal, negrita = _fuentes()
+    return {
+        "titulo": ParagraphStyle("titulo", fontName=negrita, fontSize=16, leading=20, alignment=TA_CENTER),
+        "subtitulo": ParagraphStyle("subtitulo", fontName=normal, fontSize=13, leading=17, alignment=TA_CENTER),
+        "info": ParagraphStyle("info", fontName=normal, fontSize=10, leading=13, spaceBefore=12),
+        "texto": ParagraphStyle("texto", fontName=normal, fontSize=11, leading=14, spaceBefore=12),
+        "seccion": ParagraphStyle("seccion", fontName=negrita, fontSize=11, leading=14, spaceBefore=16, spaceAfter=4),
+        "celda": ParagraphStyle("celda", fontName=normal, fontSize=10, leading=12),
+        "celda_negrita": ParagraphStyle("celda_negrita", fontName=negrita, fontSize=10, leading=12),
+    }
+
+
+@lru_cache(maxsize=8)
+def _logo(logo_path):
+    """``(ImageReader, ancho, alto)`` del logo, preparado una vez; ``None`` si falta.
+
+    El PNG original (1920 px con alfa) se reduce a ``LOGO_DPI`` sobre fondo
+    blanco y se guarda como JPEG: reportlab incrusta el JPEG tal cual, sin
+    recomprimir ni codificar píxeles en cada documento.
+    """
+    from PIL import Image
+    from reportlab.lib.utils import ImageReader
+
+    try:
+        with Image.open(logo_path) as original:
+            original.load()
+            ancho, alto = original.size
+            pixeles = max(1, round(LOGO_ANCHO_PUNTOS / 72 * LOGO_DPI))
+            reducida = original.convert("RGBA").resize((pixeles, max(1, round(pixeles * alto / ancho))), Image.LANCZOS)
+    except Exception:
+        return None
+    fondo = Image.new("RGB", reducida.size, "white")
+    fondo.paste(reducida, mask=reducida.getchannel("A"))
+    jpeg = BytesIO()
+    fondo.save(jpeg, "JPEG", quality=90)
+    jpeg.seek(0)
+    return ImageReader(jpeg), LOGO_ANCHO_PUNTOS, LOGO_ANCHO_PUNTOS * alto / ancho
+
+
+def _parrafo(texto, estilo):
+    from reportlab.platypus import Paragraph
+
+    return Paragraph(escape(str(texto)).replace("\n", "<br/>"), _estilos()[estilo])
+
+
+def _tabla(filas, anchos, negrita=None, encabezado=False, rejilla=True):
+    from reportlab.lib import colors
+    from reportlab.platypus import Table, TableStyle
+
+    datos = [
+        [_parrafo(valor, "celda_negrita" if i == negrita else "celda") for valor in fila]
+        for i, fila in enumerate(filas)
+    ]
+    estilo = [("VALIGN", (0, 0), (-1, -1), "TOP")]
+    if rejilla:
+        estilo.append(("GRID", (0, 0), (-1, -1), 0.5, colors.black))
+    tabla = Table(datos, colWidths=anchos, repeatRows=1 if encabezado else 0)
+    tabla.setStyle(TableStyle(estilo))
+    return tabla
+
+
+def consentimiento_pdf_bytes(
+    nombre_acomp, doc_acomp, correo_acomp="", tel_acomp="",
+    participantes=None,
+    info_evento=INFO_EVENTO,
+    logo_path=LOGO_PATH
+):
+    """El consentimiento en PDF, con la misma información y orden que el .docx."""
+    _reportlab()
+    from reportlab.lib.pagesizes import LETTER
+    from reportlab.lib.units import cm
+    from reportlab.platypus import SimpleDocTemplate, Spacer
+
+    ctx = _contexto_consentimiento(nombre_acomp, doc_acomp, correo_acomp, tel_acomp, participantes, info_evento)
+    logo = _logo(str(logo_path)) if logo_path else None
+    margen = MARGEN_CM * cm
+    alto_logo = logo[2] if logo else 0
+
+    def encabezado(canvas, documento):
+        if logo:
+            imagen, ancho, alto = logo
+            x = (documento.pagesize[0] - ancho) / 2
+            canvas.drawImage(imagen, x, documento.pagesize[1] - margen / 2 - alto, ancho, alto)
+
+    salida = BytesIO()
+    documento = SimpleDocTemplate(
+        salida,
+        pagesize=LETTER,
+        leftMargin=margen,
+        rightMargin=margen,
+        topMargin=margen + alto_logo,
+        bottomMargin=margen,
+        title="Formato de autorización y acompañamiento",
+    )
+    util = documento.width
+    bloques = [
+        _parrafo("FORMATO DE AUTORIZACIÓN Y ACOMPAÑAMIENTO", "titulo"),
+        _parrafo(ctx["evento"], "subtitulo"),
+        _parrafo(ctx["info"], "info"),
+        _parrafo(ctx["declaracion"], "texto"),
+        Spacer(1, 8),
+        _tabla(
+            [["Correo del acompañante", ctx["correo"]], ["Teléfono del acompañante", ctx["telefono"]]],
+            [util * 0.4, util * 0.6],
+        ),
+        _parrafo("Relación de jóvenes a cargo", "seccion"),
+        _tabla(
+            [["Nombre completo", "Documento", "Edad", "EPS", "Complicaciones de salud"], *ctx["filas"]],
+            [util * 0.28, util * 0.16, util * 0.08, util * 0.16, util * 0.32],
+            negrita=0,
+            encabezado=True,
+        ),
+        _parrafo(
+            "Declaro que la información consignada es veraz. Me comprometo a acompañar y velar por el bienestar "
+            "de las/los jóvenes, cumplir las indicaciones del equipo organizador y notificar cualquier situación "
+            "de salud o emergencia.",
+            "texto",
+        ),
+        Spacer(1, 36),
+        _tabla(
+            [
+                ["_______________________________", "_______________________________"],
+                ["Firma del acompañante", "Firma de la institución"],
+            ],
+            [util / 2, util / 2],
+            negrita=1,
+            rejilla=False,
+        ),
+    ]
+    documento.build(bloques, onFirstPage=encabezado, onLaterPages=encabezado)
+    return salida.getvalue()
@@ -1,17 +1,21 @@
-from typing import List
+from typing import List, TYPE_CHECKING
 import re
 import textwrap
+import io
 import json
 import mimetypes
+import random
+import threading
+import time
 from pathlib import Path
 from contextlib import suppress
 
-import gspread
-import pandas as pd
 import streamlit as st
-from gspread.exceptions import WorksheetNotFound
-from google.oauth2.service_account import Credentials
-from google.auth.transport.requests import AuthorizedSession
+
+# gspread, google-auth and pandas are imported inside the functions that use
+# them so importing this module (and starting the app) stays cheap.
+if TYPE_CHECKING:
+    import pandas as pd
 
 EXPERIENCIAS_PARTICIPANTE = [
     ("Misión de servicio", "exp_mision_servicio_rank"),
@@ -38,7 +42,7 @@ PARTICIPANTES_COLS = [
     "acompanamiento_mentoria","acompanamiento_espiritual","acompanamiento_red_comunitaria","acompanamiento_ninguna",
     "conoce_rji","tipo_documento_contacto","documento_contacto","nombres_contacto","apellidos_contacto","telefono_contacto",
     "correo_contacto","parentesco_contacto","archivo_doc_participante",
-    "acepta_tratamiento_datos","acepta_whatsapp"
+    "acepta_tratamiento_datos","acepta_whatsapp","experiencia_asignada"
 ]
 
 ACOMPANANTES_COLS = [
@@ -105,13 +109,28 @@ def _get_google_credentials():
     credentials_info = st.secrets.get("gcp_service_account")
     if not credentials_info:
         raise RuntimeError("No se encontraron las credenciales de Google en st.secrets['gcp_service_account'].")
+    from google.oauth2.service_account import Credentials
+
     normalized_info = _normalize_private_key(credentials_info)
     credentials = Credentials.from_service_account_info(normalized_info, scopes=SCOPES)
     return credentials
 
 
+def sheets_api_error():
+    """gspread's ``APIError`` class, imported on demand.
+
+    Meant for ``except`` clauses: Python only evaluates the clause once an
+    exception is raised, so callers do not import gspread up front.
+    """
+    from gspread.exceptions import APIError
+
+    return APIError
+
+
 @st.cache_resource(show_spinner=False)
 def _get_gspread_client():
+    import gspread
+
     credentials = _get_google_credentials()
     return gspread.authorize(credentials)
 
@@ -128,12 +147,12 @@ def _stringify_cell(value):
         return ""
     if isinstance(value, bool):
         return "TRUE" if value else "FALSE"
-    if isinstance(value, float) and pd.isna(value):
+    if isinstance(value, float) and value != value:  # NaN
         return ""
     return str(value)
 
 
-def _write_dataframe_to_worksheet(ws, df: pd.DataFrame):
+def _write_dataframe_to_worksheet(ws, df: "pd.DataFrame"):
     df_to_write = df.copy()
     for col in df_to_write.columns:
         if df_to_write[col].dtype == "object":
@@ -150,6 +169,8 @@ def _write_dataframe_to_worksheet(ws, df: pd.DataFrame):
 
 
 def _ensure_worksheet(sh, title: str, columns: List[str]):
+    from gspread.exceptions import WorksheetNotFound
+
     try:
         ws = sh.worksheet(title)
     except WorksheetNotFound:
@@ -157,21 +178,45 @@ def _ensure_worksheet(sh, title: str, columns: List[str]):
         ws.append_row(columns)
         return ws
 
-    all_values = ws.get_all_values()
-    if not all_values:
-        ws.append_row(columns)
+    # Common case: only the header row is downloaded, not the whole tab.
+    header = ws.row_values(1)
+    if header == columns:
         return ws
 
-    header = all_values[0]
-    if header == columns:
+    from gspread.utils import rowcol_to_a1
+
+    # New columns are appended at the end of the expected list, so a header
+    # that is a prefix of it only needs the missing header cells.
+    if header == columns[:len(header)]:
+        if ws.col_count < len(columns):
+            ws.add_cols(len(columns) - ws.col_count)
+        ws.batch_update(
+            [{
+                "range": f"{rowcol_to_a1(1, len(header) + 1)}:{rowcol_to_a1(1, len(columns))}",
+                "values": [columns[len(header):]],
+            }],
+            value_input_option="RAW",
+        )
         return ws
 
-    existing_df = pd.DataFrame(all_values[1:], columns=header)
-    for col in columns:
-        if col not in existing_df.columns:
-            existing_df[col] = ""
-    existing_df = existing_df[columns]
-    _write_dataframe_to_worksheet(ws, existing_df)
+    # Reordered or foreign columns: rewrite the tab in place with its formulas
+    # (e.g. the HYPERLINK in archivo_doc_participante) and without clearing it
+    # first, so a failed request leaves the tab as it was.
+    all_values = ws.get_all_values(value_render_option="FORMULA", date_time_render_option="FORMATTED_STRING")
+    rows = all_values[1:]
+    width = max(len(header), len(columns))
+    if ws.col_count < width:
+        ws.add_cols(width - ws.col_count)
+    positions = {col: i for i, col in enumerate(header) if col}
+    values = [columns + [""] * (width - len(columns))]
+    for row in rows:
+        new_row = [_stringify_cell(row[positions[col]]) if col in positions and positions[col] < len(row) else ""
+                   for col in columns]
+        values.append(new_row + [""] * (width - len(columns)))
+    ws.batch_update(
+        [{"range": f"A1:{rowcol_to_a1(len(values), width)}", "values": values}],
+        value_input_option="USER_ENTERED",
+    )
     return ws
 
 
@@ -182,11 +227,106 @@ def ensure_excel_with_sheets(spreadsheet_id: str):
     _ensure_worksheet(sh, "UNIFICADO", UNIFICADO_COLS)
 
 
-def append_row(spreadsheet_id: str, sheet: str, row: list, expected_cols: list):
+SHEETS_BOOTSTRAP_TTL_SECONDS = 30 * 60
+SHEETS_BOOTSTRAP_RETRY_SECONDS = 60
+_bootstrap_lock = threading.Lock()
+_bootstrap_state = {}
+
+
+def bootstrap_spreadsheet(spreadsheet_id: str) -> None:
+    """Run ``ensure_excel_with_sheets`` at most once per TTL for the whole process.
+
+    All sessions share the result, and a lock makes concurrent first visitors
+    wait for a single check instead of each downloading the tabs. A failure is
+    remembered for ``SHEETS_BOOTSTRAP_RETRY_SECONDS`` and re-raised to callers
+    in that window, so an outage does not turn into a retry storm.
+    """
+    def _cached():
+        state = _bootstrap_state.get(spreadsheet_id)
+        if state is None:
+            return False
+        checked_at, error = state
+        ttl = SHEETS_BOOTSTRAP_RETRY_SECONDS if error is not None else SHEETS_BOOTSTRAP_TTL_SECONDS
+        if time.time() - checked_at >= ttl:
+            return False
+        if error is not None:
+            raise error
+        return True
+
+    if _cached():
+        return
+    with _bootstrap_lock:
+        if _cached():
+            return
+        try:
+            ensure_excel_with_sheets(spreadsheet_id)
+        except Exception as exc:
+            _bootstrap_state[spreadsheet_id] = (time.time(), exc)
+            raise
+        _bootstrap_state[spreadsheet_id] = (time.time(), None)
+
+
+def append_row(spreadsheet_id: str, sheet: str, row: list, expected_cols: list, prepared: bool = False):
+    """Append ``row`` to ``sheet``.
+
+    Pass ``prepared=True`` when the row already comes from a serializer such
+    as ``utils_participantes.SerializadorFilas`` (one string per column), so
+    it is sent as-is instead of being padded and stringified again.
+    """
+    sh = _get_spreadsheet(spreadsheet_id)
+    ws = _ensure_worksheet(sh, sheet, expected_cols)
+    if not prepared or len(row) != len(expected_cols):
+        row = [_stringify_cell(row[i]) if i < len(row) else "" for i in range(len(expected_cols))]
+    ws.append_row(row, value_input_option="USER_ENTERED")
+
+
+# Sheets allows about 60 write requests per minute per user; one request per
+# batch of rows keeps bulk imports far below that.
+SHEETS_APPEND_MAX_RETRIES = 6
+# Only statuses where the append was certainly not applied are retried, so a
+# retry never duplicates rows.
+_APPEND_RETRYABLE_STATUS = {429, 503}
+
+
+def append_rows(spreadsheet_id: str, sheet: str, rows: list, expected_cols: list, prepared: bool = False) -> int:
+    """Append many rows to ``sheet`` in a single request.
+
+    Quota (429) and unavailable (503) responses are retried with exponential
+    backoff. Returns the number of rows written.
+    """
+    from gspread.exceptions import APIError
+
+    if not rows:
+        return 0
+    sh = _get_spreadsheet(spreadsheet_id)
+    ws = _ensure_worksheet(sh, sheet, expected_cols)
+    width = len(expected_cols)
+    if not prepared:
+        rows = [[_stringify_cell(row[i]) if i < len(row) else "" for i in range(width)] for row in rows]
+    for attempt in range(SHEETS_APPEND_MAX_RETRIES + 1):
+        try:
+            ws.append_rows(rows, value_input_option="USER_ENTERED", insert_data_option="INSERT_ROWS")
+            return len(rows)
+        except APIError as exc:
+            status = getattr(exc.response, "status_code", None)
+            if status not in _APPEND_RETRYABLE_STATUS or attempt == SHEETS_APPEND_MAX_RETRIES:
+                raise
+            _backoff(attempt)
+    return 0
+
+
+def read_column(spreadsheet_id: str, sheet: str, column: str, expected_cols: list) -> list:
+    """Values of one column (without the header), downloading only that column."""
+    from gspread.utils import rowcol_to_a1
+
     sh = _get_spreadsheet(spreadsheet_id)
     ws = _ensure_worksheet(sh, sheet, expected_cols)
-    prepared = [_stringify_cell(row[i]) if i < len(row) else "" for i in range(len(expected_cols))]
-    ws.append_row(prepared, value_input_option="USER_ENTERED")
+    header = ws.row_values(1)
+    if column not in header:
+        return []
+    letter = rowcol_to_a1(1, header.index(column) + 1).rstrip("0123456789")
+    values = ws.get(f"{letter}2:{letter}")
+    return [str(row[0]) if row else "" for row in values]
 
 
 def _get_service_account_email() -> str:
@@ -206,88 +346,165 @@ def _record_drive_error(message: str) -> None:
     st.session_state["_drive_last_error"] = message
 
 
-def upload_file_to_drive(local_path: Path, folder_id: str = "") -> str:
-    """Upload a file to Drive and return a shareable link.
+DRIVE_UPLOAD_URL = "https://www.googleapis.com/upload/drive/v3/files"
+DRIVE_FILES_URL = "https://www.googleapis.com/drive/v3/files"
+# Resumable uploads require chunks that are multiples of 256 KiB.
+DRIVE_UPLOAD_CHUNK_SIZE = 8 * 256 * 1024
+DRIVE_UPLOAD_MAX_RETRIES = 6
+DRIVE_UPLOAD_TIMEOUT = 60
+_RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
 
-    When a Shared Drive folder is provided the request must opt-in to
-    ``supportsAllDrives`` or Drive rejects the upload. Streamlit users often
-    store the destination folder inside a shared drive, so we set the flag
-    both for the file upload and the permission share call.
-    """
-    if not isinstance(local_path, Path):
-        local_path = Path(str(local_path))
 
-    if not local_path.exists():
-        _record_drive_error(f"El archivo {local_path} no existe para subirlo a Drive.")
-        return ""
+def _drive_http_error(status_code: int, error_text: str, folder_id: str) -> str:
+    if status_code == 404 and folder_id:
+        service_email = _get_service_account_email()
+        hint = (
+            "No se encontró la carpeta de Drive indicada. "
+            "Verifica que el ID sea correcto, que la carpeta exista y que el service account"
+        )
+        if service_email:
+            hint += f" ({service_email})"
+        hint += " tenga al menos permiso de Editor en esa carpeta o en la unidad compartida."
+        return hint
+    return f"Error al subir a Drive (HTTP {status_code}): {error_text}"
 
-    try:
-        credentials = _get_google_credentials()
-    except RuntimeError as exc:
-        _record_drive_error(str(exc))
-        return ""
 
-    session = AuthorizedSession(credentials)
+def _stream_size(stream) -> int:
+    current = stream.tell()
+    stream.seek(0, io.SEEK_END)
+    size = stream.tell()
+    stream.seek(current)
+    return size
 
-    metadata = {"name": local_path.name}
-    cleaned_folder = (folder_id or "").strip()
-    if cleaned_folder:
-        metadata["parents"] = [cleaned_folder]
 
-    mime_type = mimetypes.guess_type(local_path.name)[0] or "application/octet-stream"
-    upload_url = "https://www.googleapis.com/upload/drive/v3/files"
+def _confirmed_offset(response) -> int:
+    """Return the next byte Drive expects according to a 308 ``Range`` header."""
+    range_header = response.headers.get("Range", "")
+    match = re.match(r"bytes=0-(\d+)", range_header)
+    if not match:
+        return 0
+    return int(match.group(1)) + 1
+
+
+def _backoff(attempt: int) -> None:
+    time.sleep(min(2 ** attempt, 32) + random.random())
+
+
+def _start_resumable_session(session, metadata: dict, mime_type: str, total: int) -> str:
     params = {
-        "uploadType": "multipart",
+        "uploadType": "resumable",
         "supportsAllDrives": "true",
         "fields": "id,webViewLink,webContentLink",
     }
+    headers = {
+        "X-Upload-Content-Type": mime_type,
+        "X-Upload-Content-Length": str(total),
+        "Content-Type": "application/json; charset=UTF-8",
+    }
+    response = session.post(
+        DRIVE_UPLOAD_URL,
+        params=params,
+        headers=headers,
+        data=json.dumps(metadata),
+        timeout=DRIVE_UPLOAD_TIMEOUT,
+    )
+    if response.status_code != 200 or not response.headers.get("Location"):
+        raise RuntimeError(
+            _drive_http_error(response.status_code, response.text.strip(), metadata.get("parents", [""])[0])
+        )
+    return response.headers["Location"]
 
-    try:
-        with local_path.open("rb") as fh:
-            files = {
-                "metadata": (
-                    "metadata",
-                    json.dumps(metadata),
-                    "application/json; charset=UTF-8",
-                ),
-                "file": (
-                    local_path.name,
-                    fh,
-                    mime_type,
-                ),
-            }
-            response = session.post(upload_url, params=params, files=files)
-    except Exception as exc:
-        _record_drive_error(f"Error al subir a Drive: {exc}")
-        return ""
 
-    if response.status_code not in (200, 201):
-        error_text = response.text.strip()
-        if response.status_code == 404 and cleaned_folder:
-            service_email = _get_service_account_email()
-            hint = (
-                "No se encontró la carpeta de Drive indicada. "
-                "Verifica que el ID sea correcto, que la carpeta exista y que el service account"
-            )
-            if service_email:
-                hint += f" ({service_email})"
-            hint += " tenga al menos permiso de Editor en esa carpeta o en la unidad compartida."
-            _record_drive_error(hint)
-        else:
-            _record_drive_error(
-                f"Error al subir a Drive (HTTP {response.status_code}): {error_text}"
-            )
-        return ""
+def _query_upload_status(session, session_uri: str, total: int):
+    return session.put(
+        session_uri,
+        headers={"Content-Length": "0", "Content-Range": f"bytes */{total}"},
+        timeout=DRIVE_UPLOAD_TIMEOUT,
+    )
 
-    payload = response.json() if response.content else {}
-    file_id = payload.get("id")
-    web_view_link = payload.get("webViewLink")
-    web_content_link = payload.get("webContentLink")
 
-    if not file_id:
-        _record_drive_error("La respuesta de Drive no incluyó un ID de archivo.")
-        return ""
+def _resumable_upload(session, stream, metadata: dict, mime_type: str) -> dict:
+    """Send ``stream`` to Drive in chunks and return the created file resource.
+
+    Network errors and retryable HTTP statuses are recovered by asking Drive
+    how many bytes it already persisted and continuing from that offset, so a
+    flaky connection never forces the whole document to be sent again. Only an
+    expired upload session (404/410) restarts from byte zero.
+    """
+    total = _stream_size(stream)
+    session_uri = _start_resumable_session(session, metadata, mime_type, total)
+    offset = 0
+    attempt = 0
+
+    while True:
+        try:
+            if total == 0:
+                response = session.put(
+                    session_uri,
+                    headers={"Content-Length": "0"},
+                    timeout=DRIVE_UPLOAD_TIMEOUT,
+                )
+            else:
+                stream.seek(offset)
+                chunk = stream.read(DRIVE_UPLOAD_CHUNK_SIZE)
+                end = offset + len(chunk) - 1
+                response = session.put(
+                    session_uri,
+                    headers={
+                        "Content-Length": str(len(chunk)),
+                        "Content-Range": f"bytes {offset}-{end}/{total}",
+                    },
+                    data=chunk,
+                    timeout=DRIVE_UPLOAD_TIMEOUT,
+                )
+        except Exception as exc:
+            attempt += 1
+            if attempt > DRIVE_UPLOAD_MAX_RETRIES:
+                raise RuntimeError(f"Error al subir a Drive: {exc}") from exc
+            _backoff(attempt)
+            with suppress(Exception):
+                status = _query_upload_status(session, session_uri, total)
+                if status.status_code in (200, 201):
+                    return status.json() if status.content else {}
+                if status.status_code == 308:
+                    offset = _confirmed_offset(status)
+            continue
+
+        if response.status_code in (200, 201):
+            return response.json() if response.content else {}
+
+        if response.status_code == 308:
+            offset = _confirmed_offset(response)
+            attempt = 0
+            continue
+
+        if response.status_code in (404, 410):
+            # The upload session expired; Drive kept nothing, so start over.
+            attempt += 1
+            if attempt > DRIVE_UPLOAD_MAX_RETRIES:
+                raise RuntimeError(_drive_http_error(response.status_code, response.text.strip(), ""))
+            session_uri = _start_resumable_session(session, metadata, mime_type, total)
+            offset = 0
+            continue
+
+        if response.status_code in _RETRYABLE_STATUS:
+            attempt += 1
+            if attempt > DRIVE_UPLOAD_MAX_RETRIES:
+                raise RuntimeError(_drive_http_error(response.status_code, response.text.strip(), ""))
+            _backoff(attempt)
+            with suppress(Exception):
+                status = _query_upload_status(session, session_uri, total)
+                if status.status_code in (200, 201):
+                    return status.json() if status.content else {}
+                if status.status_code == 308:
+                    offset = _confirmed_offset(status)
+            continue
+
+        raise RuntimeError(_drive_http_error(response.status_code, response.text.strip(), ""))
 
+
+def _share_and_link(session, payload: dict) -> str:
+    file_id = payload.get("id")
     permission_params = {
         "sendNotificationEmail": "false",
         "supportsAllDrives": "true",
@@ -296,21 +513,220 @@ def upload_file_to_drive(local_path: Path, folder_id: str = "") -> str:
 
     with suppress(Exception):
         session.post(
-            f"https://www.googleapis.com/drive/v3/files/{file_id}/permissions",
+            f"{DRIVE_FILES_URL}/{file_id}/permissions",
             params=permission_params,
             json={"role": "reader", "type": "anyone"},
+            timeout=DRIVE_UPLOAD_TIMEOUT,
         )
 
-    _record_drive_error("")
-
-    for candidate in (web_view_link, web_content_link):
+    for candidate in (payload.get("webViewLink"), payload.get("webContentLink")):
         if isinstance(candidate, str) and candidate.startswith("http"):
             return candidate
 
     return f"https://drive.google.com/file/d/{file_id}/view?usp=sharing"
 
 
-def get_sheet_as_dataframe(spreadsheet_id: str, sheet: str, expected_cols: list) -> pd.DataFrame:
+def drive_upload_stream(stream, filename: str, folder_id: str = "") -> dict:
+    """Upload a seekable binary stream and return ``{"id": ..., "link": ...}``.
+
+    When a Shared Drive folder is provided the request must opt-in to
+    ``supportsAllDrives`` or Drive rejects the upload. Streamlit users often
+    store the destination folder inside a shared drive, so we set the flag
+    both for the file upload and the permission share call.
+
+    Raises ``RuntimeError`` with a user-facing message on failure and never
+    touches ``st.session_state``, so it is safe to call from worker threads.
+    """
+    from google.auth.transport.requests import AuthorizedSession
+
+    credentials = _get_google_credentials()
+    session = AuthorizedSession(credentials)
+
+    metadata = {"name": filename}
+    cleaned_folder = (folder_id or "").strip()
+    if cleaned_folder:
+        metadata["parents"] = [cleaned_folder]
+
+    mime_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    try:
+        payload = _resumable_upload(session, stream, metadata, mime_type)
+    except RuntimeError:
+        raise
+    except Exception as exc:
+        raise RuntimeError(f"Error al subir a Drive: {exc}") from exc
+
+    file_id = payload.get("id")
+    if not file_id:
+        raise RuntimeError("La respuesta de Drive no incluyó un ID de archivo.")
+
+    return {"id": file_id, "link": _share_and_link(session, payload)}
+
+
+def drive_file_exists(file_id: str):
+    """Return True/False when Drive confirms the file state, None if unknown."""
+    from google.auth.transport.requests import AuthorizedSession
+
+    try:
+        session = AuthorizedSession(_get_google_credentials())
+        response = session.get(
+            f"{DRIVE_FILES_URL}/{file_id}",
+            params={"fields": "id,trashed", "supportsAllDrives": "true"},
+            timeout=DRIVE_UPLOAD_TIMEOUT,
+        )
+    except Exception:
+        return None
+    if response.status_code == 404:
+        return False
+    if response.status_code != 200:
+        return None
+    payload = response.json() if response.content else {}
+    return not payload.get("trashed", False)
+
+
+def upload_stream_to_drive(stream, filename: str, folder_id: str = "") -> str:
+    """Upload a seekable binary stream to Drive and return a shareable link."""
+    try:
+        result = drive_upload_stream(stream, filename, folder_id=folder_id)
+    except RuntimeError as exc:
+        _record_drive_error(str(exc))
+        return ""
+
+    _record_drive_error("")
+    return result["link"]
+
+
+def upload_bytes_to_drive(data, filename: str, folder_id: str = "") -> str:
+    """Upload an in-memory buffer without writing it to disk first."""
+    return upload_stream_to_drive(io.BytesIO(data), filename, folder_id=folder_id)
+
+
+def upload_file_to_drive(local_path: Path, folder_id: str = "") -> str:
+    """Upload a local file to Drive and return a shareable link."""
+    if not isinstance(local_path, Path):
+        local_path = Path(str(local_path))
+
+    if not local_path.exists():
+        _record_drive_error(f"El archivo {local_path} no existe para subirlo a Drive.")
+        return ""
+
+    with local_path.open("rb") as fh:
+        return upload_stream_to_drive(fh, local_path.name, folder_id=folder_id)
+
+
+def hyperlink_formula(url: str, label: str) -> str:
+    """Sheets formula that shows ``label`` and links to ``url``."""
+    safe_url = str(url).replace('"', "%22")
+    safe_label = str(label or "Archivo").replace('"', '""')
+    return f'=HYPERLINK("{safe_url}", "{safe_label}")'
+
+
+def _column_cell(values, i) -> str:
+    return str(values[i][0]) if i < len(values) and values[i] else ""
+
+
+def update_cells_by_key(
+    spreadsheet_id: str,
+    sheet: str,
+    key_column: str,
+    target_column: str,
+    updates: list,
+    expected_cols: list,
+) -> list:
+    """Rewrite ``target_column`` cells located by ``key_column`` in one request.
+
+    ``updates`` holds ``(key_value, expected_current, new_value)`` tuples; a
+    row is only patched while its target cell still equals
+    ``expected_current`` (compared as formulas), so newer data is never
+    overwritten. Only the two involved columns are downloaded. Returns one
+    boolean per update telling whether a matching row was patched.
+    """
+    from gspread.utils import rowcol_to_a1
+
+    sh = _get_spreadsheet(spreadsheet_id)
+    ws = _ensure_worksheet(sh, sheet, expected_cols)
+    header = ws.row_values(1)
+    if key_column not in header or target_column not in header:
+        return [False] * len(updates)
+
+    key_idx = header.index(key_column) + 1
+    target_idx = header.index(target_column) + 1
+    key_letter = rowcol_to_a1(1, key_idx).rstrip("0123456789")
+    target_letter = rowcol_to_a1(1, target_idx).rstrip("0123456789")
+    key_values, target_values = ws.batch_get(
+        [f"{key_letter}2:{key_letter}", f"{target_letter}2:{target_letter}"],
+        value_render_option="FORMULA",
+    )
+
+    rows_by_key = {}
+    for i in range(len(key_values)):
+        rows_by_key.setdefault(_normalize_doc(_column_cell(key_values, i)), []).append(i)
+
+    data = []
+    applied = []
+    for key_value, expected_current, new_value in updates:
+        patched = False
+        for i in rows_by_key.get(_normalize_doc(key_value), []):
+            if _column_cell(target_values, i) == str(expected_current):
+                data.append({"range": rowcol_to_a1(i + 2, target_idx), "values": [[new_value]]})
+                patched = True
+        applied.append(patched)
+
+    if data:
+        ws.batch_update(data, value_input_option="USER_ENTERED")
+    return applied
+
+
+def write_column_by_key(
+    spreadsheet_id: str,
+    sheet: str,
+    key_column: str,
+    target_column: str,
+    values: dict,
+    expected_cols: list,
+) -> int:
+    """Set ``target_column`` for every row whose key is in ``values`` in one request.
+
+    ``values`` maps normalized keys (see ``_normalize_doc``) to the new cell
+    value. The target column is rewritten as a single range covering the rows
+    read, so rows whose key is not in ``values`` keep their current content and
+    rows appended meanwhile are not touched. Returns the number of rows changed.
+    """
+    from gspread.utils import rowcol_to_a1
+
+    sh = _get_spreadsheet(spreadsheet_id)
+    ws = _ensure_worksheet(sh, sheet, expected_cols)
+    header = ws.row_values(1)
+    if key_column not in header or target_column not in header:
+        return 0
+
+    target_idx = header.index(target_column) + 1
+    key_letter = rowcol_to_a1(1, header.index(key_column) + 1).rstrip("0123456789")
+    target_letter = rowcol_to_a1(1, target_idx).rstrip("0123456789")
+    key_values, target_values = ws.batch_get(
+        [f"{key_letter}2:{key_letter}", f"{target_letter}2:{target_letter}"],
+        value_render_option="FORMULA",
+    )
+
+    column = []
+    changed = 0
+    for i in range(len(key_values)):
+        current = _column_cell(target_values, i)
+        new_value = str(values.get(_normalize_doc(_column_cell(key_values, i)), current))
+        changed += new_value != current
+        column.append([new_value])
+
+    if changed:
+        ws.batch_update(
+            [{"range": f"{rowcol_to_a1(2, target_idx)}:{rowcol_to_a1(len(column) + 1, target_idx)}", "values": column}],
+            value_input_option="USER_ENTERED",
+        )
+    return changed
+
+
+def get_sheet_as_dataframe(spreadsheet_id: str, sheet: str, expected_cols: list) -> "pd.DataFrame":
+    import pandas as pd
+
     sh = _get_spreadsheet(spreadsheet_id)
     ws = _ensure_worksheet(sh, sheet, expected_cols)
     records = ws.get_all_records()
@@ -334,6 +750,8 @@ def _docs_from_text(txt: str):
     return set(p.strip().replace(" ","") for p in parts if p.strip())
 
 def update_unificado(spreadsheet_id: str) -> int:
+    import pandas as pd
+
     sh = _get_spreadsheet(spreadsheet_id)
     p = get_sheet_as_dataframe(spreadsheet_id, "PARTICIPANTES", PARTICIPANTES_COLS)
     a = get_sheet_as_dataframe(spreadsheet_id, "ACOMPANANTES", ACOMPANANTES_COLS)
@@ -0,0 +1,50 @@
+"""Agregados de inscripción para el panel de administración.
+
+Todo se calcula sobre el espejo local en Parquet (``utils_mirror``), nunca con
+lecturas en vivo de la hoja, y solo con las columnas que el panel necesita.
+"""
+from utils_fechas import edades
+from utils_mirror import local_mirror
+from utils_participantes import TALLAS_CAMISA
+
+ANALYTICS_COLUMNS = ["timestamp", "region", "talla_camisa", "obra_institucion", "es_mayor_edad", "fecha_nacimiento"]
+SIN_DATO = "Sin dato"
+
+
+def _conteo(serie, orden=None):
+    """Vectorized count per value, blanks folded into ``SIN_DATO``."""
+    serie = serie.fillna("").astype(str).str.strip().replace("", SIN_DATO)
+    conteo = serie.value_counts()
+    if orden is not None:
+        extra = [valor for valor in conteo.index if valor not in orden]
+        conteo = conteo.reindex([*orden, *extra], fill_value=0)
+    return conteo.rename("inscritos")
+
+
+def resumen_inscripciones(df) -> dict:
+    """Counts by region, shirt size, institution, majority, age and sign-ups per hour.
+
+    ``df`` is a DataFrame with ``ANALYTICS_COLUMNS`` as read from the mirror
+    (``timestamp`` as datetimes, ``es_mayor_edad`` as nullable booleans).
+    """
+    mayor = df["es_mayor_edad"].map({True: "Mayor de edad", False: "Menor de edad"})
+    horas = df["timestamp"].dropna().dt.floor("h")
+    por_hora = horas.value_counts().sort_index()
+    if len(por_hora):
+        # Horas sin inscripciones como cero para que la serie sea continua.
+        por_hora = por_hora.asfreq("h", fill_value=0)
+    return {
+        "total": len(df),
+        "region": _conteo(df["region"]),
+        "talla_camisa": _conteo(df["talla_camisa"], TALLAS_CAMISA),
+        "obra_institucion": _conteo(df["obra_institucion"]),
+        "es_mayor_edad": _conteo(mayor),
+        "edad": edades(df["fecha_nacimiento"]).value_counts().sort_index().rename("inscritos"),
+        "por_hora": por_hora.rename("inscritos"),
+    }
+
+
+def resumen_desde_espejo(sheet: str = "PARTICIPANTES"):
+    """``resumen_inscripciones`` of the mirrored tab, or ``None`` before its first sync."""
+    df = local_mirror.dataframe(sheet, ANALYTICS_COLUMNS)
+    return None if df is None else resumen_inscripciones(df)
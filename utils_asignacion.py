@@ -0,0 +1,191 @@
+"""Asignación óptima de experiencias según el ranking de cada participante.
+
+Uso desde la raíz del repo (usa las credenciales de ``.streamlit/secrets.toml``):
+
+    python utils_asignacion.py --cupos 150                  # mismo cupo para las siete
+    python utils_asignacion.py --cupos 200,150,150,120,120,100,100 --salida asignacion.csv
+    python utils_asignacion.py --cupos 150 --escribir       # guarda experiencia_asignada en la hoja
+"""
+import argparse
+import csv
+
+from utils import (
+    EXPERIENCIAS_PARTICIPANTE_COLUMNS,
+    EXPERIENCIAS_PARTICIPANTE_LABELS,
+    PARTICIPANTES_COLS,
+    _normalize_doc,
+    write_column_by_key,
+)
+from utils_export import LectorHoja
+from utils_participantes import NIVELES_EXPERTICIE
+
+ASIGNACION_COLUMNS = ["documento_participante", "nivel_experticie", *EXPERIENCIAS_PARTICIPANTE_COLUMNS]
+SIN_ASIGNAR = ""
+# Rango que se usa cuando el participante no ordenó una experiencia.
+PEOR_RANGO = len(EXPERIENCIAS_PARTICIPANTE_COLUMNS) + 1
+
+
+def _numpy_scipy():
+    try:
+        import numpy as np
+        from scipy.optimize import linprog
+        from scipy.sparse import coo_matrix
+    except ImportError as exc:  # scipy es opcional
+        raise ValueError("Para asignar experiencias instala scipy (pip install scipy).") from exc
+    return np, linprog, coo_matrix
+
+
+def matriz_costos(rangos, niveles):
+    """Cost per (participant, experience): the rank, tie-broken by expertise.
+
+    ``rangos`` is an ``(n, 7)`` integer array (0 or out of range = not
+    ranked) and ``niveles`` the index of each ``nivel_experticie`` in
+    ``NIVELES_EXPERTICIE``. Costs are ``rank * (K + nivel)`` with ``K`` larger
+    than any possible sum of the tie-break terms, so the total rank is
+    minimized first and, among equally good assignments, more experienced
+    participants get their better-ranked experiences.
+    """
+    np, _, _ = _numpy_scipy()
+    rangos = np.asarray(rangos, dtype=np.int64)
+    rangos = np.where((rangos >= 1) & (rangos < PEOR_RANGO), rangos, PEOR_RANGO)
+    niveles = np.clip(np.asarray(niveles, dtype=np.int64), 0, len(NIVELES_EXPERTICIE) - 1)
+    k = (len(NIVELES_EXPERTICIE) - 1) * PEOR_RANGO * max(len(rangos), 1) + 1
+    return rangos * (k + niveles[:, None])
+
+
+def asignar(rangos, niveles, cupos) -> list:
+    """Experience index per participant (``-1`` when the capacity ran out).
+
+    Participants with the same cost row are interchangeable, so the solver
+    works on at most one row per distinct (ranking, level) type instead of
+    one per person: a transportation problem with types as supplies and the
+    experience capacities as demands, plus an "unassigned" column priced
+    above any experience. Its constraint matrix is totally unimodular, so the
+    simplex vertex HiGHS returns is integral.
+    """
+    np, linprog, coo_matrix = _numpy_scipy()
+    if len(rangos) == 0:
+        return []
+    costos = matriz_costos(rangos, niveles)
+    n, m = costos.shape
+    cupos = np.asarray(cupos, dtype=np.int64)
+    if cupos.shape != (m,):
+        raise ValueError(f"Se esperaban {m} cupos, uno por experiencia.")
+
+    tipos, inverso, cantidades = np.unique(costos, axis=0, return_inverse=True, return_counts=True)
+    inverso = inverso.reshape(-1)
+    t = len(tipos)
+    sin_cupo = np.full((t, 1), costos.max() + 1)
+    c = np.hstack([tipos, sin_cupo]).ravel()
+    width = m + 1
+
+    # Cada tipo reparte exactamente a sus integrantes: sum_e x[t, e] = cantidad[t].
+    filas = np.repeat(np.arange(t), width)
+    columnas = np.arange(t * width)
+    a_eq = coo_matrix((np.ones(t * width), (filas, columnas)), shape=(t, t * width))
+    # Cada experiencia recibe a lo sumo su cupo: sum_t x[t, e] <= cupo[e].
+    tipo_idx, exp_idx = np.meshgrid(np.arange(t), np.arange(m), indexing="ij")
+    a_ub = coo_matrix(
+        (np.ones(t * m), (exp_idx.ravel(), (tipo_idx * width + exp_idx).ravel())),
+        shape=(m, t * width),
+    )
+    result = linprog(
+        c,
+        A_ub=a_ub.tocsr(),
+        b_ub=cupos,
+        A_eq=a_eq.tocsr(),
+        b_eq=cantidades,
+        bounds=(0, None),
+        method="highs-ds",
+    )
+    if result.status != 0:
+        raise RuntimeError(f"No se encontró una asignación: {result.message}")
+    x = np.rint(result.x).astype(np.int64).reshape(t, width)
+
+    # Reparte los cupos de cada tipo entre sus integrantes en el orden de la hoja.
+    asignacion = np.full(n, -1, dtype=np.int64)
+    orden = np.argsort(inverso, kind="stable")
+    inicios = np.concatenate([[0], np.cumsum(cantidades)[:-1]])
+    for tipo in range(t):
+        miembros = orden[inicios[tipo]:inicios[tipo] + cantidades[tipo]]
+        destinos = np.repeat(np.arange(width), x[tipo])
+        destinos[destinos == m] = -1
+        asignacion[miembros] = destinos[:len(miembros)]
+    return asignacion.tolist()
+
+
+def asignar_participantes(filas, cupos) -> list:
+    """``(documento, etiqueta de experiencia o "")`` for rows read with ``ASIGNACION_COLUMNS``."""
+    filas = [fila for fila in filas if str(fila[0] or "").strip()]
+    niveles = [
+        NIVELES_EXPERTICIE.index(fila[1]) if fila[1] in NIVELES_EXPERTICIE else 0
+        for fila in filas
+    ]
+    rangos = [[rango or 0 for rango in fila[2:]] for fila in filas]
+    asignacion = asignar(rangos, niveles, cupos)
+    return [
+        (str(fila[0]), EXPERIENCIAS_PARTICIPANTE_LABELS[idx] if idx >= 0 else SIN_ASIGNAR)
+        for fila, idx in zip(filas, asignacion)
+    ]
+
+
+def leer_participantes(spreadsheet_id: str, sheet: str = "PARTICIPANTES") -> list:
+    """Only the columns the assignment needs, typed (ranks as ints)."""
+    lector = LectorHoja(spreadsheet_id, sheet, ASIGNACION_COLUMNS)
+    return [fila for pagina in lector.paginas() for fila in pagina]
+
+
+def guardar_asignacion(spreadsheet_id: str, resultado: list, sheet: str = "PARTICIPANTES") -> int:
+    """Write ``experiencia_asignada`` for every participant with one batched update."""
+    valores = {_normalize_doc(documento): etiqueta for documento, etiqueta in resultado}
+    return write_column_by_key(
+        spreadsheet_id,
+        sheet,
+        "documento_participante",
+        "experiencia_asignada",
+        valores,
+        PARTICIPANTES_COLS,
+    )
+
+
+def _parse_cupos(text: str) -> list:
+    valores = [int(v) for v in text.split(",") if v.strip()]
+    if len(valores) == 1:
+        valores *= len(EXPERIENCIAS_PARTICIPANTE_COLUMNS)
+    return valores
+
+
+def main():
+    import streamlit as st
+
+    parser = argparse.ArgumentParser(description="Asigna experiencias minimizando el ranking total.")
+    parser.add_argument("--spreadsheet", default="", help="ID de la hoja (por defecto SPREADSHEET_ID de secrets)")
+    parser.add_argument("--hoja", default="", help="Pestaña (por defecto SHEET_NAME o PARTICIPANTES)")
+    parser.add_argument(
+        "--cupos",
+        required=True,
+        help="Cupo por experiencia en el orden del formulario, separados por coma (o uno solo para todas)",
+    )
+    parser.add_argument("--salida", default="", help="CSV con documento y experiencia asignada")
+    parser.add_argument("--escribir", action="store_true", help="Guarda experiencia_asignada en la hoja")
+    args = parser.parse_args()
+
+    spreadsheet_id = args.spreadsheet or str(st.secrets.get("SPREADSHEET_ID", "")).strip()
+    sheet = args.hoja or (str(st.secrets.get("SHEET_NAME") or "").strip() or "PARTICIPANTES")
+    resultado = asignar_participantes(leer_participantes(spreadsheet_id, sheet), _parse_cupos(args.cupos))
+
+    for etiqueta in EXPERIENCIAS_PARTICIPANTE_LABELS:
+        print(f"  {etiqueta}: {sum(1 for _, e in resultado if e == etiqueta)}")
+    print(f"  Sin cupo: {sum(1 for _, e in resultado if e == SIN_ASIGNAR)}")
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8-sig", newline="") as fh:
+            writer = csv.writer(fh)
+            writer.writerow(["documento_participante", "experiencia_asignada"])
+            writer.writerows(resultado)
+        print(f"Asignación en {args.salida}")
+    if args.escribir:
+        print(f"Filas actualizadas en la hoja: {guardar_asignacion(spreadsheet_id, resultado, sheet)}")
+
+
+if __name__ == "__main__":
+    main()
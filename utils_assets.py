@@ -0,0 +1,250 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+
+BANNER_PATH = Path("assets/ClaveriadaBanner-1920x650.png")
+LOGO_PATH = Path("assets/logo.png")
+# Served by Streamlit at app/static/generated/ when enableStaticServing is on.
+STATIC_DIR = Path("static")
+GENERATED_DIR = STATIC_DIR / "generated"
+STATIC_URL_PREFIX = "app/static/generated"
+# Formato de autorización en blanco pre-generado en tiempo de build.
+AUTORIZACION_DOCX = GENERATED_DIR / "formato_autorizacion_rji.docx"
+
+ASSET_WIDTHS = {
+    BANNER_PATH: (480, 960, 1440, 1920),
+    LOGO_PATH: (160, 320),
+}
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+
+_variants_lock = threading.Lock()
+_variants_cache = {}
+_static_lock = threading.Lock()
+_static_thread = None
+
+logger = logging.getLogger(__name__)
+
+
+def _pil():
+    """Import Pillow on first use; it is optional and heavy to import."""
+    try:
+        from PIL import Image, features
+    except ImportError:  # Pillow es opcional: sin él se sirve la imagen original.
+        return None, None
+    return Image, features
+
+
+@lru_cache(maxsize=None)
+def _can_encode(fmt: str) -> bool:
+    """Whether this Pillow build can write ``fmt`` (AVIF may come from a plugin or not at all)."""
+    Image, _ = _pil()
+    if Image is None:
+        return False
+    try:
+        Image.new("RGB", (1, 1)).save(io.BytesIO(), format=fmt.upper())
+    except Exception:
+        return False
+    return True
+
+
+def _formats() -> tuple:
+    return tuple(fmt for fmt in ("avif", "webp") if _can_encode(fmt)) + ("png",)
+
+
+def _encode(img, fmt: str) -> bytes:
+    out = io.BytesIO()
+    if fmt == "avif":
+        img.save(out, format="AVIF", quality=AVIF_QUALITY)
+    elif fmt == "webp":
+        img.save(out, format="WEBP", quality=WEBP_QUALITY, method=6)
+    else:
+        img.save(out, format="PNG", optimize=True)
+    return out.getvalue()
+
+
+def _render_variants(src: Path) -> list:
+    Image, _ = _pil()
+    with Image.open(src) as original:
+        original.load()
+        img = original.convert("RGBA") if original.mode in ("P", "LA") else original.copy()
+    variants = []
+    for width in ASSET_WIDTHS.get(src, (img.width,)):
+        width = min(width, img.width)
+        height = round(img.height * width / img.width)
+        resized = img if width == img.width else img.resize((width, height), Image.LANCZOS)
+        for fmt in _formats():
+            data = _encode(resized, fmt)
+            digest = hashlib.sha256(data).hexdigest()[:10]
+            variants.append(
+                {
+                    "format": fmt,
+                    "width": width,
+                    "height": height,
+                    "name": f"{src.stem}-{width}.{digest}.{fmt}",
+                    "data": data,
+                }
+            )
+    return variants
+
+
+def asset_variants(src=BANNER_PATH) -> list:
+    """Encoded responsive variants of ``src``, built once per process.
+
+    Each item has ``format``, ``width``, ``height``, ``name`` (content-hashed,
+    so it can be cached forever) and the encoded ``data``. Returns an empty
+    list when Pillow is not installed or the asset is missing.
+    """
+    src = Path(src)
+    with _variants_lock:
+        if src in _variants_cache:
+            return _variants_cache[src]
+        variants = []
+        if _pil()[0] is not None and src.exists():
+            variants = _render_variants(src)
+        _variants_cache[src] = variants
+        return variants
+
+
+def write_static_variants(out_dir: Path = GENERATED_DIR) -> dict:
+    """Write every asset variant to ``out_dir`` plus a ``manifest.json``."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {}
+    for src in ASSET_WIDTHS:
+        entries = []
+        for variant in asset_variants(src):
+            target = out_dir / variant["name"]
+            if not target.exists():
+                target.write_bytes(variant["data"])
+            entries.append({k: variant[k] for k in ("format", "width", "height", "name")})
+        manifest[src.name] = entries
+    # Se reemplaza de una vez: la app puede estar leyéndolo mientras tanto.
+    tmp = out_dir / f".manifest-{os.getpid()}.json"
+    tmp.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    os.replace(tmp, out_dir / "manifest.json")
+    return manifest
+
+
+def _write_static_variants_safely(out_dir: Path) -> None:
+    try:
+        write_static_variants(out_dir)
+    except Exception:
+        logger.exception("No se pudieron generar las variantes de imagen")
+
+
+def start_static_variants(out_dir: Path = GENERATED_DIR) -> None:
+    """Write the variants from a daemon thread, once per process (idempotent).
+
+    Requests never wait for the encoding; until the manifest exists
+    ``picture_html`` and ``best_variant_bytes`` report nothing and the app
+    shows the original image. ``python utils_assets.py`` does the same work
+    at build time.
+    """
+    global _static_thread
+    with _static_lock:
+        if _static_thread is not None:
+            return
+        _static_thread = threading.Thread(
+            target=_write_static_variants_safely,
+            args=(Path(out_dir),),
+            name="static-variants",
+            daemon=True,
+        )
+        _static_thread.start()
+
+
+def _manifest_entries(src) -> list:
+    """Variants of ``src`` listed in the written manifest whose files exist; never encodes."""
+    try:
+        manifest = json.loads((GENERATED_DIR / "manifest.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return []
+    entries = manifest.get(Path(src).name, [])
+    if not entries or not all((GENERATED_DIR / entry["name"]).exists() for entry in entries):
+        return []
+    return entries
+
+
+def picture_html(src=BANNER_PATH, alt: str = "", sizes: str = "(max-width: 980px) 100vw, 980px") -> str:
+    """``<picture>`` markup pointing at the static variants of ``src``.
+
+    The browser picks the best format it supports and the smallest width that
+    fits the viewport. Returns ``""`` when the variants are not written yet.
+    """
+    variants = _manifest_entries(src)
+    if not variants:
+        return ""
+
+    by_format = {}
+    for variant in variants:
+        by_format.setdefault(variant["format"], []).append(variant)
+
+    sources = []
+    for fmt in ("avif", "webp"):
+        if fmt in by_format:
+            srcset = ", ".join(
+                f"{STATIC_URL_PREFIX}/{v['name']} {v['width']}w" for v in by_format[fmt]
+            )
+            sources.append(f'<source type="image/{fmt}" srcset="{srcset}" sizes="{sizes}">')
+
+    fallback = by_format["png"]
+    default = next((v for v in fallback if v["width"] >= 960), fallback[-1])
+    srcset = ", ".join(f"{STATIC_URL_PREFIX}/{v['name']} {v['width']}w" for v in fallback)
+    img = (
+        f'<img src="{STATIC_URL_PREFIX}/{default["name"]}" srcset="{srcset}" sizes="{sizes}" '
+        f'width="{default["width"]}" height="{default["height"]}" alt="{alt}" decoding="async">'
+    )
+    return "<picture>" + "".join(sources) + img + "</picture>"
+
+
+def write_autorizacion_en_blanco(target: Path = AUTORIZACION_DOCX) -> Path:
+    """Write the blank authorization form to ``target`` (imports python-docx)."""
+    from doc import autorizacion_en_blanco_bytes
+
+    target = Path(target)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_bytes(autorizacion_en_blanco_bytes(LOGO_PATH))
+    return target
+
+
+def autorizacion_url() -> str:
+    """Static URL of the build-time blank form, or ``""`` when it was not generated."""
+    if not AUTORIZACION_DOCX.exists():
+        return ""
+    return f"{STATIC_URL_PREFIX}/{AUTORIZACION_DOCX.name}"
+
+
+def autorizacion_en_blanco() -> bytes:
+    """Blank authorization form bytes: the build-time file if present, else rendered once."""
+    if AUTORIZACION_DOCX.exists():
+        return AUTORIZACION_DOCX.read_bytes()
+    from doc import autorizacion_en_blanco_bytes
+
+    return autorizacion_en_blanco_bytes(LOGO_PATH)
+
+
+def best_variant_bytes(src=BANNER_PATH, max_width: int = 980) -> bytes:
+    """Smallest written variant at least ``max_width`` wide, for ``st.image``; ``b""`` if not ready."""
+    variants = _manifest_entries(src)
+    if not variants:
+        return b""
+    by_format = {}
+    for variant in variants:
+        by_format.setdefault(variant["format"], []).append(variant)
+    candidates = by_format.get("webp") or by_format["png"]
+    chosen = next((v for v in candidates if v["width"] >= max_width), candidates[-1])
+    return (GENERATED_DIR / chosen["name"]).read_bytes()
+
+
+if __name__ == "__main__":
+    # Pre-genera las variantes en tiempo de build: python utils_assets.py
+    for asset, entries in write_static_variants().items():
+        for entry in entries:
+            print(f"{asset}: {entry['name']}")
+    print(f"autorización: {write_autorizacion_en_blanco().name}")
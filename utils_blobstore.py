@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+UPLOADS_DIR = Path("uploads")
+BLOB_CHUNK_SIZE = 1024 * 1024
+# Local copies of files already in Drive are kept this long before GC.
+BLOB_RETENTION_SECONDS = 30 * 24 * 60 * 60
+
+
+def _remove_quietly(path) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class LocalBlobStore:
+    """Content-addressed store for uploaded files under ``uploads/``.
+
+    Blobs live at ``<root>/<h[:2]>/<h[2:4]>/<sha256><ext>`` next to a
+    ``<sha256>.json`` sidecar with the original name, size and Drive state.
+    Identical content is stored once, writes are streamed and atomic (temp
+    file in the same directory + ``os.replace``), and the two-level sharding
+    keeps every directory small over a whole season of submissions.
+    """
+
+    def __init__(self, root: Path = UPLOADS_DIR, retention: float = BLOB_RETENTION_SECONDS):
+        self.root = Path(root)
+        self.retention = retention
+        self._lock = threading.Lock()
+
+    def _shard(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4]
+
+    def _sidecar(self, digest: str) -> Path:
+        return self._shard(digest) / f"{digest}.json"
+
+    def _write_json(self, path: Path, data: dict) -> None:
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(data, fh, ensure_ascii=False)
+            os.replace(tmp, path)
+        except BaseException:
+            _remove_quietly(tmp)
+            raise
+
+    def metadata(self, digest: str) -> dict:
+        try:
+            with open(self._sidecar(digest), encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def put_stream(self, stream, filename: str) -> Path:
+        """Store ``stream`` and return the blob path (existing one if deduplicated)."""
+        ext = Path(filename).suffix.lower()
+        tmp_root = self.root / ".tmp"
+        tmp_root.mkdir(parents=True, exist_ok=True)
+        hasher = hashlib.sha256()
+        size = 0
+        fd, tmp = tempfile.mkstemp(dir=tmp_root, prefix="blob-")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                while True:
+                    chunk = stream.read(BLOB_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    hasher.update(chunk)
+                    fh.write(chunk)
+                    size += len(chunk)
+                fh.flush()
+                os.fsync(fh.fileno())
+
+            digest = hasher.hexdigest()
+            shard = self._shard(digest)
+            shard.mkdir(parents=True, exist_ok=True)
+            final = shard / f"{digest}{ext}"
+            with self._lock:
+                meta = self.metadata(digest)
+                if meta.get("path") and Path(meta["path"]).exists():
+                    final = Path(meta["path"])
+                if final.exists():
+                    os.remove(tmp)
+                else:
+                    os.replace(tmp, final)
+                    meta["path"] = final.as_posix()
+                if not meta.get("sha256"):
+                    meta = {
+                        "sha256": digest,
+                        "size": size,
+                        "filename": filename,
+                        "path": final.as_posix(),
+                        "created_at": time.time(),
+                        "drive_link": "",
+                        "drive_confirmed_at": None,
+                    }
+                meta["last_stored_at"] = time.time()
+                self._write_json(self._sidecar(digest), meta)
+        except BaseException:
+            _remove_quietly(tmp)
+            raise
+        return final
+
+    def mark_in_drive(self, path, link: str) -> None:
+        """Record that the blob at ``path`` is safely stored in Drive."""
+        digest = Path(path).name.split(".", 1)[0]
+        with self._lock:
+            meta = self.metadata(digest)
+            if not meta:
+                return
+            meta["drive_link"] = link
+            meta["drive_confirmed_at"] = time.time()
+            self._write_json(self._sidecar(digest), meta)
+
+    def gc(self) -> dict:
+        """Delete blobs confirmed in Drive and idle past the retention window.
+
+        Also removes temp files orphaned by interrupted writes. Returns the
+        number of blobs and bytes reclaimed.
+        """
+        now = time.time()
+        removed = 0
+        freed = 0
+        for sidecar in self.root.glob("*/*/*.json"):
+            if sidecar.name.startswith("."):
+                continue
+            try:
+                with open(sidecar, encoding="utf-8") as fh:
+                    meta = json.load(fh)
+            except (OSError, ValueError):
+                continue
+            confirmed = meta.get("drive_confirmed_at")
+            last_stored = meta.get("last_stored_at") or meta.get("created_at") or now
+            if not confirmed or now - max(confirmed, last_stored) < self.retention:
+                continue
+            blob = Path(meta.get("path", ""))
+            with self._lock:
+                if blob.name and blob.exists():
+                    freed += blob.stat().st_size
+                    _remove_quietly(blob)
+                _remove_quietly(sidecar)
+            removed += 1
+
+        for tmp in (self.root / ".tmp").glob("blob-*"):
+            try:
+                if now - tmp.stat().st_mtime > 24 * 60 * 60:
+                    tmp.unlink()
+            except OSError:
+                pass
+
+        return {"blobs": removed, "bytes": freed}
+
+
+local_blob_store = LocalBlobStore()
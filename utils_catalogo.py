@@ -0,0 +1,92 @@
+import bisect
+import json
+import threading
+import unicodedata
+from pathlib import Path
+
+MUNICIPIOS_PATH = Path(__file__).resolve().parent / "data" / "colombia_municipios.json"
+BUSQUEDA_LIMITE = 20
+
+
+def normalizar_texto(value: str) -> str:
+    """Fold case and accents so 'Itagüí', 'itagui' and 'ITAGUI' compare equal."""
+    decomposed = unicodedata.normalize("NFKD", str(value or ""))
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(stripped.casefold().split())
+
+
+class CatalogoCiudades:
+    """Read-only index of Colombian departments and municipalities.
+
+    Built once from the data file: an ordered region → cities map (the slice
+    a select box needs) and a sorted list of ``(folded name, city, region)``
+    tuples so prefix searches are two ``bisect`` calls instead of a scan.
+    """
+
+    def __init__(self, departamentos: dict):
+        self._por_region = {
+            region: tuple(dict.fromkeys(ciudades))
+            for region, ciudades in departamentos.items()
+        }
+        self.regiones = tuple(self._por_region)
+        self._indice = sorted(
+            (normalizar_texto(ciudad), ciudad, region)
+            for region, ciudades in self._por_region.items()
+            for ciudad in ciudades
+        )
+        self._claves = [item[0] for item in self._indice]
+
+    @classmethod
+    def desde_archivo(cls, path=MUNICIPIOS_PATH) -> "CatalogoCiudades":
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        return cls(data["departamentos"])
+
+    def __len__(self) -> int:
+        return len(self._indice)
+
+    def ciudades(self, region: str) -> tuple:
+        """Cities of ``region`` in data-file order; empty for unknown regions."""
+        return self._por_region.get(region, ())
+
+    def region(self, nombre: str) -> str:
+        """Canonical region name for free text (``"antioquia"`` → ``"Antioquia"``)."""
+        clave = normalizar_texto(nombre)
+        return next((r for r in self.regiones if normalizar_texto(r) == clave), "")
+
+    def pertenece(self, region: str, ciudad: str) -> bool:
+        return ciudad in self._por_region.get(region, ())
+
+    def buscar(self, prefijo: str, limite: int = BUSQUEDA_LIMITE) -> list:
+        """``(ciudad, region)`` pairs whose folded name starts with ``prefijo``."""
+        clave = normalizar_texto(prefijo)
+        if not clave:
+            return []
+        inicio = bisect.bisect_left(self._claves, clave)
+        fin = bisect.bisect_left(self._claves, clave + "\uffff", lo=inicio)
+        return [(ciudad, region) for _, ciudad, region in self._indice[inicio:min(fin, inicio + limite)]]
+
+    def resolver(self, ciudad: str, region: str = "") -> tuple:
+        """Canonical ``(ciudad, region)`` for free text, or ``("", "")`` if ambiguous/unknown."""
+        clave = normalizar_texto(ciudad)
+        inicio = bisect.bisect_left(self._claves, clave)
+        fin = bisect.bisect_right(self._claves, clave, lo=inicio)
+        candidatos = [(c, r) for _, c, r in self._indice[inicio:fin]]
+        if region:
+            region_clave = normalizar_texto(region)
+            candidatos = [(c, r) for c, r in candidatos if normalizar_texto(r) == region_clave]
+        return candidatos[0] if len(candidatos) == 1 else ("", "")
+
+
+_catalogo = None
+_catalogo_lock = threading.Lock()
+
+
+def catalogo_ciudades() -> CatalogoCiudades:
+    """Process-wide catalog, loaded from ``MUNICIPIOS_PATH`` on first use."""
+    global _catalogo
+    if _catalogo is None:
+        with _catalogo_lock:
+            if _catalogo is None:
+                _catalogo = CatalogoCiudades.desde_archivo()
+    return _catalogo
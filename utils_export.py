@@ -0,0 +1,346 @@
+"""Exportación por páginas de las pestañas de la hoja a Parquet, CSV o XLSX.
+
+Uso desde la raíz del repo (usa las credenciales de ``.streamlit/secrets.toml``):
+
+    python utils_export.py participantes.parquet
+    python utils_export.py tallas.csv --columnas documento_participante,region,talla_camisa
+    python utils_export.py acompanantes.xlsx --hoja ACOMPANANTES
+"""
+import argparse
+import csv
+import io
+import os
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+from utils import (
+    ACOMPANANTES_COLS,
+    EXPERIENCIAS_PARTICIPANTE_COLUMNS,
+    PARTICIPANTES_COLS,
+    UNIFICADO_COLS,
+    _get_spreadsheet,
+)
+from utils_fechas import parse_fecha
+from utils_participantes import BOOL_COLUMNS, parse_si_no
+
+SHEET_COLUMNS = {
+    "PARTICIPANTES": PARTICIPANTES_COLS,
+    "ACOMPANANTES": ACOMPANANTES_COLS,
+    "UNIFICADO": UNIFICADO_COLS,
+}
+# Filas por lectura: cada página es una sola petición batch_get.
+EXPORT_PAGE_ROWS = 2000
+# Columna que siempre tiene valor (A): marca el final de los datos en cada página.
+KEY_COLUMN_INDEX = 0
+EXPORT_FORMATS = ("parquet", "csv", "xlsx")
+# Archivos preparados en el panel: tienen datos personales, así que no quedan
+# en /tmp y se borran solos aunque nadie los descargue.
+EXPORT_DIR = Path("state") / "exports"
+EXPORT_TTL_SECONDS = 2 * 60 * 60
+
+INT_COLUMNS = frozenset({*EXPERIENCIAS_PARTICIPANTE_COLUMNS, "edad_aprox", "tamano_delegacion"})
+DATE_COLUMNS = frozenset({"fecha_nacimiento"})
+DATETIME_COLUMNS = frozenset({"timestamp"})
+
+
+def _to_int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_bool(value):
+    return parse_si_no(value) if value not in (None, "") else None
+
+
+def _to_date(value):
+    return parse_fecha(value) if value not in (None, "") else None
+
+
+def _to_datetime(value):
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def _to_text(value):
+    return "" if value is None else str(value)
+
+
+def column_type(column: str) -> str:
+    """Logical type used for conversion and for the Parquet schema."""
+    if column in INT_COLUMNS:
+        return "int"
+    if column in BOOL_COLUMNS:
+        return "bool"
+    if column in DATE_COLUMNS:
+        return "date"
+    if column in DATETIME_COLUMNS:
+        return "datetime"
+    return "text"
+
+
+_CONVERTERS = {
+    "int": _to_int,
+    "bool": _to_bool,
+    "date": _to_date,
+    "datetime": _to_datetime,
+    "text": _to_text,
+}
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _runs(indices: list) -> list:
+    """Group sorted 0-based column indices into contiguous ``(first, last)`` runs."""
+    runs = []
+    for index in indices:
+        if runs and index == runs[-1][1] + 1:
+            runs[-1][1] = index
+        else:
+            runs.append([index, index])
+    return runs
+
+
+class LectorHoja:
+    """Page through a worksheet reading only the requested columns.
+
+    Each page is one ``batch_get`` with a range per contiguous block of
+    projected columns, so a 5-column report of a 60-column tab downloads a
+    twelfth of the cells. Rows come back typed (ints, bools, dates) when
+    ``typed`` is set.
+
+    The first column of the tab (``timestamp`` / ``documento_participante``,
+    always filled) is read with every page even when it is not projected:
+    Sheets drops trailing empty rows from each range, so only a mandatory
+    column tells where the data ends.
+    """
+
+    def __init__(self, spreadsheet_id: str, sheet: str, columns=None, page_rows: int = EXPORT_PAGE_ROWS, typed: bool = True):
+        self.ws = _get_spreadsheet(spreadsheet_id).worksheet(sheet)
+        self.header = self.ws.row_values(1)
+        columns = list(columns or self.header)
+        missing = [column for column in columns if column not in self.header]
+        if missing:
+            raise ValueError(f"Columnas que no existen en {sheet}: {', '.join(missing)}")
+        self.columns = columns
+        self.page_rows = page_rows
+        indices = sorted({KEY_COLUMN_INDEX, *(self.header.index(column) for column in columns)})
+        self._runs = _runs(indices)
+        # Posición de cada columna pedida dentro de la fila "cosida" de los rangos.
+        stitched = [index for first, last in self._runs for index in range(first, last + 1)]
+        self._positions = [stitched.index(self.header.index(column)) for column in columns]
+        self._converters = [
+            _CONVERTERS[column_type(column)] if typed else _to_text for column in columns
+        ]
+
+    def _ranges(self, first_row: int, last_row: int) -> list:
+        return [
+            f"{_column_letter(first)}{first_row}:{_column_letter(last)}{last_row}"
+            for first, last in self._runs
+        ]
+
+    def pagina(self, first_row: int, last_row: int) -> list:
+        """Rows ``first_row..last_row`` (1-based sheet rows) as projected lists."""
+        blocks = self.ws.batch_get(self._ranges(first_row, last_row))
+        height = max((len(block) for block in blocks), default=0)
+        rows = []
+        for r in range(height):
+            stitched = []
+            for (first, last), block in zip(self._runs, blocks):
+                width = last - first + 1
+                values = list(block[r]) if r < len(block) else []
+                stitched.extend(values + [""] * (width - len(values)))
+            rows.append([convert(stitched[pos]) for pos, convert in zip(self._positions, self._converters)])
+        return rows
+
+    def paginas(self, start_row: int = 2):
+        """Yield pages until one comes back short (the end of the data)."""
+        # Pedir filas fuera de la cuadrícula de la pestaña es un error de la API.
+        grid_rows = self.ws.row_count
+        first = start_row
+        while first <= grid_rows:
+            last = min(first + self.page_rows - 1, grid_rows)
+            rows = self.pagina(first, last)
+            if rows:
+                yield rows
+            if len(rows) < last - first + 1:
+                return
+            first = last + 1
+
+
+class _CsvWriter:
+    def __init__(self, fh, columns):
+        self._text = io.TextIOWrapper(fh, encoding="utf-8-sig", newline="")
+        self._writer = csv.writer(self._text)
+        self._writer.writerow(columns)
+
+    def write(self, rows):
+        self._writer.writerows(
+            [["" if v is None else v.isoformat() if isinstance(v, (date, datetime)) else v for v in row] for row in rows]
+        )
+
+    def close(self):
+        self._text.flush()
+        self._text.detach()
+
+
+class _XlsxWriter:
+    def __init__(self, fh, columns, title):
+        try:
+            from openpyxl import Workbook
+        except ImportError as exc:  # openpyxl es opcional
+            raise ValueError("Para exportar a .xlsx instala openpyxl (pip install openpyxl).") from exc
+        self._fh = fh
+        # write_only: las filas se vuelcan a disco a medida que se agregan.
+        self._wb = Workbook(write_only=True)
+        self._ws = self._wb.create_sheet(title[:31])
+        self._ws.append(columns)
+
+    def write(self, rows):
+        for row in rows:
+            # Excel no admite zonas horarias: se guarda la hora local de Bogotá.
+            self._ws.append([v.replace(tzinfo=None) if isinstance(v, datetime) else v for v in row])
+
+    def close(self):
+        self._wb.save(self._fh)
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:  # pyarrow es opcional
+        raise ValueError("Para usar Parquet instala pyarrow (pip install pyarrow).") from exc
+    return pa, pq
+
+
+def arrow_schema(columns):
+    """Arrow schema with the logical type of each column (see ``column_type``)."""
+    pa, _ = _pyarrow()
+    types = {
+        "int": pa.int32(),
+        "bool": pa.bool_(),
+        "date": pa.date32(),
+        "datetime": pa.timestamp("s", tz="America/Bogota"),
+        "text": pa.string(),
+    }
+    return pa.schema([(column, types[column_type(column)]) for column in columns])
+
+
+def arrow_table(rows, schema):
+    """Build an Arrow table from typed row lists (as yielded by ``LectorHoja``)."""
+    pa, _ = _pyarrow()
+    arrays = [pa.array([row[i] for row in rows], type=field.type) for i, field in enumerate(schema)]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+class _ParquetWriter:
+    def __init__(self, fh, columns):
+        _, pq = _pyarrow()
+        self._schema = arrow_schema(columns)
+        self._writer = pq.ParquetWriter(fh, self._schema, compression="zstd")
+
+    def write(self, rows):
+        self._writer.write_table(arrow_table(rows, self._schema))
+
+    def close(self):
+        self._writer.close()
+
+
+def _writer(fmt: str, fh, columns, title):
+    if fmt == "csv":
+        return _CsvWriter(fh, columns)
+    if fmt == "xlsx":
+        return _XlsxWriter(fh, columns, title)
+    if fmt == "parquet":
+        return _ParquetWriter(fh, columns)
+    raise ValueError(f"Formato no soportado: {fmt}. Usa {', '.join(EXPORT_FORMATS)}.")
+
+
+def exportar(
+    spreadsheet_id: str,
+    sheet: str,
+    fh,
+    fmt: str,
+    columns=None,
+    page_rows: int = EXPORT_PAGE_ROWS,
+    progress=None,
+) -> int:
+    """Stream ``sheet`` into the binary file ``fh`` page by page; returns the row count.
+
+    Only one page of rows is in memory at a time. CSV keeps every value as
+    text; Parquet and XLSX get typed ranks, booleans and dates.
+    """
+    lector = LectorHoja(spreadsheet_id, sheet, columns, page_rows, typed=fmt != "csv")
+    writer = _writer(fmt, fh, lector.columns, sheet)
+    total = 0
+    try:
+        for rows in lector.paginas():
+            writer.write(rows)
+            total += len(rows)
+            if progress is not None:
+                progress(total)
+    finally:
+        writer.close()
+    return total
+
+
+def purgar_exportaciones(max_age: float = EXPORT_TTL_SECONDS, directory: Path = EXPORT_DIR) -> int:
+    """Delete prepared export files older than ``max_age`` seconds; returns how many."""
+    limite = time.time() - max_age
+    borrados = 0
+    try:
+        entradas = list(os.scandir(directory))
+    except OSError:
+        return 0
+    for entrada in entradas:
+        try:
+            if entrada.is_file() and entrada.stat().st_mtime < limite:
+                os.unlink(entrada.path)
+                borrados += 1
+        except OSError:
+            continue
+    return borrados
+
+
+def main():
+    import streamlit as st
+
+    parser = argparse.ArgumentParser(description="Exporta una pestaña de la hoja a Parquet, CSV o XLSX.")
+    parser.add_argument("salida", help="Archivo destino; el formato sale de la extensión")
+    parser.add_argument("--spreadsheet", default="", help="ID de la hoja (por defecto SPREADSHEET_ID de secrets)")
+    parser.add_argument("--hoja", default="PARTICIPANTES")
+    parser.add_argument("--columnas", default="", help="Columnas separadas por coma (por defecto todas)")
+    parser.add_argument("--formato", choices=EXPORT_FORMATS, default="")
+    parser.add_argument("--pagina", type=int, default=EXPORT_PAGE_ROWS, help="Filas por lectura")
+    args = parser.parse_args()
+
+    spreadsheet_id = args.spreadsheet or str(st.secrets.get("SPREADSHEET_ID", "")).strip()
+    fmt = args.formato or Path(args.salida).suffix.lstrip(".").lower()
+    columns = [c.strip() for c in args.columnas.split(",") if c.strip()] or None
+    with open(args.salida, "wb") as fh:
+        total = exportar(
+            spreadsheet_id,
+            args.hoja,
+            fh,
+            fmt,
+            columns,
+            args.pagina,
+            progress=lambda n: print(f"  {n} filas", flush=True),
+        )
+    print(f"Exportadas {total} filas de {args.hoja} a {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Conformación de grupos pequeños mezclando intereses, región, obra y edad.
+
+Uso desde la raíz del repo (usa las credenciales de ``.streamlit/secrets.toml``):
+
+    python utils_grupos.py grupos.csv --tamano 8                    # grupos lo más diversos posible
+    python utils_grupos.py grupos.csv --tamano 6 --modo afinidad    # grupos de intereses afines
+"""
+import argparse
+import csv
+import math
+from datetime import date
+
+from utils_catalogo import normalizar_texto
+from utils_export import LectorHoja
+from utils_fechas import edad
+from utils_participantes import INTERESES_PERSONALES
+
+GRUPOS_COLUMNS = [
+    "documento_participante", "nombre_completo", "region", "obra_institucion",
+    "fecha_nacimiento", "intereses_personales",
+]
+MODOS = ("diversidad", "afinidad")
+# Peso de cada bloque de rasgos en la similitud entre dos participantes.
+PESOS = {"intereses": 1.0, "region": 1.0, "obra_institucion": 2.0, "edad": 1.0}
+# Límites inferiores de las franjas de edad (la última queda abierta).
+FRANJAS_EDAD = (0, 15, 18, 21, 25)
+GRUPOS_LOTE = 256
+GRUPOS_RONDAS = 40
+# Intercambios candidatos que se evalúan por ronda de refinamiento.
+GRUPOS_MUESTRA = 20000
+
+
+def _numpy_scipy():
+    try:
+        import numpy as np
+        from scipy.sparse import csr_matrix
+    except ImportError as exc:  # scipy es opcional
+        raise ValueError("Para formar grupos instala scipy (pip install scipy).") from exc
+    return np, csr_matrix
+
+
+def _franja(anios) -> int:
+    if anios == "":
+        return -1
+    return sum(1 for limite in FRANJAS_EDAD[1:] if anios >= limite)
+
+
+def rasgos(filas, pesos=PESOS, today: date = None):
+    """Sparse ``(n, f)`` feature matrix for rows read with ``GRUPOS_COLUMNS``.
+
+    One-hot blocks for region, institution and age band plus a multi-hot
+    block for interests, each scaled by ``sqrt(peso)`` so the dot product of
+    two rows is the weighted count of traits they share.
+    """
+    np, csr_matrix = _numpy_scipy()
+    intereses = {normalizar_texto(i): k for k, i in enumerate(INTERESES_PERSONALES)}
+    regiones, obras = {}, {}
+    offset_region = len(intereses)
+    filas_idx, columnas, valores = [], [], []
+    codigos = []
+    for fila in filas:
+        _, _, region, obra, nacimiento, texto = fila
+        codigo = [
+            ("intereses", intereses[clave])
+            for clave in (normalizar_texto(v) for v in str(texto or "").split(","))
+            if clave in intereses
+        ]
+        if normalizar_texto(region):
+            codigo.append(("region", regiones.setdefault(normalizar_texto(region), len(regiones))))
+        if normalizar_texto(obra):
+            codigo.append(("obra_institucion", obras.setdefault(normalizar_texto(obra), len(obras))))
+        franja = _franja(edad(nacimiento, today))
+        if franja >= 0:
+            codigo.append(("edad", franja))
+        codigos.append(codigo)
+
+    offsets = {
+        "intereses": 0,
+        "region": offset_region,
+        "obra_institucion": offset_region + len(regiones),
+        "edad": offset_region + len(regiones) + len(obras),
+    }
+    for i, codigo in enumerate(codigos):
+        for bloque, k in codigo:
+            filas_idx.append(i)
+            columnas.append(offsets[bloque] + k)
+            valores.append(math.sqrt(pesos[bloque]))
+    shape = (len(codigos), offsets["edad"] + len(FRANJAS_EDAD))
+    return csr_matrix((np.asarray(valores, dtype=np.float64), (filas_idx, columnas)), shape=shape)
+
+
+def _capacidades(np, n: int, tamano: int):
+    grupos = max(1, math.ceil(n / tamano))
+    base, extra = divmod(n, grupos)
+    return np.array([base + (g < extra) for g in range(grupos)], dtype=np.int64)
+
+
+def _asignacion_voraz(np, X, capacidad, signo, orden, lote):
+    """Place participants one at a time into the best group with room.
+
+    Scores against the current group sums are computed a batch at a time
+    (``X_lote @ S.T``) and kept exact inside the batch by adding the
+    batch's Gram column of each participant as it is placed.
+    """
+    n, g = X.shape[0], len(capacidad)
+    grupo = np.full(n, -1, dtype=np.int64)
+    sumas = np.zeros((g, X.shape[1]))
+    libres = capacidad.copy()
+    for inicio in range(0, n, lote):
+        miembros = orden[inicio:inicio + lote]
+        Xb = X[miembros]
+        puntajes = np.asarray(Xb @ sumas.T)
+        gram = (Xb @ Xb.T).toarray()
+        for pos, persona in enumerate(miembros):
+            # Empates hacia el grupo con más lugar libre para repartir parejo.
+            clave = signo * puntajes[pos] - 1e-9 * libres
+            clave[libres == 0] = np.inf
+            destino = int(np.argmin(clave))
+            grupo[persona] = destino
+            libres[destino] -= 1
+            puntajes[:, destino] += gram[:, pos]
+        np.add.at(sumas, grupo[miembros], Xb.toarray())
+    return grupo
+
+
+def _refinar(np, X, grupo, g, signo, rondas, muestra, rng):
+    """Improve the grouping with batches of pairwise swaps between groups.
+
+    The objective is the within-group similarity ``sum_g ||S_g||^2 / 2``.
+    Swapping ``i`` (group a) with ``j`` (group b) changes it by
+    ``(S_a - S_b)·(x_j - x_i) + ||x_j - x_i||^2``, evaluated for a whole
+    sample of pairs with one sparse product; the best non-overlapping
+    improving swaps of each round are applied together.
+    """
+    n = X.shape[0]
+    normas = np.asarray(X.multiply(X).sum(axis=1)).ravel()
+    for _ in range(rondas):
+        sumas = np.zeros((g, X.shape[1]))
+        np.add.at(sumas, grupo, X.toarray())
+        XS = np.asarray(X @ sumas.T)
+        i = rng.integers(0, n, muestra)
+        j = rng.integers(0, n, muestra)
+        a, b = grupo[i], grupo[j]
+        valid = a != b
+        i, j, a, b = i[valid], j[valid], a[valid], b[valid]
+        cruzado = np.asarray(X[i].multiply(X[j]).sum(axis=1)).ravel()
+        delta = (XS[j, a] - XS[j, b]) - (XS[i, a] - XS[i, b]) + normas[i] + normas[j] - 2 * cruzado
+        mejora = signo * delta
+        candidatos = np.flatnonzero(mejora < -1e-9)
+        if not len(candidatos):
+            break
+        usados = set()
+        for k in candidatos[np.argsort(mejora[candidatos])]:
+            # Un grupo tocado ya cambió su suma: sus demás deltas quedan obsoletos.
+            if a[k] in usados or b[k] in usados:
+                continue
+            usados.update((a[k], b[k]))
+            grupo[i[k]], grupo[j[k]] = b[k], a[k]
+    return grupo
+
+
+def formar_grupos(
+    X,
+    tamano: int,
+    modo: str = "diversidad",
+    rondas: int = GRUPOS_RONDAS,
+    muestra: int = GRUPOS_MUESTRA,
+    lote: int = GRUPOS_LOTE,
+    semilla: int = 0,
+):
+    """Group index per row of ``X``, in groups of ``tamano`` (sizes differ by at most one).
+
+    ``diversidad`` minimizes the traits shared inside each group;
+    ``afinidad`` maximizes them.
+    """
+    np, _ = _numpy_scipy()
+    if modo not in MODOS:
+        raise ValueError(f"Modo no soportado: {modo}. Usa {', '.join(MODOS)}.")
+    if tamano < 2:
+        raise ValueError("El tamaño de los grupos debe ser al menos 2.")
+    n = X.shape[0]
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    signo = 1.0 if modo == "diversidad" else -1.0
+    rng = np.random.default_rng(semilla)
+    capacidad = _capacidades(np, n, tamano)
+    grupo = _asignacion_voraz(np, X, capacidad, signo, rng.permutation(n), lote)
+    return _refinar(np, X, grupo, len(capacidad), signo, rondas, muestra, rng)
+
+
+def leer_participantes(spreadsheet_id: str, sheet: str = "PARTICIPANTES") -> list:
+    lector = LectorHoja(spreadsheet_id, sheet, GRUPOS_COLUMNS)
+    return [fila for pagina in lector.paginas() for fila in pagina if str(fila[0] or "").strip()]
+
+
+def escribir_grupos_csv(fh, filas, grupo) -> None:
+    """One row per participant, sorted by group, into the text file ``fh``."""
+    writer = csv.writer(fh)
+    writer.writerow(["grupo", *GRUPOS_COLUMNS, "edad"])
+    for idx in sorted(range(len(filas)), key=lambda k: (int(grupo[k]), k)):
+        fila = filas[idx]
+        nacimiento = fila[4]
+        writer.writerow([
+            int(grupo[idx]) + 1,
+            *("" if v is None else v.isoformat() if isinstance(v, date) else v for v in fila),
+            edad(nacimiento),
+        ])
+
+
+def main():
+    import streamlit as st
+
+    parser = argparse.ArgumentParser(description="Forma grupos mixtos de participantes y los exporta a CSV.")
+    parser.add_argument("salida", help="CSV destino")
+    parser.add_argument("--spreadsheet", default="", help="ID de la hoja (por defecto SPREADSHEET_ID de secrets)")
+    parser.add_argument("--hoja", default="", help="Pestaña (por defecto SHEET_NAME o PARTICIPANTES)")
+    parser.add_argument("--tamano", type=int, default=8, help="Personas por grupo")
+    parser.add_argument("--modo", choices=MODOS, default="diversidad")
+    parser.add_argument("--rondas", type=int, default=GRUPOS_RONDAS, help="Rondas de intercambios")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args()
+
+    spreadsheet_id = args.spreadsheet or str(st.secrets.get("SPREADSHEET_ID", "")).strip()
+    sheet = args.hoja or (str(st.secrets.get("SHEET_NAME") or "").strip() or "PARTICIPANTES")
+    filas = leer_participantes(spreadsheet_id, sheet)
+    grupo = formar_grupos(rasgos(filas), args.tamano, args.modo, rondas=args.rondas, semilla=args.semilla)
+    with open(args.salida, "w", encoding="utf-8-sig", newline="") as fh:
+        escribir_grupos_csv(fh, filas, grupo)
+    print(f"{len(filas)} participantes en {len(set(grupo.tolist()))} grupos · {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
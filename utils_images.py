@@ -0,0 +1,103 @@
+import io
+import logging
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# A 2000 px long side keeps an ID card legible while staying well under 1 MB.
+MAX_IMAGE_SIDE = 2000
+MAX_IMAGE_PIXELS = 80_000_000
+JPEG_QUALITY = 82
+# Images already this small and without metadata are stored untouched.
+PASSTHROUGH_BYTES = 512 * 1024
+MAX_PDF_BYTES = 10 * 1024 * 1024
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg"}
+
+
+def _read_all(fh) -> bytes:
+    fh.seek(0)
+    return fh.read()
+
+
+def _stats(original: int, final: int, action: str) -> dict:
+    return {"original_bytes": original, "final_bytes": final, "accion": action}
+
+
+def _pil():
+    """Import Pillow on first use; it is optional and heavy to import."""
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:  # Pillow es opcional: sin él los archivos se guardan tal cual.
+        return None, None
+    return Image, ImageOps
+
+
+def preparar_documento(fh, filename: str, size: int):
+    """Normalize an uploaded ID document before it is stored or uploaded.
+
+    Returns ``(data, filename, stats)``. Images are opened lazily so only the
+    header is parsed until we know a resize is needed; JPEGs are then decoded
+    at a reduced DCT scale, downscaled to ``MAX_IMAGE_SIDE`` and re-encoded as
+    JPEG without EXIF/GPS metadata. PDFs over ``MAX_PDF_BYTES`` are rejected
+    before their bytes are copied. Raises ``ValueError`` with a user-facing
+    message when the file cannot be accepted.
+    """
+    suffix = Path(filename).suffix.lower()
+
+    if suffix == ".pdf":
+        if size > MAX_PDF_BYTES:
+            raise ValueError(
+                f"El PDF pesa {size / (1024 * 1024):.1f} MB; el máximo permitido es "
+                f"{MAX_PDF_BYTES // (1024 * 1024)} MB. Intenta escanearlo con menor resolución."
+            )
+        data = _read_all(fh)
+        return data, filename, _stats(size, len(data), "pdf")
+
+    Image, ImageOps = _pil() if suffix in IMAGE_EXTENSIONS else (None, None)
+    if Image is None:
+        data = _read_all(fh)
+        return data, filename, _stats(size, len(data), "sin_cambios")
+
+    fh.seek(0)
+    try:
+        img = Image.open(fh)
+        width, height = img.size
+    except Exception as exc:
+        raise ValueError("No pudimos leer la imagen adjunta. Intenta con otra foto o un PDF.") from exc
+
+    if width * height > MAX_IMAGE_PIXELS:
+        raise ValueError("La imagen es demasiado grande. Intenta con una foto de menor resolución.")
+
+    has_metadata = bool(img.info.get("exif")) or bool(img.getexif())
+    needs_resize = max(width, height) > MAX_IMAGE_SIDE
+    if not needs_resize and not has_metadata and size <= PASSTHROUGH_BYTES:
+        data = _read_all(fh)
+        return data, filename, _stats(size, len(data), "sin_cambios")
+
+    if img.format == "JPEG" and needs_resize:
+        # Let libjpeg decode at 1/2, 1/4 or 1/8 scale instead of full size.
+        img.draft("RGB", (MAX_IMAGE_SIDE, MAX_IMAGE_SIDE))
+
+    img = ImageOps.exif_transpose(img)
+    if img.mode in ("RGBA", "LA", "P"):
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A"))
+        img = background
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+    img.thumbnail((MAX_IMAGE_SIDE, MAX_IMAGE_SIDE), Image.LANCZOS)
+
+    out = io.BytesIO()
+    img.save(out, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    data = out.getvalue()
+
+    if len(data) >= size and not needs_resize and not has_metadata:
+        data = _read_all(fh)
+        return data, filename, _stats(size, len(data), "sin_cambios")
+
+    new_name = f"{Path(filename).stem}.jpg"
+    stats = _stats(size, len(data), "recomprimida")
+    logger.info("Documento %s: %d -> %d bytes", filename, size, len(data))
+    return data, new_name, stats
@@ -0,0 +1,230 @@
+"""Importación masiva de delegaciones (CSV/XLSX) a la pestaña PARTICIPANTES.
+
+Uso desde la raíz del repo (usa las mismas credenciales de ``.streamlit/secrets.toml``):
+
+    python utils_importacion.py delegacion.xlsx --obra "Colegio San José"
+    python utils_importacion.py delegacion.csv --solo-validar --errores errores.csv
+"""
+import argparse
+import csv
+import io
+import re
+from datetime import datetime
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+from utils import PARTICIPANTES_COLS, _normalize_doc, append_rows, read_column
+from utils_catalogo import normalizar_texto
+from utils_participantes import SerializadorFilas, validar_participante
+
+# Filas por petición de escritura: pocas peticiones por minuto incluso para
+# delegaciones de miles de personas.
+IMPORT_BATCH_ROWS = 500
+CSV_DELIMITERS = ",;\t"
+
+# Encabezados frecuentes en las planillas de las obras → columna de PARTICIPANTES.
+HEADER_ALIASES = {
+    "documento": "documento_participante",
+    "numero_documento": "documento_participante",
+    "tipo_documento": "tipo_documento_participante",
+    "mayor_de_edad": "es_mayor_edad",
+    "mayor_edad": "es_mayor_edad",
+    "es_mayor_de_edad": "es_mayor_edad",
+    "eres_mayor_de_edad": "es_mayor_edad",
+    "eres_mayor_edad": "es_mayor_edad",
+    "mayor_de_18": "es_mayor_edad",
+    "es_mayor_de_18": "es_mayor_edad",
+    "eres_mayor_de_18": "es_mayor_edad",
+    "tipo_de_documento": "tipo_documento_participante",
+    "numero_de_documento": "documento_participante",
+    "documento_de_identidad": "documento_participante",
+    "telefono": "telefono_celular",
+    "celular": "telefono_celular",
+    "departamento": "region",
+    "municipio": "ciudad",
+    "talla": "talla_camisa",
+    "obra": "obra_institucion",
+    "institucion": "obra_institucion",
+    "intereses": "intereses_personales",
+    "apodo": "como_te_gusta_que_te_digan",
+    "parentesco": "parentesco_contacto",
+}
+
+
+def _column_name(header) -> str:
+    # "¿Eres mayor de edad?" → "eres_mayor_de_edad": fuera signos y espacios.
+    key = re.sub(r"[^a-z0-9]+", "_", normalizar_texto(header)).strip("_")
+    return HEADER_ALIASES.get(key, key)
+
+
+def _cell(value):
+    # openpyxl entrega los números de documento/teléfono como float (1.0e9).
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if value is None:
+        return ""
+    return value
+
+
+def _iter_csv(fh):
+    text = io.TextIOWrapper(fh, encoding="utf-8-sig", newline="")
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS)
+    except csv.Error:
+        dialect = csv.excel
+    try:
+        reader = csv.reader(text, dialect)
+        header = next(reader, [])
+        columns = [_column_name(name) for name in header]
+        for number, values in enumerate(reader, start=2):
+            if any(value.strip() for value in values):
+                yield number, dict(zip(columns, values))
+    finally:
+        # No cerrar el archivo del llamador al descartar el wrapper.
+        text.detach()
+
+
+def _iter_xlsx(fh):
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:  # openpyxl es opcional: solo hace falta para .xlsx
+        raise ValueError("Para importar archivos .xlsx instala openpyxl (pip install openpyxl).") from exc
+
+    workbook = load_workbook(fh, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, ())
+        columns = [_column_name(name or "") for name in header]
+        for number, values in enumerate(rows, start=2):
+            if any(value not in (None, "") for value in values):
+                yield number, {column: _cell(value) for column, value in zip(columns, values)}
+    finally:
+        workbook.close()
+
+
+def leer_filas(fh, filename: str):
+    """Yield ``(número de fila, dict por columna)`` streaming a binary CSV/XLSX file."""
+    suffix = Path(filename).suffix.lower()
+    if suffix == ".csv":
+        return _iter_csv(fh)
+    if suffix in (".xlsx", ".xlsm"):
+        return _iter_xlsx(fh)
+    raise ValueError("Formato no soportado: usa un archivo .csv o .xlsx.")
+
+
+def importar_participantes(
+    fh,
+    filename: str,
+    spreadsheet_id: str = "",
+    sheet: str = "PARTICIPANTES",
+    obra: str = "",
+    dry_run: bool = False,
+    batch_rows: int = IMPORT_BATCH_ROWS,
+    public_base_url: str = "",
+    progress=None,
+) -> dict:
+    """Validate every row like the three-stage form and append the valid ones.
+
+    Rows are read lazily and written in batches of ``batch_rows`` with one
+    Sheets request each. Documents already in the sheet or repeated in the
+    file are rejected. ``progress(leidas, aceptadas)`` is called after each
+    batch. Returns counters plus ``errores``: ``(fila, documento, mensajes)``.
+    """
+    if not dry_run and not spreadsheet_id:
+        raise ValueError("Falta el ID de la hoja: indícalo o usa la validación sin escribir.")
+    serializer = SerializadorFilas(PARTICIPANTES_COLS, public_base_url)
+    seen = set()
+    if spreadsheet_id:
+        seen.update(
+            _normalize_doc(value)
+            for value in read_column(spreadsheet_id, sheet, "documento_participante", PARTICIPANTES_COLS)
+        )
+    summary = {"leidas": 0, "aceptadas": 0, "escritas": 0, "errores": []}
+    batch = []
+
+    def flush():
+        if batch and not dry_run:
+            summary["escritas"] += append_rows(spreadsheet_id, sheet, batch, PARTICIPANTES_COLS, prepared=True)
+        batch.clear()
+        if progress is not None:
+            progress(summary["leidas"], summary["aceptadas"])
+
+    for number, datos in leer_filas(fh, filename):
+        summary["leidas"] += 1
+        if obra and not datos.get("obra_institucion"):
+            datos["obra_institucion"] = obra
+        errors, payload = validar_participante(datos)
+        documento = payload.get("documento_participante", "")
+        if documento and _normalize_doc(documento) in seen:
+            errors.append("El documento ya está inscrito o aparece repetido en el archivo.")
+        if errors:
+            summary["errores"].append((number, documento, errors))
+            continue
+        seen.add(_normalize_doc(documento))
+        payload["timestamp"] = datetime.now(ZoneInfo("America/Bogota")).isoformat(timespec="seconds")
+        batch.append(serializer(payload))
+        summary["aceptadas"] += 1
+        if len(batch) >= batch_rows:
+            flush()
+    flush()
+    return summary
+
+
+def errores_csv(summary: dict) -> bytes:
+    """Per-row error report as CSV bytes (Excel-friendly UTF-8 with BOM)."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["fila", "documento", "errores"])
+    for number, documento, errors in summary["errores"]:
+        writer.writerow([number, documento, " | ".join(errors)])
+    return out.getvalue().encode("utf-8-sig")
+
+
+def main():
+    import streamlit as st
+
+    parser = argparse.ArgumentParser(description="Importa una delegación (CSV/XLSX) a PARTICIPANTES.")
+    parser.add_argument("archivo")
+    parser.add_argument("--spreadsheet", default="", help="ID de la hoja (por defecto SPREADSHEET_ID de secrets)")
+    parser.add_argument("--hoja", default="", help="Pestaña destino (por defecto SHEET_NAME o PARTICIPANTES)")
+    parser.add_argument("--obra", default="", help="Obra/institución para las filas que no la indiquen")
+    parser.add_argument("--solo-validar", action="store_true", help="Valida sin escribir en la hoja")
+    parser.add_argument("--errores", default="", help="Ruta del CSV con los errores por fila")
+    parser.add_argument("--lote", type=int, default=IMPORT_BATCH_ROWS, help="Filas por petición de escritura")
+    args = parser.parse_args()
+
+    spreadsheet_id = args.spreadsheet or str(st.secrets.get("SPREADSHEET_ID", "")).strip()
+    sheet = args.hoja or (str(st.secrets.get("SHEET_NAME") or "").strip() or "PARTICIPANTES")
+
+    def report(leidas, aceptadas):
+        print(f"  {leidas} filas leídas, {aceptadas} aceptadas", flush=True)
+
+    with open(args.archivo, "rb") as fh:
+        summary = importar_participantes(
+            fh,
+            args.archivo,
+            spreadsheet_id,
+            sheet,
+            obra=args.obra,
+            dry_run=args.solo_validar,
+            batch_rows=args.lote,
+            public_base_url=str(st.secrets.get("UPLOADS_PUBLIC_BASE_URL") or "").strip(),
+            progress=report,
+        )
+
+    print(
+        f"Leídas: {summary['leidas']} · aceptadas: {summary['aceptadas']} · "
+        f"escritas: {summary['escritas']} · con errores: {len(summary['errores'])}"
+    )
+    if args.errores and summary["errores"]:
+        Path(args.errores).write_bytes(errores_csv(summary))
+        print(f"Errores por fila en {args.errores}")
+    else:
+        for number, documento, errors in summary["errores"][:20]:
+            print(f"  fila {number} ({documento or 'sin documento'}): {'; '.join(errors)}")
+
+
+if __name__ == "__main__":
+    main()
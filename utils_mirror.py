@@ -0,0 +1,308 @@
+"""Espejo local en Parquet de las pestañas de la hoja, sincronizado de forma incremental.
+
+Uso desde la raíz del repo:
+
+    python utils_mirror.py                # una sincronización
+    python utils_mirror.py --cada 300     # sincroniza cada 5 minutos
+    python utils_mirror.py --completo     # fuerza la reconciliación completa
+"""
+import argparse
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo queda el lock entre hilos
+    fcntl = None
+
+from utils import _get_spreadsheet
+from utils_export import SHEET_COLUMNS, LectorHoja, _pyarrow, arrow_schema, arrow_table
+
+logger = logging.getLogger(__name__)
+
+MIRROR_DIR = Path("state") / "mirror"
+MIRROR_SYNC_SECONDS = 5 * 60
+# Las ediciones de celdas que no tocan la columna timestamp no se detectan en
+# la sincronización incremental; cada tanto se reconcilia todo igual.
+MIRROR_FULL_RESYNC_SECONDS = 6 * 60 * 60
+# Pestañas con timestamp en la columna A admiten sincronización incremental.
+INCREMENTAL_SHEETS = frozenset({"PARTICIPANTES", "ACOMPANANTES"})
+# Una generación reemplazada se conserva este tiempo para lectores que aún la usan.
+MIRROR_GENERATION_GRACE_SECONDS = 10 * 60
+
+
+def _fingerprint(values) -> str:
+    digest = hashlib.sha256()
+    for value in values:
+        digest.update(str(value).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class LocalMirror:
+    """Parquet copy of each tab under ``state/mirror/<TAB>/``.
+
+    Every tab keeps append-only part files plus a ``state.json`` with the
+    synced row count, a fingerprint of the column-A timestamps of those rows
+    and a ``version`` that changes whenever the data does. A sync reads the
+    header and column A only; if the known prefix is intact, just the new rows are read
+    into a new part. Any change to the prefix (edits, deletions, reordering),
+    a header change or an explicit ``marcar_editada`` triggers a full
+    reconciliation into a fresh generation directory, swapped in atomically.
+
+    Several processes may sync the same directory (one per app process plus
+    ``python utils_mirror.py --cada``), so syncs and state updates hold an
+    ``flock`` on ``<TAB>/.lock``. Readers take no lock: a replaced generation
+    is only deleted ``MIRROR_GENERATION_GRACE_SECONDS`` after the swap.
+    """
+
+    def __init__(self, root: Path = MIRROR_DIR):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+
+    def _dir(self, sheet: str) -> Path:
+        return self.root / sheet
+
+    @contextlib.contextmanager
+    def _bloqueo(self, sheet: str):
+        """Exclusive lock on ``sheet`` across threads and processes."""
+        with self._lock:
+            directory = self._dir(sheet)
+            directory.mkdir(parents=True, exist_ok=True)
+            with open(directory / ".lock", "a") as fh:
+                if fcntl is not None:
+                    fcntl.flock(fh, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def estado(self, sheet: str) -> dict:
+        try:
+            with open(self._dir(sheet) / "state.json", encoding="utf-8") as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def _guardar_estado(self, sheet: str, state: dict) -> None:
+        directory = self._dir(sheet)
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".state-", suffix=".json")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(state, fh, ensure_ascii=False)
+        os.replace(tmp, directory / "state.json")
+
+    def version(self, sheet: str) -> str:
+        """Opaque token that changes whenever the mirrored data of ``sheet`` changes."""
+        return str(self.estado(sheet).get("version", ""))
+
+    def marcar_editada(self, sheet: str) -> None:
+        """Force a full reconciliation on the next sync (cells were edited in place)."""
+        with self._bloqueo(sheet):
+            state = self.estado(sheet)
+            if state:
+                state["needs_full"] = True
+                self._guardar_estado(sheet, state)
+
+    def _escribir_parte(self, directory: Path, index: int, rows, columns) -> str:
+        _, pq = _pyarrow()
+        directory.mkdir(parents=True, exist_ok=True)
+        name = f"part-{index:05d}.parquet"
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".part-")
+        os.close(fd)
+        pq.write_table(arrow_table(rows, arrow_schema(columns)), tmp, compression="zstd")
+        os.replace(tmp, directory / name)
+        return name
+
+    def _completa(self, spreadsheet_id: str, sheet: str, state: dict, timestamps: list) -> dict:
+        lector = LectorHoja(spreadsheet_id, sheet)
+        generation = int(state.get("generation", 0)) + 1
+        directory = self._dir(sheet) / f"gen-{generation:05d}"
+        shutil.rmtree(directory, ignore_errors=True)
+        parts = []
+        row_count = 0
+        for rows in lector.paginas():
+            parts.append(self._escribir_parte(directory, len(parts) + 1, rows, lector.columns))
+            row_count += len(rows)
+        now = time.time()
+        return {
+            "generation": generation,
+            "parts": parts,
+            "header": lector.columns,
+            "row_count": row_count,
+            "prefix_sha": _fingerprint(timestamps[:row_count]),
+            "version": f"{generation}.{len(parts)}.{row_count}",
+            "synced_at": now,
+            "full_synced_at": now,
+            "needs_full": False,
+            "retired": state.get("retired", []),
+        }
+
+    def _purgar_generaciones(self, sheet: str, state: dict) -> None:
+        """Delete replaced generations once their grace period is over (caller holds the lock)."""
+        now = time.time()
+        kept = []
+        for generation, retired_at in state.get("retired", []):
+            if now - retired_at < MIRROR_GENERATION_GRACE_SECONDS:
+                kept.append([generation, retired_at])
+            else:
+                shutil.rmtree(self._dir(sheet) / f"gen-{int(generation):05d}", ignore_errors=True)
+        state["retired"] = kept
+
+    def sincronizar(self, spreadsheet_id: str, sheet: str, completo: bool = False) -> dict:
+        """Bring the mirror of ``sheet`` up to date; returns the new state plus ``modo``."""
+        with self._bloqueo(sheet):
+            state = self.estado(sheet)
+            ws = _get_spreadsheet(spreadsheet_id).worksheet(sheet)
+            header = ws.row_values(1)
+            timestamps = ws.col_values(1)[1:]
+            stored = int(state.get("row_count", 0))
+
+            needs_full = (
+                completo
+                or not state
+                or state.get("needs_full")
+                or sheet not in INCREMENTAL_SHEETS
+                or not state.get("header")
+                or state["header"] != header
+                or len(timestamps) < stored
+                or _fingerprint(timestamps[:stored]) != state.get("prefix_sha")
+                or time.time() - state.get("full_synced_at", 0) > MIRROR_FULL_RESYNC_SECONDS
+            )
+            if needs_full:
+                if (
+                    sheet not in INCREMENTAL_SHEETS
+                    and state
+                    and not completo
+                    and not state.get("needs_full")
+                    and time.time() - state.get("full_synced_at", 0) <= MIRROR_FULL_RESYNC_SECONDS
+                    and len(timestamps) == stored
+                    and _fingerprint(timestamps) == state.get("prefix_sha")
+                ):
+                    # Sin timestamp: solo se recarga si cambió la columna A o el número de filas.
+                    if state.get("retired"):
+                        self._purgar_generaciones(sheet, state)
+                        self._guardar_estado(sheet, state)
+                    return {**state, "modo": "sin_cambios"}
+                previous = state.get("generation")
+                new_state = self._completa(spreadsheet_id, sheet, state, timestamps)
+                if previous:
+                    new_state["retired"].append([int(previous), time.time()])
+                self._purgar_generaciones(sheet, new_state)
+                self._guardar_estado(sheet, new_state)
+                return {**new_state, "modo": "completa"}
+
+            self._purgar_generaciones(sheet, state)
+            if len(timestamps) == stored:
+                state["synced_at"] = time.time()
+                self._guardar_estado(sheet, state)
+                return {**state, "modo": "sin_cambios"}
+
+            lector = LectorHoja(spreadsheet_id, sheet, state["header"])
+            directory = self._dir(sheet) / f"gen-{int(state['generation']):05d}"
+            added = 0
+            for rows in lector.paginas(start_row=stored + 2):
+                state["parts"].append(self._escribir_parte(directory, len(state["parts"]) + 1, rows, lector.columns))
+                added += len(rows)
+            state["row_count"] = stored + added
+            state["prefix_sha"] = _fingerprint(timestamps[: state["row_count"]])
+            state["version"] = f"{state['generation']}.{len(state['parts'])}.{state['row_count']}"
+            state["synced_at"] = time.time()
+            self._guardar_estado(sheet, state)
+            return {**state, "modo": "incremental", "nuevas": added}
+
+    def tabla(self, sheet: str, columns=None):
+        """The mirrored tab as a ``pyarrow.Table`` (optionally projected); ``None`` if never synced."""
+        pa, pq = _pyarrow()
+        state = self.estado(sheet)
+        if not state:
+            return None
+        directory = self._dir(sheet) / f"gen-{int(state['generation']):05d}"
+        schema = arrow_schema(state["header"])
+        if columns:
+            schema = pa.schema([schema.field(column) for column in columns])
+        tables = [pq.read_table(directory / part, columns=columns) for part in state["parts"]]
+        return pa.concat_tables(tables) if tables else schema.empty_table()
+
+    def dataframe(self, sheet: str, columns=None):
+        table = self.tabla(sheet, columns)
+        return None if table is None else table.to_pandas()
+
+
+local_mirror = LocalMirror()
+
+
+def sincronizar_todo(spreadsheet_id: str, completo: bool = False) -> dict:
+    """Sync every known tab; a failure in one tab does not stop the others."""
+    results = {}
+    for sheet in SHEET_COLUMNS:
+        try:
+            results[sheet] = local_mirror.sincronizar(spreadsheet_id, sheet, completo=completo)
+        except Exception as exc:
+            logger.exception("No se pudo sincronizar el espejo de %s", sheet)
+            results[sheet] = {"modo": "error", "error": str(exc)}
+    return results
+
+
+_sync_lock = threading.Lock()
+_sync_thread = None
+
+
+def _sync_loop(spreadsheet_id: str, interval: float) -> None:
+    while True:
+        results = sincronizar_todo(spreadsheet_id)
+        changed = {sheet: r.get("modo") for sheet, r in results.items() if r.get("modo") != "sin_cambios"}
+        if changed:
+            logger.info("Espejo local: %s", changed)
+        time.sleep(interval)
+
+
+def start_mirror_sync(spreadsheet_id: str, interval: float = MIRROR_SYNC_SECONDS) -> None:
+    """Keep the mirror fresh from a daemon thread, once per process (idempotent)."""
+    global _sync_thread
+    try:
+        _pyarrow()
+    except ValueError:
+        logger.warning("pyarrow no está instalado: el espejo local queda desactivado.")
+        return
+    with _sync_lock:
+        if _sync_thread is not None and _sync_thread.is_alive():
+            return
+        _sync_thread = threading.Thread(
+            target=_sync_loop,
+            args=(spreadsheet_id, interval),
+            name="sheet-mirror-sync",
+            daemon=True,
+        )
+        _sync_thread.start()
+
+
+def main():
+    import streamlit as st
+
+    parser = argparse.ArgumentParser(description="Sincroniza el espejo local en Parquet de la hoja.")
+    parser.add_argument("--spreadsheet", default="", help="ID de la hoja (por defecto SPREADSHEET_ID de secrets)")
+    parser.add_argument("--completo", action="store_true", help="Fuerza la reconciliación completa")
+    parser.add_argument("--cada", type=float, default=0, help="Repite cada N segundos")
+    args = parser.parse_args()
+
+    spreadsheet_id = args.spreadsheet or str(st.secrets.get("SPREADSHEET_ID", "")).strip()
+    while True:
+        for sheet, result in sincronizar_todo(spreadsheet_id, completo=args.completo).items():
+            print(f"{sheet}: {result.get('modo')} · {result.get('row_count', 0)} filas")
+        if not args.cada:
+            break
+        time.sleep(args.cada)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+import re
+import unicodedata
+from datetime import date, datetime
+from pathlib import Path
+from urllib.parse import quote, urljoin
+
+from utils import (
+    EXPERIENCIAS_PARTICIPANTE,
+    EXPERIENCIAS_PARTICIPANTE_COLUMNS,
+    PARTICIPANTES_COLS,
+    _stringify_cell,
+    hyperlink_formula,
+)
+from utils_catalogo import catalogo_ciudades, normalizar_texto
+from utils_fechas import edad, parse_fecha
+
+TIPOS_DOCUMENTO_PARTICIPANTE = ["CC", "TI", "CE", "Pasaporte", "Otro"]
+TIPOS_DOCUMENTO_CONTACTO = ["CC", "CE", "Pasaporte", "Otro"]
+TALLAS_CAMISA = ["16", "XS", "S", "M", "L", "XL", "2XL"]
+PARENTESCOS = [
+    "Madre", "Padre", "Hermana / Hermano", "Tía / Tío", "Abuela / Abuelo", "Tutor/a legal", "Acompañante de obra", "Otro"
+]
+INTERESES_PERSONALES = [
+    "Aventura", "Deporte", "Contemplación", "Arte", "Música", "Danza", "Teatro", "Fotografía",
+    "Ciencia", "Tecnología", "Videojuegos", "Cocina", "Emprendimiento", "Lectura", "Naturaleza",
+    "Ecología integral", "Montaña", "Ciclismo", "Senderismo", "Viajes", "Idiomas",
+    "Servicio comunitario", "Liderazgo", "Mascotas"
+]
+MAX_INTERESES = 3
+# Etiqueta del formulario → valor guardado en la hoja.
+CONOCE_RJI = {"Sí": "Si", "No": "No", "Más o menos": "Mas o menos"}
+NIVELES_EXPERTICIE = ["Curioso", "Explorador", "Protagonista"]
+# Columna booleana → texto que se lista en ``acompanamientos_marcados``.
+ACOMPANAMIENTOS = {
+    "acompanamiento_familia": "Familia",
+    "acompanamiento_amigos": "Amigos",
+    "acompanamiento_escucha_activa": "Escucha activa / apoyo emocional",
+    "acompanamiento_mentoria": "Mentoría o tutoría",
+    "acompanamiento_espiritual": "Acompañamiento espiritual",
+    "acompanamiento_red_comunitaria": "Red comunitaria o institucional",
+    "acompanamiento_ninguna": "Ninguna",
+}
+
+BOOL_COLUMNS = frozenset({
+    "es_mayor_edad",
+    "acompanamiento_familia",
+    "acompanamiento_amigos",
+    "acompanamiento_escucha_activa",
+    "acompanamiento_mentoria",
+    "acompanamiento_espiritual",
+    "acompanamiento_red_comunitaria",
+    "acompanamiento_ninguna",
+    "acepta_tratamiento_datos",
+    "acepta_whatsapp",
+})
+PHONE_COLUMNS = frozenset({"telefono_celular", "telefono_contacto"})
+RANK_COLUMNS = frozenset(EXPERIENCIAS_PARTICIPANTE_COLUMNS)
+_TRUE_TEXT = frozenset({"true", "si", "1", "x", "yes", "verdadero"})
+_FALSE_TEXT = frozenset({"false", "no", "0", "falso"})
+
+
+def clean_string(value: object) -> str:
+    """Return a normalized string suitable for storage without mutating widgets."""
+    if not isinstance(value, str):
+        return ""
+    normalized = unicodedata.normalize("NFKC", value)
+    normalized = normalized.strip()
+    # Collapse any internal whitespace runs to a single space
+    normalized = re.sub(r"\s+", " ", normalized)
+    return normalized
+
+
+def normalize_numeric_input(value: str) -> tuple[bool, str]:
+    raw = (value or "").strip()
+    if not raw:
+        return False, ""
+    allowed = set("0123456789 .-")
+    if any(ch not in allowed for ch in raw):
+        return False, ""
+    digits = "".join(ch for ch in raw if ch.isdigit())
+    if not digits:
+        return False, ""
+    return True, digits
+
+
+def parse_si_no(value):
+    """``True``/``False`` for yes/no answers ("Sí", "no", "TRUE", 1...); ``None`` if unknown."""
+    if isinstance(value, bool):
+        return value
+    text = normalizar_texto(_stringify_cell(value))
+    if text in _TRUE_TEXT:
+        return True
+    if text in _FALSE_TEXT:
+        return False
+    return None
+
+
+def _opcion(value, opciones) -> str:
+    """Canonical spelling of ``value`` among ``opciones`` ignoring case/accents; ``""`` if absent."""
+    clave = normalizar_texto(_stringify_cell(value))
+    return next((op for op in opciones if normalizar_texto(op) == clave), "") if clave else ""
+
+
+def _lista(value) -> list:
+    if isinstance(value, (list, tuple)):
+        items = value
+    else:
+        items = re.split(r"[,;|]", _stringify_cell(value))
+    return [clean_string(str(item)) for item in items if clean_string(str(item))]
+
+
+def clean_phone_number(value: object) -> str:
+    """Normalize a phone number keeping digits and an optional leading plus."""
+    if not isinstance(value, str):
+        return ""
+    normalized = unicodedata.normalize("NFKC", value)
+    normalized = normalized.strip()
+    if not normalized:
+        return ""
+    has_plus = normalized.startswith("+")
+    digits = "".join(ch for ch in normalized if ch.isdigit())
+    if not digits:
+        return ""
+    return f"+{digits}" if has_plus else digits
+
+
+def format_phone_for_sheet(value: str) -> str:
+    """Prefix phone numbers with ' so Sheets treats them as literal text."""
+    if not value:
+        return ""
+    return f"'{value}"
+
+
+def format_upload_for_sheet(path_value: str, display_name: str = "", public_base_url: str = "") -> str:
+    """Return a Sheets-friendly value (hyperlink when possible) for uploaded files."""
+    if not path_value:
+        return ""
+
+    path_value = str(path_value)
+    if path_value.startswith("="):
+        return path_value
+
+    filename = display_name or Path(path_value).name or "Archivo"
+
+    if path_value.startswith(("http://", "https://")):
+        return hyperlink_formula(path_value, filename)
+
+    public_base = public_base_url.rstrip("/")
+    if public_base:
+        relative = Path(path_value).as_posix()
+        # Remove leading relative markers and root slashes to avoid urljoin resets.
+        while relative.startswith("./"):
+            relative = relative[2:]
+        if relative.startswith("/"):
+            relative = relative[1:]
+        if relative.startswith("uploads/"):
+            relative_fragment = relative[len("uploads/"):]
+        else:
+            relative_fragment = relative
+        base = f"{public_base}/"
+        relative_encoded = quote(relative_fragment, safe="/")
+        url = urljoin(base, relative_encoded)
+        return hyperlink_formula(url, filename)
+
+    return path_value
+
+
+def _bool_cell(value) -> str:
+    if isinstance(value, str):
+        value = parse_si_no(value)
+    return "TRUE" if value else "FALSE"
+
+
+def _rank_cell(value) -> str:
+    try:
+        return str(int(value))
+    except (TypeError, ValueError):
+        return "0"
+
+
+def _phone_cell(value) -> str:
+    return format_phone_for_sheet(clean_phone_number(value if isinstance(value, str) else _stringify_cell(value)))
+
+
+def _date_cell(value) -> str:
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return _stringify_cell(value)
+
+
+def _list_cell(value) -> str:
+    if isinstance(value, (list, tuple, set)):
+        return ", ".join(str(item) for item in value)
+    return _stringify_cell(value)
+
+
+def _field(column: str, convert):
+    def getter(payload):
+        return convert(payload.get(column))
+    return getter
+
+
+class SerializadorFilas:
+    """Turn participant payload dicts into rows ordered like ``PARTICIPANTES_COLS``.
+
+    The column plan is built once: every column gets a precomputed getter that
+    reads its payload key and converts it to the string Sheets expects
+    (``TRUE``/``FALSE`` for flags, ``'``-prefixed phones, ``HYPERLINK``
+    formulas for uploads, integer ranks). Serializing a payload is then a
+    single pass over the plan, cheap enough for bulk imports as well as the
+    interactive save.
+    """
+
+    def __init__(self, columns=PARTICIPANTES_COLS, public_base_url: str = ""):
+        self.columns = tuple(columns)
+        self.public_base_url = public_base_url
+        self._plan = tuple(self._getter(column) for column in self.columns)
+
+    def _getter(self, column: str):
+        if column in BOOL_COLUMNS:
+            return _field(column, _bool_cell)
+        if column in PHONE_COLUMNS:
+            return _field(column, _phone_cell)
+        if column in RANK_COLUMNS:
+            return _field(column, _rank_cell)
+        if column == "fecha_nacimiento":
+            return _field(column, _date_cell)
+        if column == "intereses_personales":
+            return _field(column, _list_cell)
+        if column == "nombre_completo":
+            return self._nombre_completo
+        if column == "edad_aprox":
+            return self._edad_aprox
+        if column == "archivo_doc_participante":
+            return self._archivo_doc
+        return _field(column, _stringify_cell)
+
+    @staticmethod
+    def _nombre_completo(payload) -> str:
+        value = payload.get("nombre_completo")
+        if value:
+            return _stringify_cell(value)
+        return f"{_stringify_cell(payload.get('nombres'))} {_stringify_cell(payload.get('apellidos'))}".strip()
+
+    @staticmethod
+    def _edad_aprox(payload) -> str:
+        value = payload.get("edad_aprox")
+        if value not in (None, ""):
+            return _stringify_cell(value)
+        return _stringify_cell(edad(payload.get("fecha_nacimiento")))
+
+    def _archivo_doc(self, payload) -> str:
+        return format_upload_for_sheet(
+            payload.get("archivo_doc_participante", ""),
+            payload.get("archivo_doc_participante_label", ""),
+            self.public_base_url,
+        )
+
+    def __call__(self, payload: dict) -> list:
+        return [getter(payload) for getter in self._plan]
+
+    def filas(self, payloads) -> list:
+        plan = self._plan
+        return [[getter(payload) for getter in plan] for payload in payloads]
+
+
+# ====== Validación ======
+# Reglas de las tres etapas del formulario sobre un dict con los nombres de
+# columna de PARTICIPANTES. Las usa tanto el formulario (app.py) como la
+# importación masiva (utils_importacion.py). Cada función devuelve
+# ``(errores, datos_limpios)``.
+
+def validar_etapa1(datos: dict) -> tuple:
+    errors = []
+    es_mayor = parse_si_no(datos.get("es_mayor_edad"))
+    if es_mayor is None:
+        errors.append("Confírmanos si eres mayor de edad para continuar.")
+
+    doc_ok, cleaned_doc = normalize_numeric_input(_stringify_cell(datos.get("documento_participante")))
+    if not doc_ok:
+        errors.append("El documento del participante debe contener solo dígitos.")
+
+    doc_contact_ok, cleaned_doc_contact = normalize_numeric_input(_stringify_cell(datos.get("documento_contacto")))
+    if not doc_contact_ok:
+        errors.append("El documento del contacto debe contener solo dígitos.")
+
+    tipo_doc = _opcion(datos.get("tipo_documento_participante"), TIPOS_DOCUMENTO_PARTICIPANTE)
+    if not tipo_doc:
+        errors.append("Selecciona el tipo de documento del participante.")
+
+    tipo_doc_contacto = _opcion(datos.get("tipo_documento_contacto"), TIPOS_DOCUMENTO_CONTACTO)
+    if not tipo_doc_contacto:
+        errors.append("Selecciona el tipo de documento del contacto.")
+
+    nombres = clean_string(datos.get("nombres"))
+    apellidos = clean_string(datos.get("apellidos"))
+    if not nombres or not apellidos:
+        errors.append("Ingresa tus nombres y apellidos tal como aparecen en tu documento.")
+
+    direccion = clean_string(datos.get("direccion"))
+    if not direccion:
+        errors.append("Cuéntanos tu dirección de residencia.")
+
+    catalogo = catalogo_ciudades()
+    region = catalogo.region(clean_string(datos.get("region")))
+    ciudad_raw = clean_string(datos.get("ciudad"))
+    ciudad = ""
+    if not region or not ciudad_raw:
+        errors.append("Selecciona tu región y ciudad para continuar.")
+    else:
+        ciudad, _ = catalogo.resolver(ciudad_raw, region)
+        if not ciudad:
+            errors.append("La ciudad seleccionada no pertenece a la región elegida.")
+
+    fecha_nacimiento = parse_fecha(datos.get("fecha_nacimiento"))
+    if fecha_nacimiento is None:
+        errors.append("Indica una fecha de nacimiento válida (AAAA-MM-DD).")
+
+    talla = _opcion(datos.get("talla_camisa"), TALLAS_CAMISA)
+    if not talla:
+        errors.append("Selecciona tu talla de camiseta.")
+
+    tel_clean = clean_phone_number(_stringify_cell(datos.get("telefono_celular")))
+    if not tel_clean:
+        errors.append("Déjanos un número de contacto personal válido (puedes incluir el prefijo +57).")
+
+    correo = clean_string(datos.get("correo"))
+    if not correo:
+        errors.append("Incluye un correo de contacto personal.")
+
+    nom_a = clean_string(datos.get("nombres_contacto"))
+    ape_a = clean_string(datos.get("apellidos_contacto"))
+    tel_a_clean = clean_phone_number(_stringify_cell(datos.get("telefono_contacto")))
+    parentesco = _opcion(datos.get("parentesco_contacto"), PARENTESCOS)
+
+    contacto_name_issue = not nom_a or not ape_a
+    if es_mayor is False and contacto_name_issue:
+        errors.append("Para menores, los nombres y apellidos del acudiente son obligatorios.")
+    elif contacto_name_issue:
+        errors.append("Ingresa nombres y apellidos del contacto de emergencia.")
+
+    if not tel_a_clean:
+        errors.append("Incluye un teléfono válido para el contacto de emergencia (puedes incluir el prefijo +57).")
+
+    if not parentesco:
+        errors.append("Selecciona el parentesco o vínculo del contacto de emergencia.")
+
+    return errors, {
+        "es_mayor_edad": es_mayor,
+        "tipo_documento_participante": tipo_doc,
+        "documento_participante": cleaned_doc,
+        "nombres": nombres,
+        "apellidos": apellidos,
+        "como_te_gusta_que_te_digan": clean_string(datos.get("como_te_gusta_que_te_digan")),
+        "telefono_celular": tel_clean,
+        "correo": correo,
+        "direccion": direccion,
+        "region": region,
+        "ciudad": ciudad,
+        "fecha_nacimiento": fecha_nacimiento,
+        "talla_camisa": talla,
+        "eps": clean_string(datos.get("eps")),
+        "restricciones_alimentarias": clean_string(datos.get("restricciones_alimentarias")),
+        "salud_mental": clean_string(datos.get("salud_mental")),
+        "obra_institucion": clean_string(datos.get("obra_institucion")),
+        "proceso_juvenil": clean_string(datos.get("proceso_juvenil")),
+        "tipo_documento_contacto": tipo_doc_contacto,
+        "documento_contacto": cleaned_doc_contact,
+        "nombres_contacto": nom_a,
+        "apellidos_contacto": ape_a,
+        "telefono_contacto": tel_a_clean,
+        "correo_contacto": clean_string(datos.get("correo_contacto")),
+        "parentesco_contacto": parentesco,
+    }
+
+
+def validar_etapa2(datos: dict) -> tuple:
+    errors = []
+    experiencia = clean_string(datos.get("experiencia_significativa"))
+    if not experiencia:
+        errors.append("Cuéntanos una experiencia juvenil significativa.")
+
+    intereses = _lista(datos.get("intereses_personales"))
+    if not intereses:
+        errors.append("Selecciona al menos un interés personal (hasta 3).")
+    elif len(intereses) > MAX_INTERESES:
+        errors.append("Selecciona máximo 3 intereses personales.")
+
+    dato_freak = clean_string(datos.get("hobby_o_dato_curioso"))
+    if not dato_freak:
+        errors.append("Comparte un hobby o dato curioso para continuar.")
+
+    pregunta = clean_string(datos.get("pregunta_para_conectar"))
+    if not pregunta:
+        errors.append("Propón una pregunta para conectar con otros participantes.")
+
+    return errors, {
+        "experiencia_significativa": experiencia,
+        "intereses_personales": intereses,
+        "hobby_o_dato_curioso": dato_freak,
+        "pregunta_para_conectar": pregunta,
+    }
+
+
+def validar_etapa3(datos: dict) -> tuple:
+    errors = []
+    motivo = clean_string(datos.get("motivo_experiencia_top"))
+    if not motivo:
+        errors.append("Cuéntanos por qué te interesa tu experiencia prioritaria.")
+
+    conoce_label = _opcion(datos.get("conoce_rji"), list(CONOCE_RJI) + list(CONOCE_RJI.values()))
+    if not conoce_label:
+        errors.append("Cuéntanos si conoces la RJI antes de guardar.")
+
+    acepta_datos = bool(parse_si_no(datos.get("acepta_tratamiento_datos")))
+    if not acepta_datos:
+        errors.append("Debes aceptar el aviso de privacidad.")
+
+    acepta_whatsapp = bool(parse_si_no(datos.get("acepta_whatsapp")))
+    if not acepta_whatsapp:
+        errors.append("Debes autorizar la comunicación por WhatsApp.")
+
+    ranks = {}
+    for label, column in EXPERIENCIAS_PARTICIPANTE:
+        try:
+            ranks[column] = int(float(_stringify_cell(datos.get(column)) or 0))
+        except ValueError:
+            ranks[column] = -1
+    top = ""
+    if any(ranks.values()):
+        if sorted(ranks.values()) != list(range(1, len(ranks) + 1)):
+            errors.append(f"Ordena las experiencias del 1 al {len(ranks)} sin repetir.")
+        else:
+            top = next(label for label, column in EXPERIENCIAS_PARTICIPANTE if ranks[column] == 1)
+
+    limpio = {
+        "motivo_experiencia_top": motivo,
+        "preguntas_frecuentes": clean_string(datos.get("preguntas_frecuentes")),
+        "conoce_rji": CONOCE_RJI.get(conoce_label, conoce_label),
+        "acepta_tratamiento_datos": acepta_datos,
+        "acepta_whatsapp": acepta_whatsapp,
+        "experiencia_top_calculada": top,
+        "nivel_experticie": _opcion(datos.get("nivel_experticie"), NIVELES_EXPERTICIE) or NIVELES_EXPERTICIE[0],
+        **ranks,
+    }
+    marcados = []
+    for column, label in ACOMPANAMIENTOS.items():
+        limpio[column] = bool(parse_si_no(datos.get(column)))
+        if limpio[column]:
+            marcados.append(label)
+    limpio["acompanamientos_marcados"] = ", ".join(marcados)
+    return errors, limpio
+
+
+def validar_participante(datos: dict) -> tuple:
+    """Run the three stage validations; returns ``(errores, payload)`` for the serializer."""
+    errors = []
+    payload = {}
+    for validar in (validar_etapa1, validar_etapa2, validar_etapa3):
+        stage_errors, stage_data = validar(datos)
+        errors.extend(stage_errors)
+        payload.update(stage_data)
+    return errors, payload
@@ -0,0 +1,182 @@
+import io
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Bytes kept in RAM across all sessions of this process before spilling to disk.
+SPOOL_MEMORY_BUDGET = 64 * 1024 * 1024
+# Single files above this size go straight to disk.
+SPOOL_MAX_IN_MEMORY_ITEM = 4 * 1024 * 1024
+# Blobs not touched for this long belong to abandoned sessions.
+SPOOL_IDLE_TTL_SECONDS = 3 * 60 * 60
+SPOOL_SWEEP_INTERVAL_SECONDS = 5 * 60
+
+
+class _SpoolEntry:
+    __slots__ = ("data", "path", "size", "owner", "last_access")
+
+    def __init__(self, data, size: int, owner: str):
+        self.data = data
+        self.path = None
+        self.size = size
+        self.owner = owner
+        self.last_access = time.time()
+
+
+class UploadSpool:
+    """Process-wide holder for uploaded files, addressed by opaque handles.
+
+    Sessions keep only the handle in ``st.session_state``. Blobs live in RAM
+    while the process stays under ``memory_budget``; beyond that the least
+    recently used ones are spilled to a private temp directory. Blobs idle for
+    ``idle_ttl`` seconds are assumed abandoned and removed.
+    """
+
+    def __init__(
+        self,
+        memory_budget: int = SPOOL_MEMORY_BUDGET,
+        max_in_memory_item: int = SPOOL_MAX_IN_MEMORY_ITEM,
+        idle_ttl: float = SPOOL_IDLE_TTL_SECONDS,
+        directory=None,
+    ):
+        self.memory_budget = memory_budget
+        self.max_in_memory_item = max_in_memory_item
+        self.idle_ttl = idle_ttl
+        self._directory = Path(directory) if directory else None
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._high_water = 0
+        self._last_sweep = time.time()
+
+    def _dir(self) -> Path:
+        if self._directory is None:
+            self._directory = Path(tempfile.mkdtemp(prefix="claveriada-spool-"))
+        self._directory.mkdir(parents=True, exist_ok=True)
+        return self._directory
+
+    def _spill(self, handle: str, entry: _SpoolEntry) -> None:
+        path = self._dir() / handle
+        with open(path, "wb") as fh:
+            fh.write(entry.data)
+        entry.path = path
+        entry.data = None
+        self._memory_bytes -= entry.size
+        self._disk_bytes += entry.size
+
+    def _make_room(self, needed: int) -> None:
+        if self._memory_bytes + needed <= self.memory_budget:
+            return
+        in_memory = sorted(
+            ((h, e) for h, e in self._entries.items() if e.data is not None),
+            key=lambda item: item[1].last_access,
+        )
+        for handle, entry in in_memory:
+            if self._memory_bytes + needed <= self.memory_budget:
+                break
+            self._spill(handle, entry)
+
+    def _drop(self, handle: str) -> None:
+        entry = self._entries.pop(handle, None)
+        if entry is None:
+            return
+        if entry.data is not None:
+            self._memory_bytes -= entry.size
+        if entry.path is not None:
+            self._disk_bytes -= entry.size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def put(self, data, owner: str = "") -> str:
+        """Store ``data`` and return a handle to keep in the session."""
+        data = bytes(data)
+        handle = uuid.uuid4().hex
+        entry = _SpoolEntry(data, len(data), owner)
+        with self._lock:
+            self._sweep_locked(time.time())
+            if entry.size <= self.max_in_memory_item:
+                self._make_room(entry.size)
+            self._entries[handle] = entry
+            self._memory_bytes += entry.size
+            if entry.size > self.max_in_memory_item:
+                self._spill(handle, entry)
+            if self._memory_bytes > self._high_water:
+                self._high_water = self._memory_bytes
+                logger.info("Spool de archivos: nuevo máximo en memoria %d bytes", self._high_water)
+        return handle
+
+    def exists(self, handle: str) -> bool:
+        with self._lock:
+            return bool(handle) and handle in self._entries
+
+    def open(self, handle: str):
+        """Return a fresh seekable binary stream for ``handle``.
+
+        In-memory blobs are wrapped without copying (``BytesIO`` shares an
+        immutable ``bytes`` buffer until written), so concurrent readers such
+        as the background Drive upload do not duplicate the file.
+        """
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is None:
+                raise KeyError(handle)
+            entry.last_access = time.time()
+            if entry.data is not None:
+                return io.BytesIO(entry.data)
+            path = entry.path
+        return open(path, "rb")
+
+    def read(self, handle: str) -> bytes:
+        with self.open(handle) as fh:
+            return fh.read()
+
+    def size(self, handle: str) -> int:
+        with self._lock:
+            entry = self._entries.get(handle)
+            return entry.size if entry is not None else 0
+
+    def discard(self, handle: str) -> None:
+        with self._lock:
+            self._drop(handle)
+
+    def discard_owner(self, owner: str) -> None:
+        """Drop every blob stored for ``owner`` (a session that reset or finished)."""
+        with self._lock:
+            for handle in [h for h, e in self._entries.items() if e.owner == owner]:
+                self._drop(handle)
+
+    def _sweep_locked(self, now: float, force: bool = False) -> int:
+        if not force and now - self._last_sweep < SPOOL_SWEEP_INTERVAL_SECONDS:
+            return 0
+        self._last_sweep = now
+        expired = [h for h, e in self._entries.items() if now - e.last_access > self.idle_ttl]
+        for handle in expired:
+            self._drop(handle)
+        return len(expired)
+
+    def sweep(self) -> int:
+        """Remove blobs idle longer than ``idle_ttl``; returns how many."""
+        with self._lock:
+            return self._sweep_locked(time.time(), force=True)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+                "memory_high_water_bytes": self._high_water,
+                "memory_budget_bytes": self.memory_budget,
+            }
+
+
+upload_spool = UploadSpool()
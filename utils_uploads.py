@@ -0,0 +1,602 @@
+import hashlib
+import io
+import logging
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import closing
+from pathlib import Path
+
+from utils import (
+    _record_drive_error, drive_file_exists, drive_upload_stream,
+    hyperlink_formula, update_cells_by_key, PARTICIPANTES_COLS,
+    ACOMPANANTES_COLS, UNIFICADO_COLS,
+)
+from utils_blobstore import local_blob_store
+from utils_export import purgar_exportaciones
+from utils_mirror import local_mirror
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_WORKERS = 4
+# Finished jobs are kept around so the save step can pick up their link.
+UPLOAD_JOB_TTL_SECONDS = 60 * 60
+
+STATE_DIR = Path("state")
+DRIVE_LINKS_DB = STATE_DIR / "drive_links.sqlite3"
+# Cached links are re-checked against Drive after this long without validation.
+DRIVE_LINK_VALIDATE_AFTER_SECONDS = 6 * 60 * 60
+DRIVE_LINK_MAX_AGE_SECONDS = 180 * 24 * 60 * 60
+DRIVE_LINK_MAX_ENTRIES = 50_000
+
+UPLOAD_OUTBOX_DB = STATE_DIR / "upload_outbox.sqlite3"
+OUTBOX_POLL_SECONDS = 30
+OUTBOX_CONCURRENCY = 3
+OUTBOX_BACKOFF_BASE_SECONDS = 30
+OUTBOX_BACKOFF_MAX_SECONDS = 60 * 60
+# Rows that never show up in the sheet (the save itself failed) are given up on.
+OUTBOX_MAX_PATCH_ATTEMPTS = 20
+# Uploads that keep failing (Drive rejects the file, folder gone) end up 'abandoned'.
+OUTBOX_MAX_UPLOAD_ATTEMPTS = 12
+# Every process runs a reconciler; a claim keeps an entry to one of them. Claims
+# of a process that died are taken over after this long.
+OUTBOX_CLAIM_TTL_SECONDS = 30 * 60
+BLOB_GC_INTERVAL_SECONDS = 6 * 60 * 60
+
+_SHEET_COLUMNS = {
+    "PARTICIPANTES": PARTICIPANTES_COLS,
+    "ACOMPANANTES": ACOMPANANTES_COLS,
+    "UNIFICADO": UNIFICADO_COLS,
+}
+
+_executor = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS, thread_name_prefix="drive-upload")
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def content_hash(data, folder_id: str = "") -> str:
+    """Key used to deduplicate uploads: file bytes plus destination folder."""
+    hasher = hashlib.sha256()
+    hasher.update(data)
+    hasher.update(f"|{folder_id}".encode("utf-8"))
+    return hasher.hexdigest()
+
+
+class DriveLinkCache:
+    """Content hash -> Drive file id/link store shared by sessions and processes.
+
+    Backed by SQLite in WAL mode so several Streamlit processes on the same
+    host can read and write concurrently. Each call opens its own connection,
+    which keeps the class safe to use from the upload worker threads.
+    """
+
+    def __init__(
+        self,
+        path: Path = DRIVE_LINKS_DB,
+        validate_after: float = DRIVE_LINK_VALIDATE_AFTER_SECONDS,
+        max_age: float = DRIVE_LINK_MAX_AGE_SECONDS,
+        max_entries: int = DRIVE_LINK_MAX_ENTRIES,
+    ):
+        self.path = Path(path)
+        self.validate_after = validate_after
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.execute(
+                            """
+                            CREATE TABLE IF NOT EXISTS drive_links (
+                                content_hash TEXT PRIMARY KEY,
+                                file_id TEXT NOT NULL,
+                                link TEXT NOT NULL,
+                                created_at REAL NOT NULL,
+                                last_used_at REAL NOT NULL,
+                                validated_at REAL NOT NULL
+                            )
+                            """
+                        )
+                        conn.execute(
+                            "CREATE INDEX IF NOT EXISTS drive_links_last_used ON drive_links(last_used_at)"
+                        )
+                        conn.commit()
+                    self._initialized = True
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key: str, validate: bool = True):
+        """Return ``{"id", "link"}`` for ``key`` or None when missing or stale."""
+        now = time.time()
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT file_id, link, validated_at FROM drive_links WHERE content_hash = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            file_id, link, validated_at = row
+            if validate and now - validated_at > self.validate_after:
+                exists = drive_file_exists(file_id)
+                if exists is False:
+                    conn.execute("DELETE FROM drive_links WHERE content_hash = ?", (key,))
+                    conn.commit()
+                    return None
+                if exists:
+                    validated_at = now
+            conn.execute(
+                "UPDATE drive_links SET last_used_at = ?, validated_at = ? WHERE content_hash = ?",
+                (now, validated_at, key),
+            )
+            conn.commit()
+        return {"id": file_id, "link": link}
+
+    def put(self, key: str, file_id: str, link: str) -> None:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                """
+                INSERT INTO drive_links (content_hash, file_id, link, created_at, last_used_at, validated_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(content_hash) DO UPDATE SET
+                    file_id = excluded.file_id,
+                    link = excluded.link,
+                    last_used_at = excluded.last_used_at,
+                    validated_at = excluded.validated_at
+                """,
+                (key, file_id, link, now, now, now),
+            )
+            conn.commit()
+
+    def discard(self, key: str) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute("DELETE FROM drive_links WHERE content_hash = ?", (key,))
+            conn.commit()
+
+    def evict(self) -> int:
+        """Drop entries unused for ``max_age`` and trim to ``max_entries`` (LRU)."""
+        cutoff = time.time() - self.max_age
+        with closing(self._connect()) as conn:
+            removed = conn.execute(
+                "DELETE FROM drive_links WHERE last_used_at < ?", (cutoff,)
+            ).rowcount
+            removed += conn.execute(
+                """
+                DELETE FROM drive_links WHERE content_hash IN (
+                    SELECT content_hash FROM drive_links
+                    ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            ).rowcount
+            conn.commit()
+        return removed
+
+
+drive_link_cache = DriveLinkCache()
+
+
+def _open_source(source):
+    """Upload sources are either bytes or a callable returning a binary stream."""
+    return source() if callable(source) else io.BytesIO(source)
+
+
+def _run_upload(source, filename: str, folder_id: str, key: str) -> dict:
+    try:
+        cached = drive_link_cache.get(key)
+    except sqlite3.Error:
+        cached = None
+    if cached:
+        return cached
+
+    with _open_source(source) as stream:
+        result = drive_upload_stream(stream, filename, folder_id=folder_id)
+    try:
+        drive_link_cache.put(key, result["id"], result["link"])
+        drive_link_cache.evict()
+    except sqlite3.Error:
+        pass
+    return result
+
+
+def _prune_jobs(now: float) -> None:
+    expired = [
+        key
+        for key, (future, started_at) in _jobs.items()
+        if future.done() and now - started_at > UPLOAD_JOB_TTL_SECONDS
+    ]
+    for key in expired:
+        _jobs.pop(key, None)
+
+
+def start_upload(source, filename: str, folder_id: str = "", key: str = "") -> str:
+    """Schedule a background Drive upload and return its content-hash key.
+
+    ``source`` is the file content or a callable that opens it (for example
+    ``lambda: upload_spool.open(handle)``), in which case ``key`` is required.
+    Calls with the same content share a single job, so re-running the script
+    while the transfer is in flight does not start a second upload. Failed
+    jobs are replaced on the next call so the save step can retry.
+    """
+    key = key or content_hash(source, folder_id)
+    now = time.time()
+    with _jobs_lock:
+        _prune_jobs(now)
+        entry = _jobs.get(key)
+        if entry is not None:
+            future, _ = entry
+            if not future.done() or future.exception() is None:
+                return key
+        future = _executor.submit(_run_upload, source, filename, folder_id, key)
+        _jobs[key] = (future, now)
+    return key
+
+
+def upload_status(key: str) -> str:
+    """Return ``"pending"``, ``"done"``, ``"failed"`` or ``""`` for unknown keys."""
+    with _jobs_lock:
+        entry = _jobs.get(key)
+    if entry is None:
+        return ""
+    future, _ = entry
+    if not future.done():
+        return "pending"
+    return "failed" if future.exception() is not None else "done"
+
+
+def wait_for_upload(source, filename: str, folder_id: str = "", key: str = "", timeout=None) -> str:
+    """Return the Drive link for ``source``, waiting for the background job.
+
+    Starts the upload if no job exists for this content (for example after a
+    server restart). Returns ``""`` on failure or when ``timeout`` expires; the
+    error is recorded like the synchronous upload helpers do.
+    """
+    key = start_upload(source, filename, folder_id, key=key)
+    with _jobs_lock:
+        future, _ = _jobs[key]
+    try:
+        result = future.result(timeout=timeout)
+    except FutureTimeoutError:
+        _record_drive_error("La subida a Drive sigue en curso.")
+        return ""
+    except RuntimeError as exc:
+        _record_drive_error(str(exc))
+        return ""
+    except Exception as exc:
+        _record_drive_error(f"Error al subir a Drive: {exc}")
+        return ""
+
+    _record_drive_error("")
+    return result["link"]
+
+
+class UploadOutbox:
+    """Persistent queue of files whose Drive link still has to reach the sheet.
+
+    Each entry remembers the local copy, the Drive destination and which cell
+    to patch: the ``target_column`` of the row whose ``key_column`` equals
+    ``key_value`` and that still holds ``placeholder`` (the local path written
+    when the save could not wait for Drive).
+
+    Entries are claimed before they are worked on, so the reconcilers of
+    several app processes never upload or patch the same entry twice.
+    Entries that cannot succeed end in ``abandoned`` with their last error.
+    """
+
+    def __init__(self, path: Path = UPLOAD_OUTBOX_DB):
+        self.path = Path(path)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+                        conn.execute("PRAGMA journal_mode=WAL")
+                        conn.execute(
+                            """
+                            CREATE TABLE IF NOT EXISTS upload_outbox (
+                                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                content_hash TEXT NOT NULL,
+                                local_path TEXT NOT NULL,
+                                filename TEXT NOT NULL,
+                                folder_id TEXT NOT NULL,
+                                spreadsheet_id TEXT NOT NULL,
+                                sheet TEXT NOT NULL,
+                                key_column TEXT NOT NULL,
+                                key_value TEXT NOT NULL,
+                                target_column TEXT NOT NULL,
+                                placeholder TEXT NOT NULL,
+                                label TEXT NOT NULL,
+                                status TEXT NOT NULL DEFAULT 'pending',
+                                link TEXT NOT NULL DEFAULT '',
+                                attempts INTEGER NOT NULL DEFAULT 0,
+                                patch_attempts INTEGER NOT NULL DEFAULT 0,
+                                next_attempt_at REAL NOT NULL,
+                                last_error TEXT NOT NULL DEFAULT '',
+                                created_at REAL NOT NULL,
+                                claimed_by TEXT NOT NULL DEFAULT '',
+                                claimed_at REAL NOT NULL DEFAULT 0
+                            )
+                            """
+                        )
+                        columns = {row[1] for row in conn.execute("PRAGMA table_info(upload_outbox)")}
+                        # Colas creadas antes de que existieran los claims.
+                        if "claimed_by" not in columns:
+                            conn.execute("ALTER TABLE upload_outbox ADD COLUMN claimed_by TEXT NOT NULL DEFAULT ''")
+                        if "claimed_at" not in columns:
+                            conn.execute("ALTER TABLE upload_outbox ADD COLUMN claimed_at REAL NOT NULL DEFAULT 0")
+                        conn.execute(
+                            "CREATE INDEX IF NOT EXISTS upload_outbox_due ON upload_outbox(status, next_attempt_at)"
+                        )
+                        conn.commit()
+                    self._initialized = True
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def enqueue(
+        self,
+        content_hash: str,
+        local_path,
+        filename: str,
+        folder_id: str,
+        spreadsheet_id: str,
+        sheet: str,
+        key_column: str,
+        key_value: str,
+        target_column: str,
+        placeholder: str,
+        label: str = "",
+    ) -> int:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            cur = conn.execute(
+                """
+                INSERT INTO upload_outbox (
+                    content_hash, local_path, filename, folder_id, spreadsheet_id, sheet,
+                    key_column, key_value, target_column, placeholder, label,
+                    next_attempt_at, created_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    content_hash, str(local_path), filename, folder_id, spreadsheet_id, sheet,
+                    key_column, key_value, target_column, placeholder, label or filename,
+                    now, now,
+                ),
+            )
+            conn.commit()
+            return cur.lastrowid
+
+    def _claim(self, status: str, limit: int = -1) -> list:
+        """Atomically claim up to ``limit`` unclaimed entries in ``status`` and return them.
+
+        The claim is a single ``UPDATE``, so two reconcilers (one per app
+        process) never get the same entry; a claim older than
+        ``OUTBOX_CLAIM_TTL_SECONDS`` is considered dead and can be taken over.
+        """
+        now = time.time()
+        token = f"{self.owner}:{uuid.uuid4().hex}"
+        due_filter = "AND next_attempt_at <= ?" if status == "pending" else ""
+        params = [token, now, status, *([now] if due_filter else []), now - OUTBOX_CLAIM_TTL_SECONDS, limit]
+        with closing(self._connect()) as conn:
+            conn.execute(
+                f"""
+                UPDATE upload_outbox SET claimed_by = ?, claimed_at = ?
+                WHERE id IN (
+                    SELECT id FROM upload_outbox
+                    WHERE status = ? {due_filter} AND (claimed_by = '' OR claimed_at < ?)
+                    ORDER BY next_attempt_at, id LIMIT ?
+                )
+                """,
+                params,
+            )
+            conn.commit()
+            return conn.execute(
+                "SELECT * FROM upload_outbox WHERE claimed_by = ? ORDER BY id", (token,)
+            ).fetchall()
+
+    def due(self, limit: int) -> list:
+        """Claim pending entries whose next attempt is due."""
+        return self._claim("pending", limit)
+
+    def uploaded(self) -> list:
+        """Claim uploaded entries whose link still has to be written to the sheet."""
+        return self._claim("uploaded")
+
+    def mark_uploaded(self, entry_id: int, link: str) -> None:
+        with closing(self._connect()) as conn:
+            conn.execute(
+                """
+                UPDATE upload_outbox SET status = 'uploaded', link = ?, last_error = '', claimed_by = ''
+                WHERE id = ?
+                """,
+                (link, entry_id),
+            )
+            conn.commit()
+
+    def mark_failed(self, entry_id: int, attempts: int, error: str, final: bool = False) -> None:
+        """Retry later with backoff; give up after ``OUTBOX_MAX_UPLOAD_ATTEMPTS`` or when ``final``."""
+        delay = min(OUTBOX_BACKOFF_BASE_SECONDS * 2 ** attempts, OUTBOX_BACKOFF_MAX_SECONDS)
+        delay *= 0.5 + random.random()
+        status = "abandoned" if final or attempts >= OUTBOX_MAX_UPLOAD_ATTEMPTS else "pending"
+        with closing(self._connect()) as conn:
+            conn.execute(
+                """
+                UPDATE upload_outbox
+                SET attempts = ?, next_attempt_at = ?, last_error = ?, status = ?, claimed_by = ''
+                WHERE id = ?
+                """,
+                (attempts, time.time() + delay, error, status, entry_id),
+            )
+            conn.commit()
+        if status == "abandoned":
+            logger.error("Outbox de subidas: se abandona la entrada %s: %s", entry_id, error)
+
+    def mark_patched(self, entry_ids: list) -> None:
+        with closing(self._connect()) as conn:
+            conn.executemany(
+                "UPDATE upload_outbox SET status = 'done', claimed_by = '' WHERE id = ?",
+                [(entry_id,) for entry_id in entry_ids],
+            )
+            conn.commit()
+
+    def mark_unpatched(self, entry_ids: list, error: str) -> None:
+        with closing(self._connect()) as conn:
+            conn.executemany(
+                """
+                UPDATE upload_outbox
+                SET patch_attempts = patch_attempts + 1,
+                    last_error = ?,
+                    status = CASE WHEN patch_attempts + 1 >= ? THEN 'abandoned' ELSE status END,
+                    claimed_by = ''
+                WHERE id = ?
+                """,
+                [(error, OUTBOX_MAX_PATCH_ATTEMPTS, entry_id) for entry_id in entry_ids],
+            )
+            conn.commit()
+
+    def pending_count(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM upload_outbox WHERE status IN ('pending', 'uploaded')"
+            ).fetchone()[0]
+
+
+upload_outbox = UploadOutbox()
+
+
+def _file_opener(path: str):
+    return lambda: open(path, "rb")
+
+
+def reconcile_outbox(outbox: UploadOutbox = None, concurrency: int = OUTBOX_CONCURRENCY) -> dict:
+    """Run one reconciliation round and return counters for logging.
+
+    Due entries are uploaded ``concurrency`` at a time through the shared
+    upload jobs (so content already in flight or in the link cache is not
+    sent twice). Every entry with a link is then written back with a single
+    batched update per spreadsheet/sheet/column.
+    """
+    outbox = outbox or upload_outbox
+    counters = {"uploaded": 0, "failed": 0, "patched": 0}
+
+    due = outbox.due(limit=concurrency)
+    jobs = []
+    for entry in due:
+        if not Path(entry["local_path"]).exists():
+            # Sin copia local no hay nada que reintentar.
+            outbox.mark_failed(entry["id"], entry["attempts"] + 1, "No existe la copia local.", final=True)
+            counters["failed"] += 1
+            continue
+        key = start_upload(
+            _file_opener(entry["local_path"]),
+            entry["filename"],
+            entry["folder_id"],
+            key=entry["content_hash"],
+        )
+        with _jobs_lock:
+            future, _ = _jobs[key]
+        jobs.append((entry, future))
+
+    for entry, future in jobs:
+        try:
+            result = future.result()
+        except Exception as exc:
+            outbox.mark_failed(entry["id"], entry["attempts"] + 1, str(exc))
+            counters["failed"] += 1
+        else:
+            outbox.mark_uploaded(entry["id"], result["link"])
+            counters["uploaded"] += 1
+
+    groups = {}
+    for entry in outbox.uploaded():
+        group_key = (entry["spreadsheet_id"], entry["sheet"], entry["key_column"], entry["target_column"])
+        groups.setdefault(group_key, []).append(entry)
+
+    for (spreadsheet_id, sheet, key_column, target_column), entries in groups.items():
+        updates = [
+            (entry["key_value"], entry["placeholder"], hyperlink_formula(entry["link"], entry["label"]))
+            for entry in entries
+        ]
+        try:
+            applied = update_cells_by_key(
+                spreadsheet_id,
+                sheet,
+                key_column,
+                target_column,
+                updates,
+                _SHEET_COLUMNS.get(sheet, PARTICIPANTES_COLS),
+            )
+        except Exception as exc:
+            outbox.mark_unpatched([entry["id"] for entry in entries], f"Error al actualizar la hoja: {exc}")
+            continue
+        done = [entry["id"] for entry, ok in zip(entries, applied) if ok]
+        missing = [entry["id"] for entry, ok in zip(entries, applied) if not ok]
+        outbox.mark_patched(done)
+        if done:
+            # Celdas editadas en filas existentes: el espejo incremental no las ve.
+            local_mirror.marcar_editada(sheet)
+        for entry, ok in zip(entries, applied):
+            if ok:
+                local_blob_store.mark_in_drive(entry["local_path"], entry["link"])
+        if missing:
+            outbox.mark_unpatched(missing, "No se encontró la fila con la ruta local en la hoja.")
+        counters["patched"] += len(done)
+
+    return counters
+
+
+_reconciler_lock = threading.Lock()
+_reconciler_thread = None
+
+
+def _reconciler_loop(poll_seconds: float) -> None:
+    last_gc = 0.0
+    while True:
+        try:
+            counters = reconcile_outbox()
+            if any(counters.values()):
+                logger.info("Outbox de subidas: %s", counters)
+        except Exception:
+            logger.exception("Fallo la reconciliación del outbox de subidas")
+        if time.time() - last_gc > BLOB_GC_INTERVAL_SECONDS:
+            last_gc = time.time()
+            try:
+                reclaimed = local_blob_store.gc()
+                if reclaimed["blobs"]:
+                    logger.info("GC de uploads/: %s", reclaimed)
+            except Exception:
+                logger.exception("Fallo el GC de uploads/")
+        purgadas = purgar_exportaciones()
+        if purgadas:
+            logger.info("Exportaciones vencidas borradas: %d", purgadas)
+        time.sleep(poll_seconds)
+
+
+def start_reconciler(poll_seconds: float = OUTBOX_POLL_SECONDS) -> None:
+    """Start the background reconciler once per process (idempotent)."""
+    global _reconciler_thread
+    with _reconciler_lock:
+        if _reconciler_thread is not None and _reconciler_thread.is_alive():
+            return
+        _reconciler_thread = threading.Thread(
+            target=_reconciler_loop,
+            args=(poll_seconds,),
+            name="upload-outbox-reconciler",
+            daemon=True,
+        )
+        _reconciler_thread.start()